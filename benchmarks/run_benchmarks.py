@@ -0,0 +1,158 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+
+import argparse
+import json
+import resource
+import subprocess
+import time
+from datetime import datetime
+from typing import *
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.path.join(HERE, "history.json")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+SIZES = (10, 100, 1000, 100000)
+
+def _instance(n: int, trials: int):
+    from prisoners_problem.problem_instance import Instance
+    template = Instance(n).get_template()
+    for _ in range(trials):
+        Instance.from_template(template)
+
+def _compact_instance(n: int, trials: int):
+    from prisoners_problem.problem_instance import CompactInstance
+    for _ in range(trials):
+        CompactInstance(n).boxes
+
+def _cycle_following(n: int, trials: int):
+    from prisoners_problem.problem_instance import Instance
+    from prisoners_problem.cycle_following import cycle_following
+    instance = Instance(n)
+    for _ in range(trials):
+        cycle_following(instance)
+
+def _benchmark(n: int, trials: int):
+    from prisoners_problem.problem_instance import Instance
+    from prisoners_problem.benchmark import benchmark
+    instance = Instance(n)
+    for _ in range(trials):
+        benchmark(instance)
+
+def _simulation(strategy: str, engine: str):
+    def run(n: int, trials: int):
+        from prisoners_problem.problem_instance import Instance
+        from prisoners_problem.simulations import run_simulation_histogram
+        run_simulation_histogram("bench", strategy, trials, Instance(n), engine=engine)
+    return run
+
+# case name -> (function, {n: trials}), sizes missing from a case are skipped
+CASES = {
+    "instance": (_instance, {10: 20000, 100: 5000, 1000: 500, 100000: 5}),
+    "compact_instance": (_compact_instance, {10: 20000, 100: 20000, 1000: 5000, 100000: 50}),
+    "cycle_following": (_cycle_following, {10: 20000, 100: 5000, 1000: 500, 100000: 5}),
+    # pure Python random picking draws up to n // 2 boxes for each of n prisoners, O(n**2) per trial, so no 100000 case
+    "benchmark": (_benchmark, {10: 5000, 100: 500, 1000: 50}),
+    "run_simulation[cycle_following,python]": (_simulation("cycle_following", "python"), {10: 5000, 100: 1000, 1000: 100, 100000: 2}),
+    "run_simulation[cycle_following,numpy]": (_simulation("cycle_following", "numpy"), {10: 200000, 100: 100000, 1000: 10000, 100000: 50}),
+    "run_simulation[cycle_following,jit]": (_simulation("cycle_following", "jit"), {10: 200000, 100: 100000, 1000: 10000, 100000: 50}),
+    "run_simulation[cycle_following,cycle_type]": (_simulation("cycle_following", "cycle_type"), {10: 1000000, 100: 1000000, 1000: 1000000, 100000: 1000000}),
+    "run_simulation[random,python]": (_simulation("random", "python"), {10: 2000, 100: 200, 1000: 20}),
+    "run_simulation[random,numpy]": (_simulation("random", "numpy"), {10: 1000000, 100: 1000000, 1000: 1000000, 100000: 1000000}),
+}
+
+def run_case(name: str, n: int, repeat: int=3) -> Dict[str, float]:
+    """
+    Time one case in the current process. Return the best trials/sec over repeat runs and the process peak RSS in MB.
+    """
+    func, trials = CASES[name][0], CASES[name][1][n]
+    func(n, 1) # warm up imports and caches
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(n, trials)
+        best = min(best, time.perf_counter() - start)
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KB on Linux
+    return {"trials": trials, "seconds": best, "trials_per_sec": trials / best, "peak_rss_mb": peak_rss}
+
+def run_isolated(name: str, n: int, repeat: int) -> Dict[str, float]:
+    """
+    Run one case in a fresh interpreter, so that peak RSS belongs to that case alone.
+    """
+    out = subprocess.run([sys.executable, __file__, "--case", name, "--n", str(n), "--repeat", str(repeat)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Return a message for every case whose throughput dropped more than threshold (fraction) below the baseline.
+    """
+    regressions = []
+    for key, result in results.items():
+        if key in baseline:
+            ratio = result["trials_per_sec"] / baseline[key]["trials_per_sec"]
+            if ratio < 1 - threshold:
+                regressions.append(f"{key}: {result['trials_per_sec']:.4g} trials/sec, {ratio:.0%} of baseline {baseline[key]['trials_per_sec']:.4g}")
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Throughput benchmarks for the prisoners problem engines")
+
+    parser.add_argument('--cases', type=str, default=None, help="Comma separated case names (default: all)")
+    parser.add_argument('--sizes', type=str, default=None, help="Comma separated problem sizes (default: 10,100,1000,100000)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case, the best one is kept")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Allowed throughput drop against the baseline")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--case', type=str, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--n', type=int, default=None, help=argparse.SUPPRESS)
+
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.case is not None: # child process of run_isolated
+        print(json.dumps(run_case(args.case, args.n, args.repeat)))
+        return
+
+    names = args.cases.split(",") if args.cases else list(CASES)
+    sizes = [int(x) for x in args.sizes.split(",")] if args.sizes else SIZES
+    results = {}
+    for name in names:
+        for n in sizes:
+            if n not in CASES[name][1]:
+                continue
+            key = f"{name}/n={n}"
+            results[key] = run_isolated(name, n, args.repeat)
+            print(f"{key:<50} {results[key]['trials_per_sec']:>14.4g} trials/sec {results[key]['peak_rss_mb']:>10.1f} MB")
+
+    history = []
+    if os.path.exists(HISTORY_PATH):
+        with open(HISTORY_PATH) as f:
+            history = json.load(f)
+    history.append({"timestamp": datetime.now().isoformat(timespec="seconds"), "commit": _git_commit(), "results": results})
+    with open(HISTORY_PATH, "w") as f:
+        json.dump(history, f, indent=1)
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"Baseline saved as {BASELINE_PATH}")
+    elif os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Throughput regressions:\n" + "\n".join(regressions))
+            sys.exit(1)
+        print("No throughput regression against baseline.")
+
+if __name__ == "__main__":
+    main()
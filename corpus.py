@@ -0,0 +1,10 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath('src'))
+
+
+from prisoners_problem.corpus import main
+
+if __name__ == "__main__":
+    main()
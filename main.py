@@ -5,10 +5,10 @@ sys.path.append(os.path.abspath('src'))
 
 
 import argparse
-from prisoners_problem.simulations import run_simulation
+import json
+from prisoners_problem.simulations import run_simulation_histogram
 from prisoners_problem.problem_instance import Instance
-from prisoners_problem.figures import plot_success_dist
-import matplotlib.pyplot as plt
+from prisoners_problem.strategies import available_strategies, get_strategy
 from datetime import datetime
 
 
@@ -20,10 +20,40 @@ def parse_args():
     parser.add_argument('--open_counts', type=int, default=50, help="Number of boxes that can be opened")
     parser.add_argument('--num_trials', type=int, default=1000, help="Number of simulation trials")
     parser.add_argument('--shift', type=int, default=0, help="Shift value for shifted strategy")
-    parser.add_argument('--strategy', choices=['random', 'cycle_following'], default='cycle_following', help="Simulation strategy")
+    parser.add_argument('--strategy', choices=available_strategies(), default='cycle_following', help="Simulation strategy")
+    parser.add_argument('--engine', choices=['python', 'numpy', 'jit', 'cycle_type', 'auto'], default=None, help="Simulation engine (python, numpy with a variance-reduced --estimator), jit runs compiled kernels (numba, optional), cycle_type samples cycle lengths instead of permutations (shift 0, as many boxes as prisoners), auto picks the fastest implementation of the strategy")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--exact', action='store_true', help="Compute the exact success distribution instead of simulating")
+    parser.add_argument('--corpus', type=str, default=None, help="Replay the rows of a permutation corpus (see corpus.py) instead of drawing boxes")
+    parser.add_argument('--cache_dir', type=str, default=None, help="Directory of the persistent result cache")
+    parser.add_argument('--profile', action='store_true', help="Report per-phase time, counters and progress")
+    parser.add_argument('--profile_out', type=str, default=None, help="Write a Chrome trace (.json) or cProfile stats (.prof/.pstats)")
+    parser.add_argument('--target_ci', type=float, default=None, help="Stop once the confidence interval of the success rate is within +- target_ci, num_trials is then the maximum")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Confidence level of the interval")
+    parser.add_argument('--ci_method', choices=['wilson', 'clopper_pearson'], default='wilson', help="Confidence interval method")
+    parser.add_argument('--estimator', choices=['plain', 'conditional', 'control_variate'], default=None, help="Only estimate the all-succeed rate with its standard error, conditional (random) and control_variate (shifted or extra boxes cycle following) need fewer trials")
+    parser.add_argument('--seed', type=int, default=None, help="Master random seed, required for checkpointed runs")
+    parser.add_argument('--checkpoint_dir', type=str, default=None, help="Run in shards saved to this directory, a restarted run skips the completed shards")
+    parser.add_argument('--shard', type=str, default=None, help="Only run shard k/N (0 <= k < N) of a checkpointed run, e.g. one per machine")
+    parser.add_argument('--merge', type=str, default=None, metavar='CHECKPOINT_DIR', help="Combine the shards of a checkpoint directory and report them")
     parser.add_argument('--title', type=str, default="", help="Custom title for the simulation")
+    parser.add_argument('--output', choices=['plot', 'json'], default='plot', help="Plot and save the distribution, or print the results as JSON")
+    parser.add_argument('--no-plot', dest='no_plot', action='store_true', help="Only print the results, do not plot")
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.exact and (args.workers or args.corpus or args.cache_dir or args.target_ci or args.checkpoint_dir or args.shard or args.merge or args.profile or args.profile_out):
+        parser.error("--exact is not supported together with --workers, --corpus, --cache_dir, --target_ci, --checkpoint_dir, --shard, --merge or --profile")
+    if args.shard and not args.checkpoint_dir:
+        parser.error("--shard needs --checkpoint_dir")
+    if args.checkpoint_dir and args.seed is None:
+        parser.error("--checkpoint_dir needs --seed")
+    if args.checkpoint_dir and (args.cache_dir or args.target_ci or args.profile or args.profile_out):
+        parser.error("--checkpoint_dir is not supported together with --cache_dir, --target_ci or --profile")
+    if args.estimator and (args.corpus or args.workers or args.checkpoint_dir or args.shard or args.merge or args.cache_dir or args.profile or args.profile_out):
+        parser.error("--estimator is not supported together with --corpus, --workers, --checkpoint_dir, --shard, --merge, --cache_dir or --profile")
+    if (args.profile or args.profile_out) and args.workers:
+        parser.error("--profile is not supported together with --workers")
+    return args
 
 def main():
     args = parse_args()
@@ -34,14 +64,88 @@ def main():
     shift = args.shift
     strategy_name = args.strategy
     title_name = args.title if args.title else f"{strategy_name.upper().replace('_', ' ')} (#p={num_prisoners}, #b={num_boxes}, max_open={open_counts}, trials={num_trials})"
-    if strategy_name == "cycle_following" and shift != 0:
+    if get_strategy(strategy_name).uses_shift and shift != 0:
         title_name = title_name[:-1] + f", shift = {shift}" + title_name[-1]
     
-    instance = Instance(num_prisoners=num_prisoners, num_boxes=num_boxes, open_counts=open_counts)
-    simu_info, results = run_simulation(name=title_name, strategy=strategy_name, num_trials=num_trials, instance_template=instance, shift=shift)
-    
-    fig = plot_success_dist(simu_info, results)
-    plt.show()
+    instance = Instance(num_prisoners=num_prisoners, num_boxes=num_boxes, open_counts=open_counts, seed=args.seed)
+    if args.exact:
+        from prisoners_problem.exact import run_exact
+        simu_info, dist = run_exact(name=title_name, strategy=strategy_name, instance_template=instance, shift=shift)
+        if args.output == "json":
+            print(json.dumps({**simu_info, "success_rate": dist[-1], "distribution": dist}))
+            return
+        print(f"Exact success rate: {dist[-1] * 100:.6g}%")
+        print(f"Expected # of successful prisoners: {round(sum(k * p for k, p in enumerate(dist)), 4)}")
+        return
+
+    engine = args.engine or ("numpy" if args.estimator in ("conditional", "control_variate") else "python")
+    if args.estimator:
+        from prisoners_problem.simulations import estimate_success_rate
+        estimate = estimate_success_rate(strategy_name, instance, shift, target_ci=args.target_ci, max_trials=num_trials, engine=engine,
+                                         confidence=args.confidence, ci_method=args.ci_method, estimator=args.estimator)
+        if args.output == "json":
+            print(json.dumps({**instance.get_template(), "name": title_name, "strategy": strategy_name, "shift": shift, **estimate}))
+            return
+        print(f"Success rate: {estimate['success_rate'] * 100:.6g}% (standard error {estimate['std_error'] * 100:.2g}%, {args.estimator} estimator)")
+        print(f"{args.confidence * 100:g}% CI: [{estimate['ci_low'] * 100:.6g}%, {estimate['ci_high'] * 100:.6g}%] after {estimate['num_trials']} trials, "
+              f"effective sample size gain {estimate['ess_gain']:.3g}")
+        return
+
+    profiler = None
+    if args.profile or args.profile_out:
+        from prisoners_problem.profiling import Profiler, print_progress
+        profiler = Profiler(progress=print_progress if args.output != "json" else None, cprofile=bool(args.profile_out) and not args.profile_out.endswith(".json"))
+    cache = None
+    if args.cache_dir:
+        from prisoners_problem.cache import ResultCache
+        cache = ResultCache(args.cache_dir)
+    corpus = None
+    if args.corpus:
+        from prisoners_problem.corpus import PermutationCorpus
+        corpus = PermutationCorpus(args.corpus)
+    log = sys.stderr if args.output == "json" else sys.stdout # keep stdout parseable in json mode
+    if args.merge:
+        from prisoners_problem.checkpoint import merge_shards
+        simu_info, results = merge_shards(args.merge)
+        title_name = simu_info["name"]
+    elif args.checkpoint_dir:
+        from prisoners_problem.checkpoint import parse_shard, run_shard, run_checkpointed
+        if args.shard:
+            shard, num_shards = parse_shard(args.shard)
+            _, histogram = run_shard(args.checkpoint_dir, title_name, strategy_name, num_trials, instance, shift, engine, shard, num_shards, args.workers, corpus)
+            print(f"Shard {shard}/{num_shards} ({histogram.num_trials} trials) saved in {args.checkpoint_dir}", file=log)
+            return
+        simu_info, results = run_checkpointed(args.checkpoint_dir, title_name, strategy_name, num_trials, instance, shift, engine, workers=args.workers, corpus=corpus,
+                                              progress=lambda done, total: print(f"Shard {done}/{total} done", file=log))
+    else:
+        simu_info, results = run_simulation_histogram(name=title_name, strategy=strategy_name, num_trials=num_trials, instance_template=instance, shift=shift, engine=engine, workers=args.workers, cache=cache, profile=profiler or False, corpus=corpus,
+                                                      target_ci=args.target_ci, confidence=args.confidence, ci_method=args.ci_method)
+    if profiler is not None:
+        print(profiler.summary(), file=log)
+        if args.profile_out:
+            if args.profile_out.endswith(".json"):
+                profiler.dump_chrome_trace(args.profile_out)
+            else:
+                profiler.dump_stats(args.profile_out)
+            print(f"Profile saved as {args.profile_out}", file=log)
+    if args.output == "json":
+        print(json.dumps({**simu_info, "success_rate": results.success_rate, "counts": results.counts}))
+        return
+    if args.no_plot:
+        print(f"Success rate: {results.success_rate * 100:.4g}%")
+        if "ci" in simu_info:
+            ci = simu_info["ci"]
+            print(f"{ci['confidence'] * 100:g}% CI: [{ci['low'] * 100:.4g}%, {ci['high'] * 100:.4g}%] after {results.num_trials} trials")
+        return
+
+    # plotting is the only feature needing matplotlib, import it here to keep headless runs fast
+    from prisoners_problem.figures import SuccessDistPlot, has_display
+    # without a display, draw on a bare Agg figure and only save it
+    show = has_display()
+    fig = SuccessDistPlot(simu_info, pyplot=show).update(results)
+    if show:
+        import matplotlib.pyplot as plt
+        plt.show()
 
     save_dir = "images"
     if not os.path.exists(save_dir):
@@ -0,0 +1,255 @@
+from prisoners_problem.profiling import maybe_phase
+from typing import *
+
+# Number of box entries (trials * num_boxes) generated per chunk by the batched engine.
+CHUNK_ELEMENTS = 1 << 20
+
+def random_permutations(rng, num_trials: int, num_boxes: int):
+    """
+    Generate a (num_trials, num_boxes) matrix whose rows are uniform random permutations of range(num_boxes).
+
+    Parameters
+    --------
+    rng: numpy.random.Generator
+        Random generator
+    num_trials: int
+        Number of rows (trials)
+    num_boxes: int
+        Length of each permutation
+
+    Returns
+    --------
+    numpy.ndarray
+        Permutation matrix, row t records the boxes of trial t.
+    """
+    # argsort of i.i.d. keys yields uniform permutations and beats a row-wise shuffle
+    return rng.random((num_trials, num_boxes)).argsort(axis=1)
+
+def cycle_lengths_batch(perms, shift: int=0):
+    """
+    Batched cycle decomposition. Every row of perms is an independent trial and all rows are walked in lock-step.
+    Return the length of the cycle through every box under x -> (perms[t][x] + shift) % num_boxes,
+    row by row the same as cycle_decomposition.
+
+    Parameters
+    --------
+    perms: numpy.ndarray
+        (trials, num_boxes) matrix, perms[t][i] means the number card in box i of trial t
+    shift: int, optional = 0
+        Shift value, see cycle_following
+
+    Returns
+    --------
+    numpy.ndarray
+        (trials, num_boxes) matrix of cycle lengths.
+    """
+    import numpy as np
+
+    perms = np.asarray(perms)
+    num_trials, num_boxes = perms.shape
+    if num_trials == 0 or num_boxes == 0:
+        return np.zeros((num_trials, num_boxes), dtype=np.int64)
+
+    # work on flat indices so that one gather advances every trial at once
+    offsets = np.arange(num_trials, dtype=np.intp) * num_boxes
+    nxt = ((perms.astype(np.intp, copy=False) + shift) % num_boxes).ravel() + np.repeat(offsets, num_boxes)
+    visited = np.zeros(num_trials * num_boxes, dtype=bool)
+    # every box is labelled with a per-trial cycle slot, slot lengths are filled in when the cycle closes
+    labels = np.empty(num_trials * num_boxes, dtype=np.intp)
+    slot_lengths = np.zeros(num_trials * num_boxes, dtype=np.int64)
+    slot = offsets.copy()
+    start = offsets.copy()
+    curr = start.copy()
+    visited[start] = True
+    labels[start] = slot
+    began = np.zeros(num_trials, dtype=np.int64)
+
+    # every step visits exactly one new box per trial, so n steps close all cycles
+    for step in range(num_boxes):
+        curr = nxt[curr]
+        closed = curr == start
+        if closed.any():
+            rows = np.flatnonzero(closed)
+            slot_lengths[slot[rows]] = step + 1 - began[rows]
+            if step == num_boxes - 1:
+                break
+            slot[rows] += 1
+            # restart each closed trial from its first unvisited box
+            heads = offsets[rows] + np.argmin(visited.reshape(num_trials, num_boxes)[rows], axis=1)
+            start[rows] = heads
+            curr[rows] = heads
+            began[rows] = step + 1
+        visited[curr] = True
+        labels[curr] = slot
+
+    return slot_lengths[labels].reshape(num_trials, num_boxes)
+
+def cycle_following_batch(perms, num_prisoners: int, open_counts: int, shift: int=0):
+    """
+    Batched cycle following strategy. Every row of perms is an independent trial and all rows are walked in lock-step.
+    Return the number of successful prisoners in each trial, identical to cycle_following(instance, shift)[1] row by row.
+
+    Parameters
+    --------
+    perms: numpy.ndarray
+        (trials, num_boxes) matrix, perms[t][i] means the number card in box i of trial t
+    num_prisoners: int
+        Number of prisoners
+    open_counts: int
+        Maximum number for a prisoner to open boxes
+    shift: int, optional = 0
+        Shift value, see cycle_following
+
+    Returns
+    --------
+    numpy.ndarray
+        Number of successful prisoners in each trial.
+    """
+    import numpy as np
+
+    perms = np.asarray(perms)
+    num_trials, num_boxes = perms.shape
+    success = np.zeros(num_trials, dtype=np.int64)
+    if num_trials == 0 or num_boxes == 0:
+        return success
+
+    # work on flat indices so that one gather advances every trial at once
+    offsets = np.arange(num_trials, dtype=np.intp) * num_boxes
+    nxt = ((perms.astype(np.intp, copy=False) + shift) % num_boxes).ravel() + np.repeat(offsets, num_boxes)
+    visited = np.zeros(num_trials * num_boxes, dtype=bool)
+    limit = offsets + num_prisoners
+    start = offsets.copy()
+    curr = start.copy()
+    visited[start] = True
+    # cycle length and prisoner members are derived from running counters at the cycle head
+    began = np.zeros(num_trials, dtype=np.int64)
+    found = (start < limit).astype(np.int64)
+    found_at_start = np.zeros(num_trials, dtype=np.int64)
+
+    # every step visits exactly one new box per trial, so n steps close all cycles
+    for step in range(num_boxes):
+        curr = nxt[curr]
+        closed = curr == start
+        if closed.any():
+            rows = np.flatnonzero(closed)
+            members = found[rows] - found_at_start[rows]
+            success[rows] += np.where(step + 1 - began[rows] <= open_counts, members, 0)
+            if step == num_boxes - 1:
+                break
+            # restart each closed trial from its first unvisited box
+            heads = offsets[rows] + np.argmin(visited.reshape(num_trials, num_boxes)[rows], axis=1)
+            start[rows] = heads
+            curr[rows] = heads
+            began[rows] = step + 1
+            found_at_start[rows] = found[rows]
+        visited[curr] = True
+        if num_prisoners < num_boxes:
+            found += curr < limit
+        else:
+            found += 1
+
+    return success
+
+def benchmark_batch(num_trials: int, num_prisoners: int, num_boxes: int, open_counts: int, rng):
+    """
+    Batched random picking strategy. Return the number of successful prisoners in each of num_trials trials.
+
+    Prisoner i succeeds iff the box holding card i, pos[i], is among open_counts boxes drawn uniformly without replacement.
+    The drawn subset is independent of the boxes, so pos[i] is opened with probability open_counts / num_boxes for every
+    permutation, independently across prisoners. Instead of materializing (trials, num_prisoners, open_counts) subsets and
+    looking up pos, the success counts are therefore drawn directly from Binomial(num_prisoners, open_counts / num_boxes),
+    which has the same distribution at O(1) cost per trial.
+
+    Parameters
+    --------
+    num_trials: int
+        Number of trials
+    num_prisoners: int
+        Number of prisoners
+    num_boxes: int
+        Number of boxes
+    open_counts: int
+        Maximum number for a prisoner to open boxes
+    rng: numpy.random.Generator
+        Random generator
+
+    Returns
+    --------
+    numpy.ndarray
+        Number of successful prisoners in each trial.
+    """
+    if not 0 <= open_counts <= num_boxes:
+        raise ValueError("open_counts should be between 0 and num_boxes for random strategy.")
+    return rng.binomial(num_prisoners, open_counts / num_boxes if num_boxes > 0 else 0.0, size=num_trials)
+
+def iter_batch(strategy: str, num_trials: int, instance_template, shift: int=0, rng=None, profiler=None, corpus=None, jit: bool=False) -> Iterator:
+    """
+    Run simulation trials with the batched NumPy engine. Permutations are generated chunk by chunk.
+    Yield a numpy array of the number of successful prisoners for each chunk.
+
+    Parameters
+    --------
+    strategy: str
+        Name of a registered strategy with a batched implementation
+    num_trials: int
+        Number of trials to execute
+    instance_template: Instance
+        Template for simulation
+    shift: int, optional = 0
+        Shift value, passed to the strategy
+    rng: numpy.random.Generator, optional = None
+        Random generator, seeded by the template seed if not given
+    profiler: Profiler, optional = None
+        Records the permutations and kernel phases of every chunk
+    corpus: PermutationCorpus, optional = None
+        Replay the first num_trials rows of corpus instead of drawing permutations. Strategies registered with permutations=False
+        (e.g. random, where each prisoner succeeds with probability open_counts / num_boxes whatever the boxes are) ignore it.
+    jit: bool, optional = False
+        Use the compiled implementation of the strategy if it has one ("jit" engine). Permutations and results are the same.
+
+    Yields
+    --------
+    numpy.ndarray
+        Number of successful prisoners in each trial of the chunk
+    """
+    import numpy as np
+    from prisoners_problem.strategies import get_strategy
+
+    spec = get_strategy(strategy)
+    kernel = spec.jit if jit and spec.jit is not None else spec.batch
+    if kernel is None:
+        raise ValueError(f"Strategy {strategy} is not supported by {'jit' if jit else 'numpy'} engine.")
+    num_prisoners, num_boxes, open_counts, _, seed = instance_template.get_attrs()
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    chunk_size = max(1, CHUNK_ELEMENTS // max(num_boxes, 1))
+    for begin in range(0, num_trials, chunk_size):
+        size = min(chunk_size, num_trials - begin)
+        if not spec.permutations:
+            # zero-copy stand-in carrying the shape, the strategy does not look at the boxes
+            perms = np.broadcast_to(np.arange(num_boxes), (size, num_boxes))
+        else:
+            with maybe_phase(profiler, "permutations"):
+                perms = random_permutations(rng, size, num_boxes) if corpus is None else corpus.rows[begin:begin + size]
+        with maybe_phase(profiler, "kernel"):
+            success = kernel(perms, num_prisoners, open_counts, shift, rng)
+        if profiler is not None:
+            if spec.permutations:
+                profiler.count("instances_built", size)
+                if corpus is None:
+                    profiler.count("rng_draws", size * num_boxes)
+            else:
+                profiler.count("rng_draws", size)
+            profiler.advance(size)
+        yield success
+
+def run_batch(strategy: str, num_trials: int, instance_template, shift: int=0, rng=None, profiler=None, corpus=None, jit: bool=False) -> List[int]:
+    """
+    Run simulation trials with the batched NumPy engine, see iter_batch.
+    Return a list contains number of successful prisoners in each trial.
+    """
+    success_record = []
+    for success in iter_batch(strategy, num_trials, instance_template, shift, rng, profiler, corpus, jit):
+        success_record.extend(success.tolist())
+
+    return success_record
@@ -1,7 +1,7 @@
 from typing import *
 from prisoners_problem.problem_instance import Instance
 
-def benchmark(instance: Instance, seed: Optional[int]=None) -> tuple[bool, int]:
+def benchmark(instance: Instance, seed: Optional[int]=None, rng=None) -> tuple[bool, int]:
     """
     Function implements the naive strategy, randomly picking, in prisoners problem.
     Return True if all prisoners succeed to find their cards and the number of successful prisoners.
@@ -11,7 +11,9 @@ def benchmark(instance: Instance, seed: Optional[int]=None) -> tuple[bool, int]:
     instance: Instance
         An instance for prinsoners problem
     seed: int, optional = None
-        Random seed
+        Random seed, the boxes to open are drawn from random.Random(seed)
+    rng: random.Random | numpy.random.Generator, optional = None
+        Random generator to draw the boxes to open from, takes precedence over seed
 
     Returns
     --------
@@ -26,16 +28,17 @@ def benchmark(instance: Instance, seed: Optional[int]=None) -> tuple[bool, int]:
     False
     """
     import random
-    
+
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
+    # random.Random picks with sample, numpy.random.Generator with choice
+    pick = rng.sample if hasattr(rng, "sample") else lambda population, k: rng.choice(len(population), k, replace=False).tolist()
+
     success_counts = 0
     num_prisoners, num_boxes, open_counts, boxes, _ = instance.get_attrs()
     box_num_mapping = lambda x, y: [x[i] for i in y]
     for i in range(num_prisoners):
-        if seed is not None:
-            random.seed(seed)
-        else:
-            random.random()
-        opended = random.sample(range(num_boxes), open_counts)
+        opended = pick(range(num_boxes), open_counts)
         nums = box_num_mapping(boxes, opended)
         success_counts += (i in nums)
     
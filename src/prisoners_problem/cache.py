@@ -0,0 +1,93 @@
+from prisoners_problem.histogram import SuccessHistogram
+from typing import *
+import hashlib
+import json
+import os
+import tempfile
+
+# Bump whenever an engine change alters the results drawn for given parameters, so stale entries stop matching.
+ENGINE_VERSION = 3
+
+class ResultCache():
+    """
+    Content-addressed on-disk cache of simulation histograms.
+
+    Every entry is a compressed .npz file holding the bincount of successful prisoners, named by the hash of
+    simu_info (without name), engine and ENGINE_VERSION. Seeded runs are keyed by num_trials as well and only hit exactly.
+    Unseeded runs share one entry per parameter set, which grows as more trials are requested.
+    Least recently used entries are evicted once the directory exceeds max_bytes.
+
+    Parameters
+    --------
+    directory: str
+        Cache directory, created if missing
+    max_bytes: int, optional = 256 * 2**20
+        Size budget of all entries
+
+    Methods
+    --------
+    key(simu_info, engine) -> str
+        Return the cache key of a simulation
+    load(simu_info, engine) -> SuccessHistogram | None
+        Return the cached histogram, or None on a miss
+    store(simu_info, engine, histogram) -> str
+        Write histogram to the cache and return the path of the entry
+    """
+    def __init__(self, directory: str, max_bytes: int=256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, simu_info: Dict[str, Any], engine: str) -> str:
+        params = {k: v for k, v in simu_info.items() if k != "name"}
+        if params.get("seed") is None:
+            params.pop("num_trials", None)
+        params.update({"engine": engine, "engine_version": ENGINE_VERSION})
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, simu_info: Dict[str, Any], engine: str) -> Optional[SuccessHistogram]:
+        import numpy as np
+
+        path = self._path(self.key(simu_info, engine))
+        try:
+            with np.load(path) as data:
+                counts = data["counts"].tolist()
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        os.utime(path) # mark as recently used
+        return SuccessHistogram(simu_info["num_prisoners"], counts)
+
+    def store(self, simu_info: Dict[str, Any], engine: str, histogram: SuccessHistogram) -> str:
+        import numpy as np
+
+        path = self._path(self.key(simu_info, engine))
+        # a unique temporary file per writer, threads of one process may store the same entry at once
+        with tempfile.NamedTemporaryFile(dir=self.directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False) as f:
+            np.savez_compressed(f, counts=np.asarray(histogram.counts, dtype=np.int64))
+        os.replace(f.name, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError: # evicted by another writer meanwhile
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path != keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
@@ -0,0 +1,176 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.histogram import SuccessHistogram
+from prisoners_problem.cache import ENGINE_VERSION
+from prisoners_problem import simulations
+from typing import *
+import glob
+import hashlib
+import json
+import os
+
+# Chunks of CHUNK_TRIALS trials per shard when num_shards is not given, about one million trials per shard
+SHARD_CHUNKS = 64
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """
+    Parse a "k/N" shard specification (0 <= k < N) into (k, N).
+
+    Example
+    --------
+    >>> parse_shard("3/64")
+    (3, 64)
+    """
+    try:
+        shard, num_shards = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard {text!r}, expected k/N.") from None
+    if not 0 <= shard < num_shards:
+        raise ValueError(f"Invalid shard {text!r}, k should be between 0 and N - 1.")
+    return shard, num_shards
+
+def _num_chunks(num_trials: int) -> int:
+    return -(-num_trials // simulations.CHUNK_TRIALS)
+
+def default_num_shards(num_trials: int) -> int:
+    return max(1, -(-_num_chunks(num_trials) // SHARD_CHUNKS))
+
+def shard_chunk_ids(num_trials: int, shard: int, num_shards: int) -> range:
+    """
+    Indices of the seeded chunks (see simulations._chunks) run by shard, consecutive and as even as possible.
+    """
+    num_chunks = _num_chunks(num_trials)
+    return range(shard * num_chunks // num_shards, (shard + 1) * num_chunks // num_shards)
+
+def run_key(simu_info: Dict[str, Any], engine: str, num_shards: int) -> str:
+    """
+    Hash of everything that determines the trials of a shard: simu_info (without name), engine, ENGINE_VERSION,
+    CHUNK_TRIALS and num_shards. Shards of the same run share the key.
+    "jit" gives the same trials as "numpy" and is hashed as "numpy", so shards resolved from "auto" on machines with and
+    without numba still merge.
+    """
+    params = {k: v for k, v in simu_info.items() if k != "name"}
+    engine = "numpy" if engine == "jit" else engine
+    params.update({"engine": engine, "engine_version": ENGINE_VERSION, "chunk_trials": simulations.CHUNK_TRIALS, "num_shards": num_shards})
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+def _shard_path(checkpoint_dir: str, shard: int, num_shards: int) -> str:
+    return os.path.join(checkpoint_dir, f"shard-{shard:05d}-of-{num_shards:05d}.json")
+
+def _load_shard(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def run_shard(checkpoint_dir: str, name: str, strategy: str, num_trials: int, instance_template: Instance, shift: int=0,
+              engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="python", shard: int=0, num_shards: Optional[int]=None,
+              workers: Optional[int]=None, corpus=None) -> tuple[Dict[str, Any], SuccessHistogram]:
+    """
+    Run one shard of a simulation and write its histogram to checkpoint_dir, or load it if that shard is already there.
+
+    The seeded chunks of run_simulation_histogram are split into num_shards consecutive ranges, so shards can run in
+    any order, in separate processes or on separate machines sharing (or later copying) checkpoint_dir, and
+    merge_shards gives bit-identically the histogram of the single run, with or without workers. Shard files are written atomically, a
+    killed run leaves no partial shard behind.
+
+    Parameters
+    --------
+    checkpoint_dir: str
+        Directory of the shard files, created if missing
+    shard: int, optional = 0
+        Shard to run, between 0 and num_shards - 1
+    num_shards: int, optional = None
+        Number of shards, one per SHARD_CHUNKS chunks if not given. All shards of a run must use the same value.
+    workers: int, optional = None
+        Number of worker processes for the chunks of this shard, in the current process if not given
+    Others are the same as run_simulation_histogram. instance_template must be seeded.
+
+    Returns
+    --------
+    simu_info: Dict[str, Any]
+        Simulation information of the whole run, with num_trials of the whole run
+    histogram: SuccessHistogram
+        Bincount of the trials of this shard
+    """
+    simulations._check_args(strategy, shift, engine, workers)
+    engine = simulations._resolve_engine(strategy, engine)
+    simulations._check_engine(strategy, engine, instance_template, shift, corpus)
+    simulations._check_corpus(corpus, num_trials, instance_template)
+    if instance_template.seed is None:
+        raise ValueError("Checkpointed runs need a seeded instance_template, every shard must draw the same trials.")
+    num_shards = default_num_shards(num_trials) if num_shards is None else num_shards
+    if not 0 <= shard < num_shards:
+        raise ValueError("shard should be between 0 and num_shards - 1.")
+
+    simu_info = simulations._simu_info(name, strategy, num_trials, instance_template, shift, corpus)
+    key = run_key(simu_info, engine, num_shards)
+    path = _shard_path(checkpoint_dir, shard, num_shards)
+    record = _load_shard(path)
+    if record is not None:
+        if record["key"] != key:
+            raise ValueError(f"{path} belongs to another run, use a separate checkpoint_dir.")
+        return simu_info, SuccessHistogram(instance_template.num_prisoners, record["counts"])
+
+    histogram = SuccessHistogram(instance_template.num_prisoners)
+    chunk_ids = shard_chunk_ids(num_trials, shard, num_shards)
+    for counts in simulations._run_parallel(simulations._count_trials, strategy, num_trials, instance_template, shift, engine,
+                                            workers or 1, corpus, chunk_ids):
+        histogram.update_counts(counts)
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    record = {"key": key, "shard": shard, "num_shards": num_shards, "engine": engine, "simu_info": simu_info, "counts": histogram.counts}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+    return simu_info, histogram
+
+def merge_shards(checkpoint_dir: str) -> tuple[Dict[str, Any], SuccessHistogram]:
+    """
+    Combine the shard files of checkpoint_dir into the simu_info and histogram of the whole run.
+    Raise ValueError if shards are missing or belong to different runs.
+    """
+    records = [_load_shard(path) for path in sorted(glob.glob(os.path.join(checkpoint_dir, "shard-*-of-*.json")))]
+    records = [record for record in records if record is not None]
+    if not records:
+        raise ValueError(f"No shards found in {checkpoint_dir}.")
+    if len({record["key"] for record in records}) > 1:
+        raise ValueError(f"{checkpoint_dir} holds shards of different runs.")
+    num_shards = records[0]["num_shards"]
+    missing = sorted(set(range(num_shards)) - {record["shard"] for record in records})
+    if missing:
+        raise ValueError(f"Missing {len(missing)} of {num_shards} shards: {', '.join(map(str, missing[:10]))}{', ...' if len(missing) > 10 else ''}")
+
+    simu_info = dict(records[0]["simu_info"])
+    histogram = SuccessHistogram(simu_info["num_prisoners"])
+    for record in records:
+        histogram.update_counts(record["counts"])
+    simu_info["num_shards"] = num_shards
+    return simu_info, histogram
+
+def run_checkpointed(checkpoint_dir: str, name: str, strategy: str, num_trials: int, instance_template: Instance, shift: int=0,
+                     engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="python", num_shards: Optional[int]=None,
+                     workers: Optional[int]=None, corpus=None, progress: Optional[Callable[[int, int], None]]=None) -> tuple[Dict[str, Any], SuccessHistogram]:
+    """
+    Run every shard not yet in checkpoint_dir (see run_shard), then merge them. A restarted run resumes from the completed shards.
+
+    Parameters
+    --------
+    progress: Callable[[int, int], None], optional = None
+        Called as progress(shards done, num_shards) after every shard
+    Others are the same as run_shard.
+
+    Returns
+    --------
+    simu_info: Dict[str, Any]
+        Simulation information, including all parameters and num_shards
+    histogram: SuccessHistogram
+        Bincount of number of successful prisoners over all trials, identical to run_simulation_histogram with the same seed
+    """
+    num_shards = default_num_shards(num_trials) if num_shards is None else num_shards
+    for shard in range(num_shards):
+        run_shard(checkpoint_dir, name, strategy, num_trials, instance_template, shift, engine, shard, num_shards, workers, corpus)
+        if progress is not None:
+            progress(shard + 1, num_shards)
+    return merge_shards(checkpoint_dir)
@@ -0,0 +1,88 @@
+from typing import *
+import math
+
+def wilson_interval(successes: int, trials: int, confidence: float=0.95) -> tuple[float, float]:
+    """
+    Wilson score interval of a binomial proportion. Return (low, high), (0.0, 1.0) if trials = 0.
+
+    Example
+    --------
+    >>> [round(x, 4) for x in wilson_interval(31, 100)]
+    [0.2278, 0.4063]
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    from statistics import NormalDist
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    # the bounds are exactly 0 and 1 at the edges, avoid rounding noise
+    low = 0.0 if successes == 0 else max(center - half_width, 0.0)
+    high = 1.0 if successes == trials else min(center + half_width, 1.0)
+    return low, high
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """
+    Regularized incomplete beta function I_x(a, b), continued fraction evaluated with the modified Lentz method.
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1) / (a + b + 2): # the continued fraction converges fast below the mean
+        return 1.0 - _betainc(b, a, 1.0 - x)
+    log_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    tiny = 1e-300
+    c, d = 1.0, 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    result = d
+    for m in range(1, 10000):
+        for numerator in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)), -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            result *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return math.exp(log_front) * result / a
+
+def _beta_quantile(q: float, a: float, b: float) -> float:
+    low, high = 0.0, 1.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        if _betainc(a, b, mid) < q:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+def clopper_pearson_interval(successes: int, trials: int, confidence: float=0.95) -> tuple[float, float]:
+    """
+    Exact (Clopper-Pearson) interval of a binomial proportion from beta quantiles. Return (low, high), (0.0, 1.0) if trials = 0.
+
+    Example
+    --------
+    >>> [round(x, 4) for x in clopper_pearson_interval(31, 100)]
+    [0.2213, 0.4103]
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    low = 0.0 if successes == 0 else _beta_quantile(alpha / 2, successes, trials - successes + 1)
+    high = 1.0 if successes == trials else _beta_quantile(1 - alpha / 2, successes + 1, trials - successes)
+    return low, high
+
+INTERVALS = {"wilson": wilson_interval, "clopper_pearson": clopper_pearson_interval}
+
+def confidence_interval(successes: int, trials: int, confidence: float=0.95, method: Literal["wilson", "clopper_pearson"]="wilson") -> tuple[float, float]:
+    """
+    Confidence interval of a success rate, see wilson_interval and clopper_pearson_interval.
+    """
+    if method not in INTERVALS:
+        raise ValueError(f"Unknown interval method: {method}")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence should be between 0 and 1.")
+    return INTERVALS[method](successes, trials, confidence)
@@ -0,0 +1,376 @@
+import argparse
+import itertools
+import os
+import struct
+from prisoners_problem.batch import CHUNK_ELEMENTS, random_permutations
+from typing import *
+
+MAGIC = b"PPCORPUS"
+VERSION = 1
+# magic, version, bytes per entry, num_boxes, num_rows, seed, padded to HEADER_SIZE bytes
+HEADER_FORMAT = "<8sIIQQq"
+HEADER_SIZE = 64
+
+class PermutationCorpus():
+    """
+    Read-only, memory-mapped file of permutations, so that every strategy can be replayed on the same trials.
+
+    The file holds a HEADER_SIZE bytes header (num_boxes, number of rows, generation seed) followed by num_rows fixed-width
+    rows of uint16 (num_boxes <= 2**16) or uint32 entries, row t records the boxes of trial t.
+    Rows are never loaded as a whole: rows is a numpy.memmap, slicing a corpus returns a window on the same file,
+    and pickling a corpus (e.g. for worker processes) only sends its path and window.
+
+    Parameters
+    --------
+    path: str
+        Corpus file, see write_corpus
+    start: int, optional = 0
+        First row of the window
+    stop: int, optional = None
+        End of the window (exclusive), the end of the file if not given
+
+    Attributes
+    --------
+    path: str
+    num_boxes: int
+        Length of every permutation
+    seed: int
+        Seed the corpus was generated with, -1 for corpora imported with import_corpus
+    rows: numpy.memmap
+        (len(corpus), num_boxes) view of the window
+
+    Methods
+    --------
+    iter_chunks(chunk_rows=None) -> Iterator[numpy.ndarray]
+        Yield consecutive (zero-copy) blocks of rows
+    instance(index, num_prisoners=None, open_counts=None) -> CompactInstance
+        Build the instance of one row
+    """
+    def __init__(self, path: str, start: int=0, stop: Optional[int]=None):
+        import numpy as np
+
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a permutation corpus.")
+        _, version, itemsize, num_boxes, num_rows, seed = struct.unpack_from(HEADER_FORMAT, header)
+        if version != VERSION:
+            raise ValueError(f"Unsupported corpus version: {version}")
+        stop = num_rows if stop is None else stop
+        if not 0 <= start <= stop <= num_rows:
+            raise IndexError(f"Rows [{start}, {stop}) are out of range for a corpus of {num_rows} rows.")
+
+        self.path = path
+        self.num_boxes = num_boxes
+        self.seed = seed
+        self.start = start
+        self.stop = stop
+        dtype = np.uint16 if itemsize == 2 else np.uint32
+        # np.memmap refuses empty maps, an empty window is a plain empty array
+        if stop > start and num_boxes > 0:
+            self.rows = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE + start * num_boxes * itemsize, shape=(stop - start, num_boxes))
+        else:
+            self.rows = np.zeros((stop - start, num_boxes), dtype=dtype)
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("Corpus windows do not support steps.")
+            return PermutationCorpus(self.path, self.start + start, self.start + max(start, stop))
+        return self.rows[index]
+
+    def __reduce__(self):
+        return PermutationCorpus, (self.path, self.start, self.stop)
+
+    def __repr__(self):
+        return f"PermutationCorpus(path={self.path!r}, num_boxes={self.num_boxes}, rows=[{self.start}, {self.stop}), seed={self.seed})"
+
+    def iter_chunks(self, chunk_rows: Optional[int]=None) -> Iterator:
+        chunk_rows = chunk_rows or max(1, CHUNK_ELEMENTS // max(self.num_boxes, 1))
+        for begin in range(0, len(self), chunk_rows):
+            yield self.rows[begin:begin + chunk_rows]
+
+    def instance(self, index: int, num_prisoners: Optional[int]=None, open_counts: Optional[int]=None):
+        from prisoners_problem.problem_instance import CompactInstance
+        num_prisoners = self.num_boxes if num_prisoners is None else num_prisoners
+        return CompactInstance(num_prisoners, self.num_boxes, open_counts, boxes=self.rows[index])
+
+def write_corpus(path: str, num_rows: int, num_boxes: int, seed: Optional[int]=None, chunk_rows: Optional[int]=None) -> PermutationCorpus:
+    """
+    Generate num_rows uniform random permutations of range(num_boxes) into a corpus file, chunk by chunk.
+    The same (num_rows, num_boxes, seed) always writes the same file. Without seed a random one is drawn and recorded in the header.
+
+    Parameters
+    --------
+    path: str
+        Output file, overwritten if it exists
+    num_rows: int
+        Number of permutations
+    num_boxes: int
+        Length of every permutation
+    seed: int, optional = None
+        Random seed, at most 63 bits
+    chunk_rows: int, optional = None
+        Rows generated per chunk, CHUNK_ELEMENTS // num_boxes if not given
+
+    Returns
+    --------
+    PermutationCorpus
+    """
+    import numpy as np
+
+    if num_rows < 0 or num_boxes < 0:
+        raise ValueError("num_rows and num_boxes should be non-negative.")
+    if num_boxes > 1 << 32:
+        raise ValueError("num_boxes should be at most 2**32.")
+    if seed is None:
+        import secrets
+        seed = secrets.randbits(63)
+    itemsize = 2 if num_boxes <= 1 << 16 else 4
+    with open(path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, itemsize, num_boxes, num_rows, seed).ljust(HEADER_SIZE, b"\0"))
+        f.truncate(HEADER_SIZE + num_rows * num_boxes * itemsize)
+
+    if num_rows > 0 and num_boxes > 0:
+        dtype = np.uint16 if itemsize == 2 else np.uint32
+        rows = np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_SIZE, shape=(num_rows, num_boxes))
+        rng = np.random.default_rng(seed)
+        chunk_rows = chunk_rows or max(1, CHUNK_ELEMENTS // num_boxes)
+        for begin in range(0, num_rows, chunk_rows):
+            size = min(chunk_rows, num_rows - begin)
+            rows[begin:begin + size] = random_permutations(rng, size, num_boxes)
+        rows.flush()
+        del rows
+    return PermutationCorpus(path)
+
+def validate_permutations(rows, num_boxes: Optional[int]=None):
+    """
+    Check every row of a (num_rows, width) integer matrix at once: a row is valid iff it has num_boxes entries, all in
+    range(num_boxes), and its bincount is all ones. The rows are offset by row * num_boxes and scattered into one
+    boolean matrix, so the check is O(num_rows * num_boxes) without a Python loop.
+
+    Parameters
+    --------
+    rows: numpy.ndarray
+        Permutation candidates, one per row
+    num_boxes: int, optional = None
+        Expected length of every permutation, the width of rows if not given
+
+    Returns
+    --------
+    numpy.ndarray
+        Boolean mask of the valid rows
+
+    Example
+    --------
+    >>> import numpy as np
+    >>> validate_permutations(np.array([[0, 1, 2], [2, 2, 0], [1, 3, 0]])).tolist()
+    [True, False, False]
+    """
+    import numpy as np
+
+    rows = np.asarray(rows)
+    if rows.ndim != 2:
+        raise ValueError("rows should be a 2-dimensional matrix.")
+    if rows.size > 0 and rows.dtype.kind not in "iu":
+        raise TypeError("Each element in rows should be int.")
+    num_rows, width = rows.shape
+    num_boxes = width if num_boxes is None else num_boxes
+    if width != num_boxes:
+        return np.zeros(num_rows, dtype=bool)
+    if num_rows == 0 or num_boxes == 0:
+        return np.ones(num_rows, dtype=bool)
+
+    valid = (rows.min(axis=1) >= 0) & (rows.max(axis=1) < num_boxes)
+    # out of range rows are already invalid, zero them so that the offsets stay in their own row
+    offsets = rows.astype(np.int32 if num_rows * num_boxes < 1 << 31 else np.intp)
+    offsets[~valid] = 0
+    offsets += np.arange(0, num_rows * num_boxes, num_boxes, dtype=offsets.dtype)[:, None]
+    # num_boxes entries in range hit every box iff the bincount of the row is all ones
+    seen = np.zeros((num_rows, num_boxes), dtype=bool)
+    seen.ravel()[offsets.ravel()] = True
+    return valid & seen.all(axis=1)
+
+def _file_format(path: str) -> str:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            return "corpus"
+    extension = os.path.splitext(path)[1].lower()
+    return {".npy": "npy", ".csv": "csv", ".txt": "csv"}.get(extension, "bin")
+
+def _parse_csv(lines: List[str], num_boxes: int):
+    import numpy as np
+
+    try:
+        rows = np.loadtxt(lines, delimiter=",", dtype=np.int64, ndmin=2)
+        # loadtxt skips blank lines, which would shift the row numbers
+        if rows.shape == (len(lines), num_boxes):
+            return rows
+    except ValueError:
+        pass
+    # slow path for chunks with malformed lines, which become rows of -1
+    rows = np.full((len(lines), num_boxes), -1, dtype=np.int64)
+    for i, line in enumerate(lines):
+        try:
+            row = [int(field) for field in line.split(",")]
+        except ValueError:
+            continue
+        if len(row) == num_boxes:
+            rows[i] = row
+    return rows
+
+def iter_permutation_file(path: str, num_boxes: Optional[int]=None, file_format: Optional[Literal["npy", "csv", "bin", "corpus"]]=None,
+                          dtype: str="uint32", chunk_rows: Optional[int]=None) -> Iterator:
+    """
+    Stream the rows of a file of permutations chunk by chunk, without loading the file.
+
+    Formats
+    --------
+    npy: 2-dimensional integer array, memory-mapped
+    csv: one permutation per line, comma separated
+    bin: raw rows of num_boxes dtype entries, no header, memory-mapped
+    corpus: a PermutationCorpus file (see write_corpus)
+
+    Parameters
+    --------
+    path: str
+        Input file
+    num_boxes: int, optional = None
+        Length of every permutation, read from the file if not given (required for bin)
+    file_format: str, optional = None
+        One of the formats above, detected from the header or extension (.npy, .csv / .txt, else bin) if not given
+    dtype: str, optional = "uint32"
+        Entry type of bin files, e.g. "uint16", "<i8"
+    chunk_rows: int, optional = None
+        Rows per chunk, CHUNK_ELEMENTS // num_boxes if not given
+
+    Yields
+    --------
+    numpy.ndarray
+        (rows, num_boxes) chunks, not validated (see validate_permutations). Malformed csv lines are rows of -1.
+    """
+    import numpy as np
+
+    file_format = file_format or _file_format(path)
+    if file_format == "corpus":
+        yield from PermutationCorpus(path).iter_chunks(chunk_rows)
+        return
+    if file_format == "csv":
+        with open(path) as f:
+            first = f.readline()
+            if not first:
+                return
+            num_boxes = len(first.split(",")) if num_boxes is None else num_boxes
+            chunk_rows = chunk_rows or max(1, CHUNK_ELEMENTS // max(num_boxes, 1))
+            lines = [first]
+            while True:
+                lines.extend(itertools.islice(f, chunk_rows - len(lines)))
+                if not lines:
+                    return
+                yield _parse_csv(lines, num_boxes)
+                lines = []
+    if file_format == "npy":
+        rows = np.load(path, mmap_mode="r")
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        if rows.ndim != 2:
+            raise ValueError(f"{path} should hold a 2-dimensional array of permutations.")
+    elif file_format == "bin":
+        if num_boxes is None:
+            raise ValueError("num_boxes is required for bin files.")
+        itemsize = np.dtype(dtype).itemsize
+        size = os.path.getsize(path)
+        if num_boxes == 0 or size % (num_boxes * itemsize) != 0:
+            raise ValueError(f"{path} does not hold whole rows of {num_boxes} {dtype} entries.")
+        num_rows = size // (num_boxes * itemsize)
+        rows = np.memmap(path, dtype=dtype, mode="r", shape=(num_rows, num_boxes)) if num_rows else np.zeros((0, num_boxes), dtype=dtype)
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+    chunk_rows = chunk_rows or max(1, CHUNK_ELEMENTS // max(rows.shape[1], 1))
+    for begin in range(0, len(rows), chunk_rows):
+        yield rows[begin:begin + chunk_rows]
+
+def import_corpus(source: str, path: str, num_boxes: Optional[int]=None, file_format: Optional[Literal["npy", "csv", "bin", "corpus"]]=None,
+                  dtype: str="uint32", chunk_rows: Optional[int]=None) -> tuple[PermutationCorpus, Any]:
+    """
+    Validate the permutations of an external file chunk by chunk and write the valid ones into a corpus file, which
+    run_simulation(..., corpus=...) replays with any strategy and engine. Imported corpora record seed -1.
+
+    Parameters
+    --------
+    source: str
+        Input file, see iter_permutation_file for formats
+    path: str
+        Output corpus file, overwritten if it exists
+    Others are the same as iter_permutation_file.
+
+    Returns
+    --------
+    PermutationCorpus
+        Valid rows, in file order
+    invalid: numpy.ndarray
+        Row numbers (from 0) of the invalid rows of source
+
+    Example
+    --------
+    >>> corpus, invalid = import_corpus("perms.npy", "perms.bin")
+    >>> run_simulation("replay", "cycle_following", len(corpus), Instance(corpus.num_boxes), engine="numpy", corpus=corpus)
+    """
+    import numpy as np
+
+    invalid = []
+    num_rows = num_read = 0
+    chunks = iter_permutation_file(source, num_boxes, file_format, dtype, chunk_rows)
+    first = next(chunks, None)
+    if num_boxes is None:
+        num_boxes = 0 if first is None else first.shape[1]
+    if num_boxes > 1 << 32:
+        raise ValueError("num_boxes should be at most 2**32.")
+    itemsize = 2 if num_boxes <= 1 << 16 else 4
+    with open(path, "wb") as f:
+        # the number of valid rows is only known at the end, the header is written last
+        f.write(bytes(HEADER_SIZE))
+        for rows in itertools.chain([] if first is None else [first], chunks):
+            valid = validate_permutations(rows, num_boxes)
+            invalid.append(np.flatnonzero(~valid) + num_read)
+            num_read += len(rows)
+            valid_rows = rows if valid.all() else rows[valid]
+            f.write(np.ascontiguousarray(valid_rows, dtype=np.uint16 if itemsize == 2 else np.uint32).tobytes())
+            num_rows += len(valid_rows)
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, itemsize, num_boxes, num_rows, -1))
+    return PermutationCorpus(path), np.concatenate(invalid) if invalid else np.zeros(0, dtype=np.int64)
+
+def parse_args(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description="Generate a permutation corpus for the N-Prisoners Problem")
+
+    parser.add_argument('--num_boxes', type=int, default=100, help="Length of every permutation")
+    parser.add_argument('--num_rows', type=int, default=1000000, help="Number of permutations")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed")
+    parser.add_argument('--output', type=str, default="corpus.bin", help="Corpus file")
+    parser.add_argument('--input', type=str, default=None, help="Import and validate the permutations of a .npy, .csv or raw binary file instead of generating them")
+    parser.add_argument('--format', type=str, default=None, choices=["npy", "csv", "bin", "corpus"], help="Format of --input, detected from the file if not given")
+    parser.add_argument('--dtype', type=str, default="uint32", help="Entry type of raw binary --input files")
+
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]]=None):
+    args = parse_args(argv)
+    if args.input:
+        # num_boxes is only needed for raw binary input, the other formats record it
+        num_boxes = args.num_boxes if (args.format or _file_format(args.input)) == "bin" else None
+        corpus, invalid = import_corpus(args.input, args.output, num_boxes, args.format, args.dtype)
+        if len(invalid):
+            shown = ", ".join(map(str, invalid[:10].tolist()))
+            print(f"{len(invalid)} invalid rows skipped: {shown}{', ...' if len(invalid) > 10 else ''}")
+    else:
+        corpus = write_corpus(args.output, args.num_rows, args.num_boxes, args.seed)
+    size = os.path.getsize(args.output)
+    print(f"{len(corpus)} permutations of {corpus.num_boxes} boxes (seed {corpus.seed}, {size / 2**20:.1f} MB) saved as {args.output}")
+
+if __name__ == "__main__":
+    main()
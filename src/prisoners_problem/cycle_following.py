@@ -1,6 +1,82 @@
 from prisoners_problem.problem_instance import Instance
 from typing import *
-def cycle_following(instance: Instance, shift: Optional[int]=0) -> tuple[bool, int]:
+
+# Below this many (shift, box) pairs, cycle_following_shifts walks each shift in Python instead of batching.
+SMALL_SHIFT_BATCH = 1 << 16
+
+def cycle_decomposition(boxes: Sequence[int], shift: Optional[int]=0) -> tuple[List[int], List[int]]:
+    """
+    Decompose the shifted box permutation x -> (boxes[x] + shift) % num_boxes into cycles in one O(n) pass.
+    Return the cycle id of every box and the length of every cycle.
+
+    Parameters
+    --------
+    boxes: Sequence[int] | numpy.ndarray
+        Cards allocation in boxes, boxes[i] means the number card in box i
+    shift: Optional[int] = 0
+        Shift value, see cycle_following
+
+    Returns
+    --------
+    cycle_ids: List[int]
+        cycle_ids[x] is the id of the cycle containing box x. Cycles are numbered in order of their smallest box.
+    cycle_lengths: List[int]
+        cycle_lengths[c] is the length of cycle c, so box x lies on a cycle of length cycle_lengths[cycle_ids[x]].
+
+    Example
+    --------
+    >>> cycle_decomposition((1, 0, 3, 4, 2))
+    ([0, 0, 1, 1, 1], [2, 3])
+    """
+    if hasattr(boxes, "tolist"):
+        # numpy buffers (e.g. CompactInstance.boxes) are walked faster, and without unsigned overflow, as Python ints
+        boxes = boxes.tolist()
+    num_boxes = len(boxes)
+    cycle_ids = [-1] * num_boxes
+    cycle_lengths = []
+    for i in range(num_boxes):
+        if cycle_ids[i] >= 0:
+            continue
+        cycle_id = len(cycle_lengths)
+        curr = i
+        length = 0
+        while cycle_ids[curr] < 0:
+            cycle_ids[curr] = cycle_id
+            length += 1
+            curr = (boxes[curr] + shift) % num_boxes
+        cycle_lengths.append(length)
+
+    return cycle_ids, cycle_lengths
+
+def cycle_length_histogram(instance: Instance, shift: Optional[int]=0) -> Dict[int, int]:
+    """
+    Count cycles of each length in an instance under cycle following with the given shift.
+
+    Parameters
+    --------
+    instance: Instance
+        An instance for prinsoners problem
+    shift: Optional[int] = 0
+        Shift value, see cycle_following
+
+    Returns
+    --------
+    Dict[int, int]
+        Mapping from cycle length to the number of cycles with that length.
+
+    Example
+    --------
+    >>> cycle_length_histogram(Instance(5, boxes=[1, 0, 3, 4, 2]))
+    {2: 1, 3: 1}
+    """
+    _, cycle_lengths = cycle_decomposition(instance.boxes, shift)
+    histogram = {}
+    for length in cycle_lengths:
+        histogram[length] = histogram.get(length, 0) + 1
+
+    return dict(sorted(histogram.items()))
+
+def cycle_following(instance: Instance, shift: Optional[int]=0, early_stop: bool=False) -> tuple[bool, Optional[int]]:
     """
     Function that implements cycle following strategy in prisoners problem.
     Return True if all prisoners succeed to find their cards and the number of successful prisoners.
@@ -11,43 +87,103 @@ def cycle_following(instance: Instance, shift: Optional[int]=0) -> tuple[bool, i
         An instance for prinsoners problem
     shift: Opional[int] = 0
         If shift=x, prisoners i would open the (i+x)-th box, then open (number of card in box (i+x) + x)-th box to find his card.
-    
+    early_stop: bool, optional = False
+        Only decide whether all prisoners succeed: stop at the first cycle longer than open_counts
+        (without finishing it) and return None as success_counts.
+
     Returns
     --------
     bool
         True if all prisoners succeed to find their cards.
-    success_counts: int
-        Number of successful prisoners.
+    success_counts: int | None
+        Number of successful prisoners, None if early_stop.
 
 
     Example
     --------
     >>> instance = Instance(100)
     >>> cycle_following(instance)
-    True    
+    True
     """
     num_prisoners, num_boxes, open_counts, boxes, _ = instance.get_attrs()
-    valid_cycles = set()
-    invalid_cycles = set()
-    success_counts = 0
+    if early_stop:
+        return _all_succeed(boxes, num_prisoners, open_counts, shift), None
+    # prisoner i succeeds iff the cycle through i is no longer than open_counts;
+    # if num_boxes > num_prisoners, the cards beyond num_prisoners belong to no prisoner
+    cycle_ids, cycle_lengths = cycle_decomposition(boxes, shift)
+    success_counts = sum(cycle_lengths[cycle_ids[i]] <= open_counts for i in range(num_prisoners))
+
+    return success_counts == num_prisoners, success_counts
+
+def _all_succeed(boxes: Sequence[int], num_prisoners: int, open_counts: int, shift: int=0) -> bool:
+    """
+    Walk the cycles through the prisoners' boxes and return False as soon as one of them gets longer than open_counts.
+    """
+    if hasattr(boxes, "tolist"):
+        boxes = boxes.tolist()
+    num_boxes = len(boxes)
+    visited = [False] * num_boxes
     for i in range(num_prisoners):
-        found = False
-        if i in valid_cycles.union(invalid_cycles):
-            # if i belongs to some visited cycle, we can directly find out the prisoner i will succeed or not
+        if visited[i]:
             continue
         curr = i
-        path = {curr}
-        for _ in range(open_counts):
-            curr = (boxes[curr] + shift) % num_boxes # card in box i
-            if curr == i: # find the card
-                valid_cycles.update(path)
-                # if num_boxes > num_prisoners, there would be some cards not mapping to any prisoners
-                success_counts += len(path.intersection(set(range(num_prisoners))))
-                found = True
-                break
-            path.add(curr)
-
-        if not found:
-            invalid_cycles.update(path)
-            
-    return success_counts == num_prisoners, success_counts
\ No newline at end of file
+        length = 0
+        while not visited[curr]:
+            visited[curr] = True
+            length += 1
+            if length > open_counts:
+                return False
+            curr = (boxes[curr] + shift) % num_boxes
+
+    return True
+
+def cycle_following_shifts(instance: Instance, shifts: Optional[Iterable[int]]=None) -> List[int]:
+    """
+    Evaluate cycle following for many shift values of one instance in a single batched pass.
+    The shifted permutations (boxes + shift) % num_boxes are stacked along a shift axis and decomposed together.
+
+    Parameters
+    --------
+    instance: Instance
+        An instance for prinsoners problem
+    shifts: Iterable[int], optional = None
+        Shift values to evaluate, range(num_boxes) if not given
+
+    Returns
+    --------
+    List[int]
+        Number of successful prisoners for each shift, the same as [cycle_following(instance, s)[1] for s in shifts].
+
+    Example
+    --------
+    >>> cycle_following_shifts(Instance(4, boxes=[1, 2, 3, 0], open_counts=2))
+    [0, 4, 0, 4]
+    """
+    import numpy as np
+    from prisoners_problem.batch import CHUNK_ELEMENTS, cycle_following_batch
+
+    num_prisoners, num_boxes, open_counts, boxes, _ = instance.get_attrs()
+    shifts = np.arange(num_boxes) if shifts is None else np.fromiter(shifts, dtype=np.int64)
+    if len(shifts) * num_boxes < SMALL_SHIFT_BATCH:
+        # per-step numpy overhead outweighs the walk itself on small batches
+        return [cycle_following(instance, int(shift))[1] for shift in shifts]
+    boxes = np.asarray(boxes, dtype=np.int64)
+    success_counts = []
+    chunk_size = max(1, CHUNK_ELEMENTS // max(num_boxes, 1))
+    for begin in range(0, len(shifts), chunk_size):
+        shifted = (boxes[None, :] + shifts[begin:begin + chunk_size, None]) % max(num_boxes, 1)
+        success_counts.extend(cycle_following_batch(shifted, num_prisoners, open_counts).tolist())
+
+    return success_counts
+
+def best_shift(instance: Instance, shifts: Optional[Iterable[int]]=None) -> tuple[int, int]:
+    """
+    Return the shift with the most successful prisoners (the smallest one on ties) and its number of successful prisoners.
+    See cycle_following_shifts.
+    """
+    shifts = list(range(instance.num_boxes)) if shifts is None else list(shifts)
+    if not shifts:
+        raise ValueError("shifts should not be empty.")
+    success_counts = cycle_following_shifts(instance, shifts)
+    best = max(range(len(shifts)), key=lambda i: (success_counts[i], -i))
+    return shifts[best], success_counts[best]
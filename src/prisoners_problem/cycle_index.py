@@ -0,0 +1,112 @@
+from typing import *
+
+class CycleIndex():
+    """
+    Cycle structure of one box configuration and shift, built in one O(num_boxes) pass, answering per-prisoner
+    queries in O(1) (or O(length of the answer) for paths).
+
+    Prisoner p opens box (p + shift) % num_boxes first, then box (card + shift) % num_boxes, and finds card p on the
+    last box of the cycle of x -> (boxes[x] + shift) % num_boxes through the first box. So the number of steps to
+    success is the length of that cycle, and the prisoner succeeds iff it is at most open_counts.
+    Over all prisoners, the count of successes is the same as cycle_following when num_prisoners = num_boxes.
+
+    Parameters
+    --------
+    boxes: Sequence[int] | numpy.ndarray
+        Cards allocation in boxes, boxes[i] means the number card in box i
+    shift: int, optional = 0
+        Shift value
+    open_counts: int, optional = None
+        Maximum number for a prisoner to open boxes, num_boxes // 2 if not given
+
+    Attributes
+    --------
+    cycle_ids: List[int]
+        Cycle of every box, cycles are numbered in order of their smallest box
+    cycle_lengths: List[int]
+        Length of every cycle
+    order: List[int]
+        Boxes cycle by cycle, each cycle in walking order from its smallest box
+    cycle_starts: List[int]
+        Offset of every cycle in order
+    positions: List[int]
+        Offset of every box in order
+
+    Methods
+    --------
+    start_box(prisoner) -> int
+    cycle_of(prisoner) -> int
+        Cycle the prisoner walks
+    steps(prisoner) -> int
+        Boxes opened to find the own card without limit
+    succeeds(prisoner) -> bool
+    path(prisoner, limit=None) -> List[int]
+        Boxes opened, at most limit (open_counts if not given)
+    cycle(cycle_id) -> List[int]
+        Boxes of a cycle in walking order
+    outcomes() -> List[bool]
+        succeeds(p) for every prisoner
+
+    Example
+    --------
+    >>> index = CycleIndex([1, 0, 3, 4, 2], open_counts=2)
+    >>> index.path(2), index.steps(2), index.succeeds(0)
+    ([2, 3], 3, True)
+    """
+    def __init__(self, boxes: Sequence[int], shift: int=0, open_counts: Optional[int]=None):
+        if hasattr(boxes, "tolist"):
+            boxes = boxes.tolist()
+        num_boxes = len(boxes)
+        self.num_boxes = num_boxes
+        self.shift = shift
+        self.open_counts = num_boxes // 2 if open_counts is None else open_counts
+        self.cycle_ids = [-1] * num_boxes
+        self.positions = [0] * num_boxes
+        self.cycle_lengths = []
+        self.cycle_starts = []
+        self.order = []
+        for i in range(num_boxes):
+            if self.cycle_ids[i] >= 0:
+                continue
+            cycle_id = len(self.cycle_lengths)
+            self.cycle_starts.append(len(self.order))
+            curr = i
+            while self.cycle_ids[curr] < 0:
+                self.cycle_ids[curr] = cycle_id
+                self.positions[curr] = len(self.order)
+                self.order.append(curr)
+                curr = (boxes[curr] + shift) % num_boxes
+            self.cycle_lengths.append(len(self.order) - self.cycle_starts[-1])
+
+    def start_box(self, prisoner: int) -> int:
+        return (prisoner + self.shift) % self.num_boxes
+
+    def cycle_of(self, prisoner: int) -> int:
+        return self.cycle_ids[self.start_box(prisoner)]
+
+    def steps(self, prisoner: int) -> int:
+        return self.cycle_lengths[self.cycle_of(prisoner)]
+
+    def succeeds(self, prisoner: int) -> bool:
+        return self.steps(prisoner) <= self.open_counts
+
+    def path(self, prisoner: int, limit: Optional[int]=None) -> List[int]:
+        box = self.start_box(prisoner)
+        cycle_id = self.cycle_ids[box]
+        begin, length = self.cycle_starts[cycle_id], self.cycle_lengths[cycle_id]
+        offset = self.positions[box] - begin
+        count = min(length, self.open_counts if limit is None else limit)
+        # the cycle rotated to start at the first box
+        return [self.order[begin + (offset + j) % length] for j in range(count)]
+
+    def cycle(self, cycle_id: int) -> List[int]:
+        begin = self.cycle_starts[cycle_id]
+        return self.order[begin:begin + self.cycle_lengths[cycle_id]]
+
+    def outcomes(self) -> List[bool]:
+        short = [length <= self.open_counts for length in self.cycle_lengths]
+        return [short[self.cycle_of(p)] for p in range(self.num_boxes)]
+
+    @property
+    def success_counts(self) -> int:
+        return sum(length for length in self.cycle_lengths if length <= self.open_counts)
@@ -0,0 +1,134 @@
+from prisoners_problem.profiling import maybe_phase
+from typing import *
+
+def sample_cycle_type(num_boxes: int, rng) -> List[int]:
+    """
+    Draw the cycle lengths of a uniform random permutation of range(num_boxes) without building the permutation.
+
+    Feller coupling (the Chinese restaurant process read cycle by cycle): in a uniform permutation of m elements,
+    the cycle through the smallest element has a length uniform on 1..m, and the other m - length elements form a
+    uniform permutation. Drawing one length per cycle takes O(number of cycles), about ln(num_boxes), instead of O(num_boxes).
+
+    Parameters
+    --------
+    num_boxes: int
+        Length of the permutation
+    rng: random.Random
+        Random generator
+
+    Returns
+    --------
+    List[int]
+        Cycle lengths, in the order of their smallest box, summing to num_boxes.
+
+    Example
+    --------
+    >>> import random
+    >>> sum(sample_cycle_type(1000000, random.Random(0)))
+    1000000
+    """
+    lengths = []
+    remaining = num_boxes
+    while remaining > 0:
+        length = rng.randrange(remaining) + 1
+        lengths.append(length)
+        remaining -= length
+
+    return lengths
+
+def random_cycle_types(rng, num_trials: int, num_boxes: int):
+    """
+    Batched sample_cycle_type. Every round draws the next cycle of all unfinished trials,
+    so the work is num_trials times the largest number of cycles in the batch.
+
+    Parameters
+    --------
+    rng: numpy.random.Generator
+        Random generator
+    num_trials: int
+        Number of rows (trials)
+    num_boxes: int
+        Length of each permutation
+
+    Returns
+    --------
+    numpy.ndarray
+        (num_trials, max_cycles) matrix, row t holds the cycle lengths of trial t followed by zeros.
+    """
+    import numpy as np
+
+    remaining = np.full(num_trials, num_boxes, dtype=np.int64)
+    columns = []
+    rows = np.flatnonzero(remaining)
+    while len(rows) > 0:
+        length = np.zeros(num_trials, dtype=np.int64)
+        length[rows] = rng.integers(1, remaining[rows], endpoint=True)
+        remaining -= length
+        columns.append(length)
+        rows = rows[remaining[rows] > 0]
+
+    if not columns:
+        return np.zeros((num_trials, 0), dtype=np.int64)
+    return np.stack(columns, axis=1)
+
+def cycle_following_cycle_type(lengths, open_counts: int):
+    """
+    Cycle following from a (trials, max_cycles) matrix of cycle lengths (see random_cycle_types), for shift = 0 and
+    num_boxes = num_prisoners: every prisoner on a cycle of length <= open_counts succeeds.
+    Return the number of successful prisoners in each trial.
+    """
+    import numpy as np
+    return np.where(lengths <= open_counts, lengths, 0).sum(axis=1)
+
+def is_cycle_type_supported(strategy: str, instance_template, shift: int=0) -> bool:
+    """
+    Return True if the "cycle_type" engine can run strategy on instance_template: the strategy depends only on the
+    cycle lengths (registered with cycle_type), shift = 0 and num_boxes = num_prisoners.
+    """
+    from prisoners_problem.strategies import get_strategy
+    return (get_strategy(strategy).cycle_type is not None and shift == 0
+            and instance_template.num_boxes == instance_template.num_prisoners)
+
+def iter_cycle_type(strategy: str, num_trials: int, instance_template, shift: int=0, rng=None, profiler=None) -> Iterator:
+    """
+    Run simulation trials from sampled cycle types instead of permutations, chunk by chunk. See is_cycle_type_supported.
+    Yield a numpy array of the number of successful prisoners for each chunk, same as iter_batch.
+
+    Parameters
+    --------
+    strategy: str
+        Name of a registered strategy with a cycle_type implementation
+    num_trials: int
+        Number of trials to execute
+    instance_template: Instance
+        Template for simulation
+    shift: int, optional = 0
+        Shift value, only 0 is supported
+    rng: numpy.random.Generator, optional = None
+        Random generator, seeded by the template seed if not given
+    profiler: Profiler, optional = None
+        Records the cycle_types and kernel phases of every chunk
+    """
+    import numpy as np
+    from prisoners_problem.strategies import get_strategy
+
+    if not is_cycle_type_supported(strategy, instance_template, shift):
+        raise ValueError(f"Strategy {strategy} is not supported by cycle_type engine (it needs shift = 0 and num_boxes = num_prisoners).")
+    spec = get_strategy(strategy)
+    num_prisoners, num_boxes, open_counts, _, seed = instance_template.get_attrs()
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    # a row holds about ln(num_boxes) cycles, chunk about like iter_batch at 100 boxes. Each round draws across the
+    # whole chunk, so the chunk size is a power of two dividing CHUNK_TRIALS: a simulation chunk splits the same way
+    # whether its trials are streamed, stored or stopped early.
+    chunk_size = 1 << 13
+    for begin in range(0, num_trials, chunk_size):
+        size = min(chunk_size, num_trials - begin)
+        with maybe_phase(profiler, "cycle_types"):
+            lengths = random_cycle_types(rng, size, num_boxes)
+        with maybe_phase(profiler, "kernel"):
+            success = spec.cycle_type(lengths, num_prisoners, open_counts, rng)
+        if profiler is not None:
+            profiler.count("rng_draws", int(np.count_nonzero(lengths)))
+            profiler.advance(size)
+        yield success
@@ -0,0 +1,142 @@
+from prisoners_problem.batch import random_permutations, cycle_following_batch
+from prisoners_problem.strategies import get_strategy
+from dataclasses import dataclass
+from typing import *
+import math
+
+ESTIMATORS = ("plain", "conditional", "control_variate")
+
+@dataclass
+class Moments():
+    """
+    Running sums of per-trial estimates y (and controls x) for the variance-reduced estimators.
+
+    Attributes
+    --------
+    estimator: str
+        "plain", "conditional" or "control_variate", see ESTIMATORS
+    control_mean: float
+        Exact mean of the control x, "control_variate" only
+    num_trials: int
+        Number of trials added
+    estimate, std_error, ess_gain: float
+        Estimated probability that all prisoners succeed, its standard error, and the effective sample size gain,
+        i.e. the variance of the plain indicator estimator over the variance of this estimator (inf for zero variance)
+    """
+    estimator: str
+    control_mean: float = 0.0
+    num_trials: int = 0
+    sum_y: float = 0.0
+    sum_yy: float = 0.0
+    sum_x: float = 0.0
+    sum_xx: float = 0.0
+    sum_xy: float = 0.0
+
+    def update(self, y, x=None):
+        import numpy as np
+        y = np.asarray(y, dtype=np.float64)
+        self.num_trials += len(y)
+        self.sum_y += float(y.sum())
+        self.sum_yy += float(y @ y)
+        if x is not None:
+            x = np.asarray(x, dtype=np.float64)
+            self.sum_x += float(x.sum())
+            self.sum_xx += float(x @ x)
+            self.sum_xy += float(x @ y)
+        return self
+
+    def _covariances(self) -> tuple[float, float, float]:
+        n = self.num_trials
+        mean_y, mean_x = self.sum_y / n, self.sum_x / n
+        # sample (co)variances, clipped at 0 against rounding
+        ddof = n / (n - 1) if n > 1 else 0.0
+        var_y = max(self.sum_yy / n - mean_y * mean_y, 0.0) * ddof
+        var_x = max(self.sum_xx / n - mean_x * mean_x, 0.0) * ddof
+        cov_xy = (self.sum_xy / n - mean_x * mean_y) * ddof
+        return var_y, var_x, cov_xy
+
+    @property
+    def estimate(self) -> float:
+        if self.num_trials == 0:
+            return 0.0
+        mean_y = self.sum_y / self.num_trials
+        if self.estimator != "control_variate":
+            return mean_y
+        _, var_x, cov_xy = self._covariances()
+        beta = cov_xy / var_x if var_x > 0 else 0.0
+        return mean_y - beta * (self.sum_x / self.num_trials - self.control_mean)
+
+    def _variance(self) -> float:
+        var_y, var_x, cov_xy = self._covariances()
+        if self.estimator == "control_variate" and var_x > 0:
+            return max(var_y - cov_xy * cov_xy / var_x, 0.0)
+        return var_y
+
+    @property
+    def std_error(self) -> float:
+        if self.num_trials == 0:
+            return math.inf
+        return math.sqrt(self._variance() / self.num_trials)
+
+    @property
+    def ess_gain(self) -> float:
+        p = min(max(self.estimate, 0.0), 1.0)
+        variance = self._variance()
+        if self.num_trials == 0 or p * (1 - p) == 0.0:
+            return 1.0
+        return p * (1 - p) / variance if variance > 0 else math.inf
+
+def check_estimator(strategy: str, estimator: str, engine: str):
+    """
+    Raise ValueError if estimator cannot run strategy on engine.
+    """
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator: {estimator}")
+    if estimator == "plain":
+        return
+    spec = get_strategy(strategy)
+    if engine not in ("numpy", "jit"):
+        raise ValueError(f"The {estimator} estimator needs the numpy or jit engine.")
+    if estimator == "conditional" and spec.conditional is None:
+        raise ValueError(f"Strategy {strategy} has no conditional success probability.")
+    if estimator == "control_variate" and (spec.batch is None or not spec.permutations):
+        raise ValueError(f"Strategy {strategy} does not depend on the boxes, a control variate cannot help.")
+
+def control_mean(instance_template) -> float:
+    """
+    Exact mean of the control: the probability that every cycle of a uniform permutation of num_boxes is at most
+    open_counts long, i.e. the exact shift = 0 success probability with num_prisoners = num_boxes.
+    """
+    from prisoners_problem.exact import success_probability
+    from prisoners_problem.problem_instance import Instance
+    num_boxes = instance_template.num_boxes
+    return success_probability("cycle_following", Instance(num_boxes, num_boxes, instance_template.open_counts))
+
+def estimator_chunk(strategy: str, num_trials: int, instance_template, shift: int, estimator: str, rng, jit: bool=False) -> tuple:
+    """
+    Draw num_trials trials and return (y, x): the per-trial estimates of the probability that all prisoners succeed,
+    and the controls ("control_variate" only, None otherwise).
+
+    plain: y is the all-succeed indicator.
+    conditional: y is the strategy's probability that all prisoners succeed given the boxes (Strategy.conditional),
+        which integrates out the strategy's own randomness.
+    control_variate: y is the all-succeed indicator, x the indicator that every cycle of the shifted map
+        x -> (boxes[x] + shift) % num_boxes is at most open_counts long. The shifted map is a uniform permutation as well,
+        so the mean of x is control_mean whatever shift is, and x = 1 implies that cycle following succeeds for any
+        num_prisoners, which makes x strongly correlated with y for cycle following.
+    """
+    import numpy as np
+
+    spec = get_strategy(strategy)
+    num_prisoners, num_boxes, open_counts = instance_template.num_prisoners, instance_template.num_boxes, instance_template.open_counts
+    if estimator == "conditional" and not spec.permutations:
+        perms = np.broadcast_to(np.arange(num_boxes), (num_trials, num_boxes))
+    else:
+        perms = random_permutations(rng, num_trials, num_boxes)
+    if estimator == "conditional":
+        return spec.conditional(perms, num_prisoners, open_counts, shift), None
+    kernel = spec.jit if jit and spec.jit is not None else spec.batch
+    y = kernel(perms, num_prisoners, open_counts, shift, rng) == num_prisoners
+    if estimator == "plain":
+        return y, None
+    return y, cycle_following_batch(perms, num_boxes, open_counts, shift) == num_boxes
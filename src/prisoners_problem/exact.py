@@ -0,0 +1,97 @@
+from prisoners_problem.problem_instance import Instance
+from functools import lru_cache
+from typing import *
+import math
+
+def is_exact_supported(strategy: str, instance_template: Instance, shift: int=0) -> bool:
+    """
+    Return True if the success distribution of strategy on instance_template can be computed exactly.
+    Cycle following is supported for shift = 0 and num_boxes = num_prisoners, random picking for any setting.
+    """
+    if strategy == "random":
+        return True
+    if strategy == "cycle_following":
+        return shift == 0 and instance_template.num_boxes == instance_template.num_prisoners
+    return False
+
+@lru_cache(maxsize=None)
+def _distribution(strategy: str, num_prisoners: int, num_boxes: int, open_counts: int) -> tuple[float, ...]:
+    if strategy == "random":
+        # every prisoner independently finds the card with probability open_counts / num_boxes
+        p = min(max(open_counts, 0), num_boxes) / num_boxes if num_boxes > 0 else 0.0
+        if p in (0.0, 1.0):
+            dist = [0.0] * (num_prisoners + 1)
+            dist[round(p * num_prisoners)] = 1.0
+            return tuple(dist)
+        log_p, log_q = math.log(p), math.log1p(-p)
+        return tuple(math.exp(math.lgamma(num_prisoners + 1) - math.lgamma(s + 1) - math.lgamma(num_prisoners - s + 1)
+                              + s * log_p + (num_prisoners - s) * log_q) for s in range(num_prisoners + 1))
+
+    # cycle following: the successful prisoners are exactly the elements on cycles of length <= open_counts.
+    # short[j] (long[j]) = probability that a uniform permutation of j elements has only cycles of length <= k (> k),
+    # both follow from j * f(j) = sum_{allowed L} f(j - L), and P(S = s) = short[s] * long[n - s].
+    n, k = num_prisoners, max(open_counts, 0)
+    short, long = [1.0] * (n + 1), [1.0] * (n + 1)
+    window = 0.0
+    long_prefix = [1.0] + [0.0] * n
+    for j in range(1, n + 1):
+        window += short[j - 1]
+        if j - 1 - k >= 0:
+            window -= short[j - 1 - k]
+        short[j] = window / j
+        long[j] = long_prefix[j - k - 1] / j if j - k - 1 >= 0 else 0.0
+        long_prefix[j] = long_prefix[j - 1] + long[j]
+
+    return tuple(short[s] * long[n - s] for s in range(n + 1))
+
+def success_distribution(strategy: Literal["random", "cycle_following"], instance_template: Instance, shift: int=0) -> List[float]:
+    """
+    Exact distribution of the number of successful prisoners, computed in polynomial time instead of by simulation.
+    Results are cached by (num_prisoners, num_boxes, open_counts).
+
+    Parameters
+    --------
+    strategy: str, either "random" or "cycle_following"
+        Used strategy
+    instance_template: Instance
+        Template for simulation, its boxes are ignored
+    shift: int, optional = 0
+        Used if strategy = "cycle_following", only shift = 0 is supported
+
+    Returns
+    --------
+    List[float]
+        dist[s] is the probability that exactly s prisoners succeed, s = 0, ..., num_prisoners.
+
+    Examples
+    --------
+    >>> [round(p, 4) for p in success_distribution("cycle_following", Instance(4, open_counts=2))]
+    [0.25, 0.3333, 0.0, 0.0, 0.4167]
+    """
+    if strategy not in ("random", "cycle_following"):
+        raise ValueError(f"Unknown strategy: {strategy}")
+    if not is_exact_supported(strategy, instance_template, shift):
+        raise ValueError("Exact solution of cycle_following requires shift = 0 and num_boxes = num_prisoners.")
+    num_prisoners, num_boxes, open_counts, _, _ = instance_template.get_attrs()
+    return list(_distribution(strategy, num_prisoners, num_boxes, open_counts))
+
+def success_probability(strategy: Literal["random", "cycle_following"], instance_template: Instance, shift: int=0) -> float:
+    """
+    Exact probability that all prisoners succeed, see success_distribution.
+
+    Examples
+    --------
+    >>> round(success_probability("cycle_following", Instance(100)), 4)
+    0.3118
+    """
+    return success_distribution(strategy, instance_template, shift)[-1]
+
+def run_exact(name: str, strategy: Literal["random", "cycle_following"], instance_template: Instance, shift: int=0) -> tuple[Dict[str, Any], List[float]]:
+    """
+    Exact counterpart of run_simulation. Return simulation information (num_trials = 0) and the success distribution.
+    """
+    dist = success_distribution(strategy, instance_template, shift)
+    simu_info = instance_template.get_template()
+    simu_info.update({"name": name, "strategy": strategy, "num_trials": 0, "shift": shift})
+
+    return simu_info, dist
@@ -1,9 +1,111 @@
-import matplotlib.pyplot as plt
-from matplotlib.pyplot import MultipleLocator
-from prisoners_problem.problem_instance import Instance
+from prisoners_problem.histogram import SuccessHistogram
 from typing import *
+import os
+import sys
 
-def plot_success_dist(simu_info: Dict[str, Any], results: List[float], ax: Optional[tuple]=None, highlight: bool=True, highlight_color: str="orange"):
+def has_display() -> bool:
+    """
+    Return False when figures cannot be shown on screen: a non-interactive backend was requested (MPLBACKEND=Agg, ...),
+    or no X11 / Wayland display is available on Linux.
+    """
+    backend = os.environ.get("MPLBACKEND", "").lower()
+    if backend in ("agg", "pdf", "ps", "svg", "pgf", "cairo", "template"):
+        return False
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+def _bin_counts(results: Union[List[float], SuccessHistogram], num_prisoners: int) -> List[int]:
+    """
+    Return results as a bincount of successful prisoners, length num_prisoners + 1.
+    """
+    if isinstance(results, SuccessHistogram):
+        if results.num_trials == 0:
+            raise ValueError("Empty result received.")
+        return results.counts
+    if len(results) == 0:
+        raise ValueError("Empty result received.")
+    return SuccessHistogram(num_prisoners).update(results).counts
+
+class SuccessDistPlot():
+    """
+    Bar chart of the number of successful prisoners, one bar per value 0, ..., num_prisoners.
+    The bars are created once and update() only changes their heights, so a live plot or a batch export
+    redraws the same artists instead of building a new figure for every result.
+
+    Parameters
+    --------
+    simu_info: Dict[str, Any]
+        Information of the simulation, num_prisoners and name are used
+    ax: matplotlib.axes.Axes, optional = None
+        Axes to draw on. A new figure is created if not given.
+    highlight: bool, optional = True
+        Switch to highlight the bar of trials where all prisoners succeed
+    highlight_color: str, optional = "orange"
+        Color of the highlighted bar
+    pyplot: bool, optional = True
+        Create the new figure through pyplot (needed by plt.show and st.pyplot),
+        otherwise a bare Figure on an Agg canvas is used, which leaves the pyplot state untouched
+
+    Attributes
+    --------
+    figure: matplotlib.Figure
+    ax: matplotlib.axes.Axes
+    bars: matplotlib.container.BarContainer
+
+    Methods
+    --------
+    update(results, name=None) -> matplotlib.Figure
+        Set the bar heights from a histogram, a bincount or a list of per-trial results
+    """
+    def __init__(self, simu_info: Dict[str, Any], ax=None, highlight: bool=True, highlight_color: str="orange", pyplot: bool=True):
+        self.num_prisoners = simu_info["num_prisoners"]
+        if ax is None:
+            if pyplot:
+                import matplotlib.pyplot as plt
+                fig, ax = plt.subplots(figsize=(10, 6))
+            else:
+                from matplotlib.figure import Figure
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                fig = Figure(figsize=(10, 6))
+                FigureCanvasAgg(fig)
+                ax = fig.add_subplot()
+        self.ax = ax
+        self.figure = ax.figure
+
+        self.bars = ax.bar(range(self.num_prisoners + 1), [0] * (self.num_prisoners + 1), width=1.0, alpha=0.7)
+        if highlight: # highlight the bar for success
+            self.bars[self.num_prisoners].set_facecolor(highlight_color)
+            self.bars[self.num_prisoners].set_alpha(0.8)
+        self.title = ax.set_title(simu_info["name"], fontdict={"size": 14, "fontweight": "bold"}, pad=10)
+        ax.set_xlim(-0.05 * self.num_prisoners, 1.1 * self.num_prisoners)
+        ax.set_xlabel("# of successful prisoners", fontdict={"size": 12}, labelpad=8)
+        ax.set_ylabel("Frequency", fontdict={"size": 12}, labelpad= 8)
+
+    def update(self, results: Union[List[float], List[int], SuccessHistogram], name: Optional[str]=None, counts: bool=False):
+        """
+        Set the bar heights and rescale the y axis. Return the figure.
+
+        Parameters
+        --------
+        results: List[float] | SuccessHistogram
+            Results for the simulation, either one entry per trial or a precomputed histogram
+        name: str, optional = None
+            New title
+        counts: bool, optional = False
+            results is already a bincount of length num_prisoners + 1
+        """
+        heights = list(results) if counts else _bin_counts(results, self.num_prisoners)
+        if len(heights) != self.num_prisoners + 1:
+            raise ValueError("Length of counts should be num_prisoners + 1.")
+        for bar, height in zip(self.bars, heights):
+            bar.set_height(height)
+        self.ax.set_ylim(0, max(max(heights), 1) * 1.05)
+        if name is not None:
+            self.title.set_text(name)
+        return self.figure
+
+def plot_success_dist(simu_info: Dict[str, Any], results: Union[List[float], SuccessHistogram], ax: Optional[tuple]=None, highlight: bool=True, highlight_color: str="orange"):
     """
     To plot the result of simulations.
     Return matplotlib.Figure
@@ -12,43 +114,95 @@ def plot_success_dist(simu_info: Dict[str, Any], results: List[float], ax: Optio
     --------
     simu_info: Dict[str, Any]
         Information of the simulation
-    results: List[float]
-        Results for the simulation
+    results: List[float] | SuccessHistogram
+        Results for the simulation, either one entry per trial or a precomputed histogram
     ax: tuple, optional = None
         matplotlib.axes.Axes
     highlight: bool, optional = True
         Switch to highlight success trial bars
     highlight_color: str, optional = "orange"
         Color of highlighted bars
-    
+
     Returns
     --------
     matplotlib.Figure
 
     See Also
     --------
-    matplotlib.pyplot
+    SuccessDistPlot: keep the artists to update the same figure with new results
 
     """
-    if len(results) == 0:
-        raise ValueError("Empty result received.")
-    
+    counts = _bin_counts(results, simu_info["num_prisoners"])
+    return SuccessDistPlot(simu_info, ax=ax, highlight=highlight, highlight_color=highlight_color).update(counts, counts=True)
+
+def export_figures(items: Iterable[Tuple[Dict[str, Any], Union[List[float], SuccessHistogram], str]], dpi: int=100, highlight: bool=True, highlight_color: str="orange") -> List[str]:
+    """
+    Render many results to image files without pyplot, e.g. every cell of a parameter sweep.
+    Results with the same num_prisoners are drawn on one reused Agg figure, the format follows the file extension (.png, .svg, ...).
+
+    Parameters
+    --------
+    items: Iterable[Tuple[Dict[str, Any], List[float] | SuccessHistogram, str]]
+        (simu_info, results, path) of each figure
+    dpi: int, optional = 100
+        Resolution of raster images
+
+    Returns
+    --------
+    List[str]
+        Paths of the written files
+    """
+    plots = {}
+    paths = []
+    for simu_info, results, path in items:
+        num_prisoners = simu_info["num_prisoners"]
+        if num_prisoners not in plots:
+            plots[num_prisoners] = SuccessDistPlot(simu_info, highlight=highlight, highlight_color=highlight_color, pyplot=False)
+        plots[num_prisoners].update(results, name=simu_info["name"]).savefig(path, dpi=dpi)
+        paths.append(path)
+    return paths
+
+def plot_cycle_diagram(index, prisoner: Optional[int]=None, ax: Optional[tuple]=None, fail_color: str="tab:red", success_color: str="tab:green",
+                       highlight_color: str="orange"):
+    """
+    Draw the cycles of a box configuration as one horizontal bar split into a segment per cycle, the width of a segment
+    being the cycle length. Prisoners on cycles longer than open_counts fail. One artist per cycle, not per box, so
+    configurations of tens of thousands of boxes draw as fast as small ones.
+    Return matplotlib.Figure
+
+    Parameters
+    --------
+    index: CycleIndex
+        Cycle structure of the box configuration
+    prisoner: int, optional = None
+        Prisoner whose cycle is outlined
+    ax: matplotlib.axes.Axes, optional = None
+        Axes to draw on. A bare Figure on an Agg canvas is created if not given, outside pyplot, so figures drawn on
+        every Streamlit rerun are freed with their last reference instead of piling up in pyplot.
+    fail_color, success_color, highlight_color: str, optional
+        Colors of failing cycles, succeeding cycles and the outline of the prisoner's cycle
+
+    Returns
+    --------
+    matplotlib.Figure
+    """
     if ax is None:
-        fig, ax = plt.subplots(figsize=(10, 6))
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure(figsize=(10, 1.8))
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot()
     else:
-        fig = ax.figure
-
-    ax.set_title(simu_info["name"], fontdict={"size": 14, "fontweight": "bold"}, pad=10)
-    _, bins_edges, patches = ax.hist(results, bins=list(range(simu_info["num_prisoners"]+1)), alpha=0.7, align="right")
-    ax.set_xlim(-0.05 * simu_info["num_prisoners"], 1.1 * simu_info["num_prisoners"])
-    ax.set_xlabel("# of successful prisoners", fontdict={"size": 12}, labelpad=8)
-    ax.set_ylabel("Frequency", fontdict={"size": 12}, labelpad= 8)
-    if highlight: # highlight the bar for success
-        success_val = simu_info["num_prisoners"]
-        for i in range(len(bins_edges) - 1):
-            if bins_edges[i] <= success_val <= bins_edges[i + 1]:
-                patches[i].set_facecolor(highlight_color)
-                patches[i].set_alpha(0.8)
-                break
-
-    return fig
+        figure = ax.figure
+    lefts = index.cycle_starts
+    colors = [success_color if length <= index.open_counts else fail_color for length in index.cycle_lengths]
+    ax.barh(0, index.cycle_lengths, left=lefts, color=colors, edgecolor="white", linewidth=0.5)
+    if prisoner is not None:
+        cycle_id = index.cycle_of(prisoner)
+        ax.barh(0, index.cycle_lengths[cycle_id], left=lefts[cycle_id], fill=False, edgecolor=highlight_color, linewidth=2.5)
+    ax.set_xlim(0, max(index.num_boxes, 1))
+    ax.set_yticks([])
+    ax.set_xlabel("Boxes, cycle by cycle")
+    ax.set_title(f"{len(index.cycle_lengths)} cycles, longest {max(index.cycle_lengths, default=0)}, "
+                 f"{index.success_counts} / {index.num_boxes} prisoners succeed")
+    return figure
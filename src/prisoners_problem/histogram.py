@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+from typing import *
+
+@dataclass
+class SuccessHistogram():
+    """
+    Constant-memory record of a simulation: how many trials ended with k successful prisoners, for k = 0, ..., num_prisoners.
+
+    Parameters
+    --------
+    num_prisoners: int
+        Number of prisoners
+    counts: List[int], optional = None
+        counts[k] is the number of trials with k successful prisoners. All zeros if not given.
+
+    Attributes
+    --------
+    num_prisoners: int
+        Number of prisoners
+    counts: List[int]
+        Bincount of successful prisoners, length num_prisoners + 1
+    num_trials: int
+        Number of recorded trials
+    success_counts: int
+        Number of trials in which all prisoners succeed
+    success_rate: float
+        success_counts / num_trials
+
+    Methods
+    --------
+    add(success) -> None
+        Record one trial
+    update(success_record) -> SuccessHistogram
+        Record a list (or numpy array) of trials
+    update_counts(counts) -> SuccessHistogram
+        Add a bincount of trials
+    merge(other) -> SuccessHistogram
+        Add the counts of another histogram
+    """
+    num_prisoners: int
+    counts: Optional[List[int]] = None
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = [0] * (self.num_prisoners + 1)
+        else:
+            self.counts = [int(x) for x in self.counts]
+            if len(self.counts) != self.num_prisoners + 1:
+                raise ValueError("Length of counts should be num_prisoners + 1.")
+        self.num_trials = sum(self.counts)
+
+    @property
+    def success_counts(self) -> int:
+        return self.counts[-1]
+
+    @property
+    def success_rate(self) -> float:
+        if self.num_trials == 0:
+            return 0.0
+        return self.success_counts / self.num_trials
+
+    def add(self, success: int):
+        self.counts[success] += 1
+        self.num_trials += 1
+
+    def update(self, success_record: Iterable[int]):
+        if hasattr(success_record, "dtype"):
+            import numpy as np
+            # only touch the values present, a bincount would cost O(num_prisoners) per chunk
+            values, counts = np.unique(success_record, return_counts=True)
+            for success, count in zip(values.tolist(), counts.tolist()):
+                self.counts[success] += count
+            self.num_trials += len(success_record)
+            return self
+        for success in success_record:
+            self.add(success)
+        return self
+
+    def update_counts(self, counts: Sequence[int]):
+        if len(counts) != self.num_prisoners + 1:
+            raise ValueError("Length of counts should be num_prisoners + 1.")
+        for k, count in enumerate(counts):
+            self.counts[k] += int(count)
+        self.num_trials += sum(int(count) for count in counts)
+        return self
+
+    def merge(self, other: "SuccessHistogram"):
+        if other.num_prisoners != self.num_prisoners:
+            raise ValueError("Cannot merge histograms with different num_prisoners.")
+        return self.update_counts(other.counts)
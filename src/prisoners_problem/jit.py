@@ -0,0 +1,81 @@
+import os
+import threading
+import numpy as np
+from typing import *
+
+try:
+    from numba import config, njit, prange
+    HAS_NUMBA = True
+    if "NUMBA_THREADING_LAYER" not in os.environ:
+        # simulations fork worker processes, which hang once TBB threads were started, workqueue survives fork
+        config.THREADING_LAYER = "workqueue"
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # plain Python stand-in so that the kernel source stays importable and testable without numba
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# every call already runs on all threads, and workqueue aborts on concurrent calls (e.g. SimulationService on a thread pool)
+_KERNEL_LOCK = threading.Lock()
+
+@njit(parallel=True, cache=True)
+def _cycle_following_kernel(perms, num_prisoners, open_counts, shift, success):
+    """
+    Cycle following on every row of perms, parallel over rows. Walk the cycle of every prisoner box not visited yet,
+    boxes only reached from num_prisoners on are never walked. Write the number of successful prisoners in success.
+    """
+    num_trials, num_boxes = perms.shape
+    for t in prange(num_trials):
+        visited = np.zeros(num_boxes, dtype=np.bool_)
+        count = 0
+        for i in range(num_prisoners):
+            if visited[i]:
+                continue
+            length = 0
+            members = 0
+            curr = i
+            while not visited[curr]:
+                visited[curr] = True
+                length += 1
+                if curr < num_prisoners:
+                    members += 1
+                # widen first, corpus rows are unsigned
+                curr = (np.int64(perms[t, curr]) + shift) % num_boxes
+            if length <= open_counts:
+                count += members
+        success[t] = count
+
+def cycle_following_jit(perms, num_prisoners: int, open_counts: int, shift: int=0):
+    """
+    Compiled cycle following strategy, identical to cycle_following_batch (and cycle_following row by row).
+    Falls back to cycle_following_batch when numba is not installed.
+
+    Parameters
+    --------
+    perms: numpy.ndarray
+        (trials, num_boxes) matrix, perms[t][i] means the number card in box i of trial t
+    num_prisoners: int
+        Number of prisoners
+    open_counts: int
+        Maximum number for a prisoner to open boxes
+    shift: int, optional = 0
+        Shift value, see cycle_following
+
+    Returns
+    --------
+    numpy.ndarray
+        Number of successful prisoners in each trial.
+    """
+    if not HAS_NUMBA:
+        from prisoners_problem.batch import cycle_following_batch
+        return cycle_following_batch(perms, num_prisoners, open_counts, shift)
+    perms = np.asarray(perms)
+    success = np.zeros(perms.shape[0], dtype=np.int64)
+    if perms.shape[1] > 0:
+        with _KERNEL_LOCK:
+            _cycle_following_kernel(perms, num_prisoners, open_counts, shift, success)
+    return success
@@ -1,7 +1,39 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, InitVar
 from typing import *
 import warnings
 
+def _shuffled(num_boxes: int, rng=None, seed: Optional[int]=None) -> List[int]:
+    """
+    Return a random permutation of range(num_boxes) drawn from rng (random.Random or numpy.random.Generator),
+    or from random.Random(seed) if only seed is given. The global random module is never reseeded.
+    """
+    import random
+
+    if rng is None:
+        rng = random.Random(seed) if seed is not None else random
+    if hasattr(rng, "sample"): # random.Random (or the random module)
+        boxes = list(range(num_boxes))
+        rng.shuffle(boxes)
+        return boxes
+    return rng.permutation(num_boxes).tolist()
+
+def _check_params(instance):
+    """
+    Validate and fill in num_prisoners, num_boxes and open_counts of an instance in place.
+    """
+    if not isinstance(instance.num_prisoners, int):
+        raise TypeError("num_prisoners should be int.")
+    if instance.num_boxes is None:
+        instance.num_boxes = instance.num_prisoners
+    elif not isinstance(instance.num_boxes, int):
+        raise TypeError("num_boxes should be int or None.")
+    if instance.open_counts is None:
+        instance.open_counts = instance.num_prisoners // 2
+    elif not isinstance(instance.open_counts, int):
+        raise TypeError("open_counts should be int or None.")
+    elif instance.open_counts >= instance.num_boxes:
+        warnings.warn("Prisoners can open all the boxes under current setting (open_counts > num_boxes).", UserWarning)
+
 @dataclass
 class Instance():
     """
@@ -18,7 +50,9 @@ class Instance():
     boxes: tuple[int], optional = None
         Record cards allocation in boxes, boxes[i] means the number card in box i. Randomly generated if not given.
     seed: int, optional = None
-        Random seed
+        Random seed, boxes are shuffled by random.Random(seed)
+    rng: random.Random | numpy.random.Generator, optional = None
+        Random generator to shuffle boxes with, takes precedence over seed. Not stored on the instance.
 
     Attributes
     --------
@@ -39,7 +73,7 @@ class Instance():
         Return instance information
     get_template() -> Dict[str, Value]
         Return instance setting parameters (excluding boxes) in dictionary
-    from_template(template_dict) -> Instance
+    from_template(template_dict, rng=None) -> Instance
         Class method. Alternate constructor to create an Instance from a template dictionary.
     """
     num_prisoners: int
@@ -47,29 +81,12 @@ class Instance():
     open_counts: Optional[int] = None
     boxes: Optional[tuple[int]] = None
     seed: Optional[int] = None
+    rng: InitVar[Any] = None
 
-    def __post_init__(self):
-        if not isinstance(self.num_prisoners, int):
-            raise TypeError("num_prisoners should be int.")
-        if self.num_boxes is None:
-            self.num_boxes = self.num_prisoners
-        elif not isinstance(self.num_boxes, int):
-            raise TypeError("num_boxes should be int or None.")
-        if self.open_counts is None:
-            self.open_counts = self.num_prisoners // 2
-        elif not isinstance(self.open_counts, int):
-            raise TypeError("open_counts should be int or None.")
-        elif self.open_counts >= self.num_boxes:
-            warnings.warn("Prisoners can open all the boxes under current setting (open_counts > num_boxes).", UserWarning)
+    def __post_init__(self, rng):
+        _check_params(self)
         if self.boxes is None:
-            import random
-            if self.seed is not None:
-                random.seed(self.seed)
-            else:
-                random.random()
-            self.boxes = list(range(self.num_boxes))
-            random.shuffle(self.boxes)
-            self.boxes = tuple(self.boxes)
+            self.boxes = tuple(_shuffled(self.num_boxes, rng, self.seed))
         else:
             if not all(isinstance(x, int) for x in self.boxes):
                 raise TypeError("Each element in boxes should be int.")
@@ -98,9 +115,151 @@ class Instance():
         }
     
     @classmethod
-    def from_template(cls, template: Dict):
+    def from_template(cls, template: Dict, rng=None):
         return cls(num_prisoners=template["num_prisoners"], 
                    num_boxes=template["num_boxes"], 
                    open_counts=template["open_counts"], 
                    boxes=None,
-                   seed=template["seed"])
+                   seed=template["seed"],
+                   rng=rng)
+
+    @classmethod
+    def _trusted(cls, num_prisoners: int, num_boxes: int, open_counts: int, boxes, seed: Optional[int]=None):
+        """
+        Build an instance from boxes already known to be a permutation of range(num_boxes), e.g. a corpus row
+        (see PermutationCorpus), skipping the per-element validation of __post_init__.
+        """
+        instance = cls.__new__(cls)
+        instance.num_prisoners, instance.num_boxes, instance.open_counts, instance.seed = num_prisoners, num_boxes, open_counts, seed
+        instance.boxes = tuple(boxes)
+        return instance
+
+
+class CompactInstance():
+    """
+    Memory-compact variant of Instance. Boxes are stored in a contiguous read-only numpy uint32 buffer
+    (4 bytes per box), and randomly generated boxes are only shuffled when boxes is first accessed.
+    Supplied boxes are validated with a single vectorized bincount.
+
+    Parameters
+    --------
+    num_prisoners: int
+        Number of prisoners
+    num_boxes: int, optional = None
+        Number of boxes. num_boxes = num_prisoners if not given.
+    open_counts: int, optional = None
+        Maximum number for a prisoner to open boxes. open_counts = num_prisoners // 2 if not given.
+    boxes: Sequence[int] | numpy.ndarray, optional = None
+        Record cards allocation in boxes, boxes[i] means the number card in box i. Randomly generated on first access if not given.
+    seed: int, optional = None
+        Random seed
+    rng: random.Random | numpy.random.Generator, optional = None
+        Random generator to shuffle boxes with, takes precedence over seed. Boxes are then drawn at construction, not lazily.
+
+    Attributes
+    --------
+    Same as Instance, except that boxes is a numpy.ndarray.
+
+    Methods
+    --------
+    Same as Instance: get_attrs(), get_template() and from_template(template_dict, rng=None).
+
+    Notes
+    --------
+    Seeded boxes are drawn from numpy.random.default_rng(seed), so they differ from Instance with the same seed.
+    """
+    __slots__ = ("num_prisoners", "num_boxes", "open_counts", "seed", "_boxes")
+
+    def __init__(self, num_prisoners: int, num_boxes: Optional[int]=None, open_counts: Optional[int]=None, boxes=None, seed: Optional[int]=None, rng=None):
+        self.num_prisoners = num_prisoners
+        self.num_boxes = num_boxes
+        self.open_counts = open_counts
+        self.seed = seed
+        _check_params(self)
+        if boxes is not None:
+            self._boxes = self._validate_boxes(boxes)
+        elif rng is None:
+            self._boxes = None
+        else:
+            self._boxes = self._draw_boxes(rng)
+
+    def _draw_boxes(self, rng):
+        """
+        Shuffle a uint32 buffer in place with a numpy Generator. A random.Random only seeds that Generator:
+        shuffling a Python list and converting it would cost more than the trial itself.
+        """
+        import numpy as np
+
+        if not hasattr(rng, "permutation"): # random.Random
+            rng = np.random.default_rng(rng.getrandbits(64))
+        boxes = np.arange(self.num_boxes, dtype=np.uint32 if self.num_boxes <= 1 << 32 else np.uint64)
+        rng.shuffle(boxes)
+        boxes.setflags(write=False)
+        return boxes
+
+    def _validate_boxes(self, boxes):
+        import numpy as np
+
+        if isinstance(boxes, (set, frozenset, dict)):
+            raise TypeError("boxes should be tuple of int, list of int or numpy array.")
+        boxes = np.asarray(boxes)
+        if boxes.size > 0 and boxes.dtype.kind not in "iu":
+            raise TypeError("Each element in boxes should be int.")
+        if boxes.ndim != 1 or len(boxes) != self.num_boxes:
+            raise ValueError("Length of boxes is inconsistent.")
+        if boxes.size == 0:
+            return np.zeros(0, dtype=np.uint32)
+        if boxes.min() < 0:
+            raise ValueError("Each element in boxes should be non-negative.")
+        if boxes.max() >= self.num_boxes or (np.bincount(boxes, minlength=self.num_boxes) != 1).any():
+            raise ValueError("boxes contains value from 0 to n-1, where n is the number of boxes.")
+        return self._freeze(boxes)
+
+    def _freeze(self, boxes):
+        import numpy as np
+
+        boxes = np.ascontiguousarray(boxes, dtype=np.uint32 if self.num_boxes <= 1 << 32 else np.uint64)
+        boxes.setflags(write=False)
+        return boxes
+
+    @property
+    def boxes(self):
+        if self._boxes is None:
+            import numpy as np
+            self._boxes = self._freeze(np.random.default_rng(self.seed).permutation(self.num_boxes))
+        return self._boxes
+
+    def __repr__(self):
+        boxes = "<lazy>" if self._boxes is None else repr(self._boxes)
+        return (f"CompactInstance(num_prisoners={self.num_prisoners}, num_boxes={self.num_boxes}, "
+                f"open_counts={self.open_counts}, boxes={boxes}, seed={self.seed})")
+
+    def get_attrs(self):
+        return self.num_prisoners, self.num_boxes, self.open_counts, self.boxes, self.seed
+
+    def get_template(self):
+        return {
+            "num_prisoners": self.num_prisoners,
+            "num_boxes": self.num_boxes,
+            "open_counts": self.open_counts,
+            "seed": self.seed
+        }
+
+    @classmethod
+    def from_template(cls, template: Dict, rng=None):
+        return cls(num_prisoners=template["num_prisoners"],
+                   num_boxes=template["num_boxes"],
+                   open_counts=template["open_counts"],
+                   boxes=None,
+                   seed=template["seed"],
+                   rng=rng)
+
+    @classmethod
+    def _trusted(cls, num_prisoners: int, num_boxes: int, open_counts: int, boxes, seed: Optional[int]=None):
+        """
+        Same as Instance._trusted, boxes are stored without the bincount validation.
+        """
+        instance = cls.__new__(cls)
+        instance.num_prisoners, instance.num_boxes, instance.open_counts, instance.seed = num_prisoners, num_boxes, open_counts, seed
+        instance._boxes = instance._freeze(boxes)
+        return instance
@@ -0,0 +1,150 @@
+from contextlib import contextmanager, nullcontext
+from typing import *
+import json
+import time
+
+class Profiler():
+    """
+    Opt-in instrumentation of a simulation run: per-phase wall time, counters, progress callbacks with ETA,
+    and optional cProfile / Chrome trace output. Simulations only take the instrumented path when a profiler is given.
+
+    Phases
+    --------
+    instance: building an instance (shuffle + validation) per trial, "python" engine
+    strategy: the strategy kernel per trial, "python" engine
+    accounting: deriving boxes opened / cycles walked for the counters, "python" engine
+    permutations: drawing a chunk of permutations, "numpy" engine
+    kernel: the batched strategy kernel per chunk, "numpy" engine
+    cycle_types: drawing a chunk of cycle types, "cycle_type" engine
+    The remaining wall time (recording results, bookkeeping) is reported as "other".
+
+    Counters
+    --------
+    trials, instances_built, boxes_opened, cycles_walked, rng_draws (approximate number of random values drawn)
+
+    Parameters
+    --------
+    progress: Callable[[int, int, float, float], None], optional = None
+        Called as progress(done, total, elapsed, eta) at most every progress_interval seconds, and once at the end
+    progress_interval: float, optional = 1.0
+        Seconds between progress callbacks
+    cprofile: bool, optional = False
+        Run cProfile for the whole run, see dump_stats
+    max_events: int, optional = 100000
+        Maximum number of phase events kept for the Chrome trace, later events only count towards the totals
+
+    Methods
+    --------
+    phase(name) -> context manager
+        Time a block as one occurrence of a phase
+    count(name, n=1) -> None
+        Increase a counter
+    advance(n) -> None
+        Mark n trials as done and fire the progress callback if due
+    report() -> Dict[str, Any]
+        Phase times, counters and wall time
+    summary() -> str
+        Human readable report
+    dump_chrome_trace(path) -> None
+        Write phase events as a Chrome trace (chrome://tracing, Perfetto)
+    dump_stats(path) -> None
+        Write cProfile statistics, readable with pstats
+    """
+    def __init__(self, progress: Optional[Callable]=None, progress_interval: float=1.0, cprofile: bool=False, max_events: int=100000):
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.max_events = max_events
+        self.phases = {}
+        self.counters = {}
+        self.events = []
+        self.total = None
+        self.done = 0
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+        self._start = None
+        self._stop = None
+        self._last_progress = None
+
+    def start(self, total: Optional[int]=None):
+        self.total = total
+        self._start = self._last_progress = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self._stop = time.perf_counter()
+        if self.progress is not None:
+            self.progress(self.done, self.total, self._stop - self._start, 0.0)
+
+    @contextmanager
+    def phase(self, name: str):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases[name] = self.phases.get(name, 0.0) + end - begin
+            if len(self.events) < self.max_events:
+                self.events.append((name, begin, end))
+
+    def count(self, name: str, n: int=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def advance(self, n: int=1):
+        self.done += n
+        self.count("trials", n)
+        if self.progress is not None:
+            now = time.perf_counter()
+            if now - self._last_progress >= self.progress_interval:
+                self._last_progress = now
+                elapsed = now - self._start
+                eta = elapsed / self.done * (self.total - self.done) if self.total and self.done else float("nan")
+                self.progress(self.done, self.total, elapsed, eta)
+
+    def report(self) -> Dict[str, Any]:
+        end = self._stop if self._stop is not None else time.perf_counter()
+        wall_time = end - self._start if self._start is not None else 0.0
+        phases = dict(self.phases)
+        phases["other"] = max(wall_time - sum(self.phases.values()), 0.0)
+        return {"wall_time": wall_time, "phases": phases, "counters": dict(self.counters)}
+
+    def summary(self) -> str:
+        report = self.report()
+        wall_time = report["wall_time"] or 1.0
+        lines = [f"Wall time: {report['wall_time']:.4f} s"]
+        for name, seconds in report["phases"].items():
+            lines.append(f"  {name:<16}{seconds:>12.4f} s{seconds / wall_time:>8.1%}")
+        for name, value in report["counters"].items():
+            lines.append(f"  {name:<16}{value:>12}")
+        return "\n".join(lines)
+
+    def dump_chrome_trace(self, path: str):
+        origin = self._start if self._start is not None else 0.0
+        trace = [{"name": name, "ph": "X", "pid": 0, "tid": 0, "ts": (begin - origin) * 1e6, "dur": (end - begin) * 1e6}
+                 for name, begin, end in self.events]
+        trace.extend({"name": name, "ph": "C", "pid": 0, "ts": 0, "args": {name: value}} for name, value in self.counters.items())
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+
+    def dump_stats(self, path: str):
+        if self._cprofile is None:
+            raise ValueError("cProfile was not enabled, create the Profiler with cprofile=True.")
+        self._cprofile.dump_stats(path)
+
+def maybe_phase(profiler: Optional[Profiler], name: str):
+    """
+    Return profiler.phase(name), or a no-op context if profiling is disabled.
+    """
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+def print_progress(done: int, total: Optional[int], elapsed: float, eta: float):
+    """
+    Default progress callback of the CLI, print trials done, throughput and ETA.
+    """
+    rate = done / elapsed if elapsed > 0 else 0.0
+    total_text = f"/{total}" if total else ""
+    print(f"{done}{total_text} trials, {rate:.4g} trials/sec, elapsed {elapsed:.1f} s, ETA {eta:.1f} s", flush=True)
@@ -0,0 +1,191 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.histogram import SuccessHistogram
+from prisoners_problem.simulations import _check_args, _check_engine, _resolve_engine, _chunks, _count_trials
+from collections import OrderedDict
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import *
+import hashlib
+import json
+import threading
+
+class SimulationJob():
+    """
+    A simulation running in the background on a SimulationService pool.
+    Trials run in seeded chunks (as run_simulation), and the partial histogram is updated as chunks complete.
+
+    Attributes
+    --------
+    job_id: str
+        Hash of the simulation parameters, identical requests share one job
+    num_trials: int
+        Number of requested trials
+    histogram: SuccessHistogram
+        Copy of the trials finished so far
+    progress: float
+        Fraction of finished trials
+    done: bool
+        True once the job finished, failed or was cancelled
+    cancelled: bool
+        True if the job was cancelled
+
+    Methods
+    --------
+    result() -> SuccessHistogram
+        Coroutine, wait for the final histogram. Raises CancelledError if the job was cancelled.
+    wait(timeout) -> SuccessHistogram
+        Blocking counterpart of result()
+    """
+    def __init__(self, job_id: str, strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str):
+        self.job_id = job_id
+        self.strategy = strategy
+        self.num_trials = num_trials
+        self.instance_template = instance_template
+        self.shift = shift
+        self.engine = engine
+        self.subscribers = 0
+        self._histogram = SuccessHistogram(instance_template.num_prisoners)
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._future = Future()
+
+    @property
+    def histogram(self) -> SuccessHistogram:
+        with self._lock:
+            return SuccessHistogram(self._histogram.num_prisoners, list(self._histogram.counts))
+
+    @property
+    def progress(self) -> float:
+        return self._histogram.num_trials / self.num_trials if self.num_trials else 1.0
+
+    @property
+    def done(self) -> bool:
+        return self._future.done()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._future.cancelled()
+
+    async def result(self) -> SuccessHistogram:
+        import asyncio
+        return await asyncio.wrap_future(self._future)
+
+    def wait(self, timeout: Optional[float]=None) -> SuccessHistogram:
+        return self._future.result(timeout)
+
+    def _run(self, executor, max_in_flight: int):
+        """
+        Dispatcher thread: keep at most max_in_flight chunks queued on executor and merge their counts in completion order.
+        """
+        try:
+            chunks = iter(_chunks(self.num_trials, self.instance_template.seed))
+            in_flight = set()
+            while True:
+                while not self._cancel.is_set() and len(in_flight) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    size, chunk_seed = chunk
+                    in_flight.add(executor.submit(_count_trials, self.strategy, size, self.instance_template, self.shift, self.engine, chunk_seed))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    counts = future.result()
+                    with self._lock:
+                        self._histogram.update_counts(counts)
+                if self._cancel.is_set():
+                    for future in in_flight:
+                        future.cancel()
+                    break
+            if self._cancel.is_set():
+                self._future.cancel()
+            else:
+                self._future.set_result(self.histogram)
+        except BaseException as e:
+            self._future.set_exception(e)
+
+class SimulationService():
+    """
+    Non-blocking simulation service shared by many sessions (e.g. Streamlit sessions of one server process).
+    Jobs run on one worker pool, and requests with identical parameters share a job and its result.
+
+    Parameters
+    --------
+    max_workers: int, optional = None
+        Size of the process pool, os.cpu_count() if not given
+    executor: concurrent.futures.Executor, optional = None
+        Pool to run chunks on, a ProcessPoolExecutor with max_workers is created if not given
+    max_jobs: int, optional = 128
+        Number of finished jobs kept for reuse, least recently requested ones are dropped first
+
+    Methods
+    --------
+    submit_simulation(strategy, num_trials, instance_template, shift=0, engine="numpy") -> str
+        Start (or join) a job and return its job_id
+    job(job_id) -> SimulationJob
+        Return a submitted job
+    cancel(job_id) -> None
+        Leave a job, it is cancelled once no requester is left
+    shutdown() -> None
+        Cancel all jobs and stop the pool
+
+    Examples
+    --------
+    >>> service = SimulationService()
+    >>> job_id = service.submit_simulation("cycle_following", 1000000, Instance(100))
+    >>> histogram = await service.job(job_id).result()
+    """
+    def __init__(self, max_workers: Optional[int]=None, executor=None, max_jobs: int=128):
+        if executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.executor = executor
+        self.max_in_flight = 2 * (max_workers or getattr(executor, "_max_workers", None) or 1)
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str) -> str:
+        params = {**instance_template.get_template(), "strategy": strategy, "num_trials": num_trials, "shift": shift, "engine": engine}
+        return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+    def submit_simulation(self, strategy: str, num_trials: int, instance_template: Instance, shift: int=0, engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="auto") -> str:
+        _check_args(strategy, shift, engine, None)
+        engine = _resolve_engine(strategy, engine)
+        _check_engine(strategy, engine, instance_template, shift)
+        job_id = self.job_key(strategy, num_trials, instance_template, shift, engine)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.cancelled:
+                job = SimulationJob(job_id, strategy, num_trials, instance_template, shift, engine)
+                self._jobs[job_id] = job
+                threading.Thread(target=job._run, args=(self.executor, self.max_in_flight), daemon=True).start()
+            self._jobs.move_to_end(job_id)
+            job.subscribers += 1
+            self._prune()
+        return job_id
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.max_jobs, 0)]:
+            del self._jobs[job_id]
+
+    def job(self, job_id: str) -> SimulationJob:
+        with self._lock:
+            if job_id not in self._jobs:
+                raise KeyError(f"Unknown job: {job_id}")
+            return self._jobs[job_id]
+
+    def cancel(self, job_id: str):
+        job = self.job(job_id)
+        with self._lock:
+            job.subscribers = max(job.subscribers - 1, 0)
+            if job.subscribers == 0 and not job.done:
+                job._cancel.set()
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel.set()
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -1,25 +1,303 @@
 from prisoners_problem.problem_instance import Instance
-from prisoners_problem.cycle_following import cycle_following
-from prisoners_problem.benchmark import benchmark
-import matplotlib.pyplot as plt
+from prisoners_problem.strategies import get_strategy
+from prisoners_problem.histogram import SuccessHistogram
+from prisoners_problem.profiling import Profiler
+from prisoners_problem.confidence import confidence_interval, INTERVALS
 from typing import *
 
-def run_simulation(name: str, strategy: Literal["random", "cycle_following"], num_trials: int, instance_template: Instance, shift: int=0) -> tuple[Dict[str, int], List[int]]:
+# Number of trials per chunk for streaming and for workers. Chunks (not workers) own the seed streams,
+# so the result only depends on this value and the master seed, with or without workers.
+CHUNK_TRIALS = 1 << 14
+# Engines evaluating chunks of trials on permutation matrices, yielding one numpy array per chunk
+BATCH_ENGINES = ("numpy", "jit", "cycle_type")
+
+def _check_args(strategy: str, shift: int, engine: str, workers: Optional[int], profile: Union[bool, Profiler]=False):
+    if not isinstance(shift, int):
+        raise TypeError("shift should be int.")
+    get_strategy(strategy)
+    if engine not in ("python", "numpy", "jit", "cycle_type", "auto"):
+        raise ValueError(f"Unknown engine: {engine}")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError("workers should be a positive int or None.")
+    if profile is not False and profile is not None and workers is not None:
+        raise ValueError("profile is not supported together with workers.")
+
+def _check_corpus(corpus, num_trials: int, instance_template: Instance, cache=None):
+    if corpus is None:
+        return
+    if corpus.num_boxes != instance_template.num_boxes:
+        raise ValueError(f"corpus holds permutations of {corpus.num_boxes} boxes, the template has {instance_template.num_boxes}.")
+    if num_trials > len(corpus):
+        raise ValueError(f"num_trials ({num_trials}) exceeds the {len(corpus)} rows of corpus.")
+    if cache is not None:
+        raise ValueError("cache is not supported together with corpus.")
+
+def _check_engine(strategy: str, engine: str, instance_template: Instance, shift: int, corpus=None):
+    if engine != "cycle_type":
+        return
+    from prisoners_problem.cycle_type import is_cycle_type_supported
+    if not is_cycle_type_supported(strategy, instance_template, shift):
+        raise ValueError(f"Strategy {strategy} is not supported by cycle_type engine (it needs shift = 0 and num_boxes = num_prisoners).")
+    if corpus is not None:
+        raise ValueError("corpus is not supported by cycle_type engine.")
+
+def _check_ci(target_ci: Optional[float], confidence: float, ci_method: str, cache=None):
+    if target_ci is None:
+        return
+    if not target_ci > 0:
+        raise ValueError("target_ci should be positive.")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence should be between 0 and 1.")
+    if ci_method not in INTERVALS:
+        raise ValueError(f"Unknown interval method: {ci_method}")
+    if cache is not None:
+        raise ValueError("cache is not supported together with target_ci.")
+
+def _ci_reached(successes: int, trials: int, target_ci: Optional[float], confidence: float, ci_method: str) -> bool:
+    """
+    Return True if the confidence interval of the success rate is no wider than +- target_ci.
+    """
+    if target_ci is None or trials == 0:
+        return False
+    low, high = confidence_interval(successes, trials, confidence, ci_method)
+    return (high - low) / 2 <= target_ci
+
+def _resolve_engine(strategy: str, engine: str) -> str:
+    """
+    Resolve the "auto" engine: "jit" if strategy has a compiled implementation and numba is installed,
+    "numpy" if it has a batched implementation, "python" otherwise.
+    """
+    if engine == "auto":
+        spec = get_strategy(strategy)
+        if spec.jit is not None:
+            from importlib.util import find_spec
+            if find_spec("numba") is not None:
+                return "jit"
+        return "numpy" if spec.batch is not None else "python"
+    return engine
+
+def _make_profiler(profile: Union[bool, Profiler, None]) -> Optional[Profiler]:
+    if isinstance(profile, Profiler):
+        return profile
+    return Profiler() if profile else None
+
+def _instances(num_trials: int, instance_template: Instance, rng, corpus=None) -> Iterator:
+    """
+    Yield the instance of every trial, an instance of the template's class drawn from rng or built from the next corpus row.
+    """
+    if corpus is None:
+        # every trial draws from the one rng stream, so trials differ even if the template is seeded
+        template = instance_template.get_template()
+        for _ in range(num_trials):
+            yield type(instance_template).from_template(template, rng)
+        return
+    num_prisoners, num_boxes, open_counts, _, seed = instance_template.get_attrs()
+    # corpus rows are valid permutations (write_corpus draws them, import_corpus validates them), skip the per-row checks
+    for block in corpus[:num_trials].iter_chunks():
+        for boxes in block.tolist():
+            yield type(instance_template)._trusted(num_prisoners, num_boxes, open_counts, boxes, seed)
+
+def _iter_trials(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, rng=None, profiler: Optional[Profiler]=None, corpus=None) -> Iterator:
+    """
+    Yield the results of a block of trials in the current process, one int per trial ("python") or one numpy array per chunk (BATCH_ENGINES).
+    If corpus (PermutationCorpus) is given, trials replay its first num_trials rows.
+    """
+    if engine == "cycle_type":
+        from prisoners_problem.cycle_type import iter_cycle_type
+        yield from iter_cycle_type(strategy, num_trials, instance_template, shift, rng, profiler)
+        return
+    if engine in BATCH_ENGINES:
+        from prisoners_problem.batch import iter_batch
+        yield from iter_batch(strategy, num_trials, instance_template, shift, rng, profiler, corpus, jit=engine == "jit")
+        return
+    if rng is None:
+        rng = _python_rng(instance_template.seed)
+    if profiler is not None:
+        yield from _iter_trials_profiled(strategy, num_trials, instance_template, shift, rng, profiler, corpus)
+        return
+
+    func = get_strategy(strategy).func
+    for instance in _instances(num_trials, instance_template, rng, corpus):
+        yield func(instance, shift, rng)
+
+def _iter_trials_profiled(strategy: str, num_trials: int, instance_template: Instance, shift: int, rng, profiler: Profiler, corpus=None) -> Iterator[int]:
+    """
+    Instrumented copy of the "python" engine loop of _iter_trials, kept separate so that the plain loop carries no overhead.
+    """
+    spec = get_strategy(strategy)
+    num_boxes = instance_template.num_boxes
+    instances = _instances(num_trials, instance_template, rng, corpus)
+    for _ in range(num_trials):
+        with profiler.phase("instance"):
+            instance = next(instances)
+        profiler.count("instances_built")
+        if corpus is None:
+            profiler.count("rng_draws", num_boxes)
+        with profiler.phase("strategy"):
+            success = spec.func(instance, shift, rng)
+        if spec.accounting is not None:
+            with profiler.phase("accounting"):
+                spec.accounting(profiler, instance, shift)
+        profiler.advance()
+        yield success
+
+def _python_rng(seed: Union[int, str, None]):
+    """
+    Generator of the "python" engine, random.Random(seed), or freshly seeded from OS entropy if seed is None.
+    """
+    import random
+    return random.Random(seed)
+
+def _serial_chunks(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, profiler: Optional[Profiler]=None, corpus=None) -> Iterator[list]:
+    """
+    Run the seeded chunks of _chunks in the current process, in order. Every chunk draws from its own seed stream, the
+    same as with workers, so a seeded run gives the same trials with and without workers.
+    Yield the list of _iter_trials outputs of every chunk.
+    """
+    for i, (size, chunk_seed) in enumerate(_chunks(num_trials, instance_template.seed)):
+        begin = i * CHUNK_TRIALS
+        window = None if corpus is None else corpus[begin:begin + size]
+        yield list(_iter_trials(strategy, size, instance_template, shift, engine, _seeded_rng(engine, chunk_seed), profiler, window))
+
+def _seeded_rng(engine: str, chunk_seed: tuple[int, int]):
+    """
+    Return the generator of engine for the chunk seed (entropy, i) of _chunks: a numpy.random.Generator on
+    SeedSequence(entropy, spawn_key=(i,)), i.e. SeedSequence(entropy).spawn(...)[i], for the batched engines,
+    and random.Random seeded by the string "entropy:i" (hashed with SHA-512 by random) for the python engine,
+    which therefore never imports numpy.
+    """
+    entropy, i = chunk_seed
+    if engine in BATCH_ENGINES:
+        import numpy as np
+        return np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(i,)))
+    return _python_rng(f"{entropy}:{i}")
+
+def _run_trials(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, chunk_seed=None, profiler: Optional[Profiler]=None, corpus=None) -> List[int]:
+    """
+    Run a block of trials in the current process and return the success_record.
+    If chunk_seed (see _chunks) is given, the block draws its randomness from it.
+    If corpus (PermutationCorpus) is given, the block replays its first num_trials rows.
+    """
+    rng = None if chunk_seed is None else _seeded_rng(engine, chunk_seed)
+    success_record = []
+    for success in _iter_trials(strategy, num_trials, instance_template, shift, engine, rng, profiler, corpus):
+        if engine in BATCH_ENGINES:
+            success_record.extend(success.tolist())
+        else:
+            success_record.append(success)
+
+    return success_record
+
+def _count_trials(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, chunk_seed=None, corpus=None) -> List[int]:
+    """
+    Same as _run_trials, but return the bincount of successful prisoners instead of the success_record.
+    """
+    rng = None if chunk_seed is None else _seeded_rng(engine, chunk_seed)
+    histogram = SuccessHistogram(instance_template.num_prisoners)
+    for success in _iter_trials(strategy, num_trials, instance_template, shift, engine, rng, corpus=corpus):
+        if engine in BATCH_ENGINES:
+            histogram.update(success)
+        else:
+            histogram.add(success)
+
+    return histogram.counts
+
+def _chunks(num_trials: int, seed: Optional[int], chunk_ids: Optional[Sequence[int]]=None) -> Iterator[tuple]:
+    """
+    Split num_trials into CHUNK_TRIALS-sized chunks, each paired with its own seed (entropy, i), see _seeded_rng.
+    entropy is the template seed, or 128 random bits if it is None. Every seeded run, serial, with workers, sharded or
+    on the service, draws its trials from these seeds. If chunk_ids is given, only these chunks are yielded.
+    """
+    import secrets
+
+    chunk_ids = range(-(-num_trials // CHUNK_TRIALS)) if chunk_ids is None else chunk_ids
+    entropy = secrets.randbits(128) if seed is None else seed
+    for i in chunk_ids:
+        yield min(CHUNK_TRIALS, num_trials - i * CHUNK_TRIALS), (entropy, i)
+
+def _run_parallel(task: Callable, strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, workers: int, corpus=None,
+                  chunk_ids: Optional[Sequence[int]]=None) -> Iterator:
+    """
+    Run task (_run_trials or _count_trials) over seeded chunks, on a process pool if workers > 1. Yield chunk results in chunk order.
+    With a corpus, every chunk replays its own window of rows (workers reopen the file, no rows are pickled).
+    If chunk_ids is given, only these chunks (indices into _chunks) are run, e.g. one shard of a checkpointed run.
+    """
+    chunk_ids = range(-(-num_trials // CHUNK_TRIALS)) if chunk_ids is None else chunk_ids
+    chunks = list(_chunks(num_trials, instance_template.seed, chunk_ids))
+    begins = [i * CHUNK_TRIALS for i in chunk_ids]
+    windows = [None if corpus is None else corpus[begin:begin + size] for begin, (size, _) in zip(begins, chunks)]
+    if workers == 1:
+        for (size, chunk_seed), window in zip(chunks, windows):
+            yield task(strategy, size, instance_template, shift, engine, chunk_seed, corpus=window)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(task, strategy, size, instance_template, shift, engine, chunk_seed, corpus=window) for (size, chunk_seed), window in zip(chunks, windows)]
+        try:
+            for future in futures:
+                yield future.result()
+        finally: # the consumer may stop early (target_ci), drop the chunks not started yet
+            for future in futures:
+                future.cancel()
+
+def _simu_info(name: str, strategy: str, num_trials: int, instance_template: Instance, shift: int, corpus=None) -> Dict[str, Any]:
+    simu_info = instance_template.get_template()
+    simu_info.update({"name": name, "strategy": strategy, "num_trials": num_trials, "shift": shift})
+    if corpus is not None:
+        simu_info["corpus"] = {"path": corpus.path, "start": corpus.start, "seed": corpus.seed}
+    return simu_info
+
+def _add_ci(simu_info: Dict[str, Any], successes: int, trials: int, target_ci: float, confidence: float, ci_method: str):
+    """
+    Record the trials actually run and the reached interval of an adaptive run in simu_info.
+    """
+    low, high = confidence_interval(successes, trials, confidence, ci_method)
+    simu_info["num_trials"] = trials
+    simu_info["ci"] = {"low": low, "high": high, "confidence": confidence, "method": ci_method, "target": target_ci}
+
+def run_simulation(name: str, strategy: str, num_trials: int, instance_template: Instance, shift: int=0, engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="python", workers: Optional[int]=None, profile: Union[bool, Profiler]=False, corpus=None, target_ci: Optional[float]=None, confidence: float=0.95, ci_method: Literal["wilson", "clopper_pearson"]="wilson") -> tuple[Dict[str, int], List[int]]:
     """
     Run stimulation for prisoners problem. Return simulation information and a list of number of successful prisoners in each trial.
-    
+
     Parameters
     --------
     name: str
         Name of simulation
-    strategy: str, either "random" or "cycle_following"
-        Used strategy
+    strategy: str
+        Name of a registered strategy, see strategies.available_strategies()
     num_trials: int
         Number of trials to execute
-    instance_template: Instance
-        Template for simulation
+    instance_template: Instance | CompactInstance
+        Template for simulation. Its seed is the master seed of the run: every chunk of CHUNK_TRIALS trials draws from its
+        own substream of it, with or without workers, so a seeded run is reproducible and its trials are still independent.
     shift: int, optional = 0
         Used if strategy = "cycle_following"
+    engine: str, "python", "numpy", "jit" or "auto", optional = "python"
+        "python" builds an instance of the template's class per trial, "numpy" evaluates trials in batched chunks with the
+        strategy's batched implementation, "jit" draws the same chunks but evaluates them with the strategy's compiled
+        (numba) implementation, which gives the same results (without numba, or without a compiled implementation, it uses
+        the batched one). "cycle_type" skips the permutations and draws the cycle lengths of every trial directly
+        (O(log num_boxes) per trial, see prisoners_problem.cycle_type), for strategies registered with cycle_type, shift = 0 and
+        num_boxes = num_prisoners, without corpus. "auto" picks "jit" if the strategy has one and numba is installed, then "numpy",
+        then "python"
+    workers: int, optional = None
+        Number of worker processes, the chunks run in the current process if not given. Chunks own their seed streams,
+        so a seeded run returns the same success_record for any number of workers, or none.
+    profile: bool | Profiler, optional = False
+        If True (or a Profiler, e.g. with a progress callback), record per-phase wall time and counters,
+        and add the report to simu_info["profile"]. Not supported together with workers.
+    corpus: PermutationCorpus, optional = None
+        Replay the first num_trials rows of a permutation corpus instead of drawing boxes, so that strategies can be compared
+        on the same trials. Rows are streamed chunk by chunk from the memory-mapped file. The corpus is recorded in simu_info["corpus"].
+    target_ci: float, optional = None
+        Adaptive precision: run chunks of CHUNK_TRIALS trials and stop as soon as the confidence interval of the success rate
+        is within +- target_ci, num_trials is then the maximum. The trials run and the interval reached are recorded in
+        simu_info["num_trials"] and simu_info["ci"].
+    confidence: float, optional = 0.95
+        Confidence level of the interval
+    ci_method: str, either "wilson" or "clopper_pearson", optional = "wilson"
+        Interval used for target_ci
 
     Returns
     --------
@@ -27,21 +305,253 @@ def run_simulation(name: str, strategy: Literal["random", "cycle_following"], nu
         Simulation information, including all parameters
     success_record: List[int]
         List contains number of successful prisoners in each trial
+
+    See Also
+    --------
+    iter_simulation, run_simulation_histogram
     """
-    if not isinstance(shift, int):
-        raise TypeError("shift should be int.")
+    _check_args(strategy, shift, engine, workers, profile)
+    engine = _resolve_engine(strategy, engine)
+    _check_engine(strategy, engine, instance_template, shift, corpus)
+    _check_corpus(corpus, num_trials, instance_template)
+    _check_ci(target_ci, confidence, ci_method)
+    profiler = _make_profiler(profile)
+    if profiler is not None:
+        profiler.start(num_trials)
+    num_prisoners = instance_template.num_prisoners
+    successes = 0
     success_record = []
-    for _ in range(num_trials):
-        instance = Instance.from_template(instance_template.get_template())
-        if strategy == "cycle_following":
-            success = cycle_following(instance, shift)[1]
-        elif strategy == "random":
-            success = benchmark(instance)[1]
+    if workers is None:
+        records = ([x for s in outputs for x in s.tolist()] if engine in BATCH_ENGINES else outputs
+                   for outputs in _serial_chunks(strategy, num_trials, instance_template, shift, engine, profiler, corpus))
+    else:
+        records = _run_parallel(_run_trials, strategy, num_trials, instance_template, shift, engine, workers, corpus)
+    for record in records:
+        success_record.extend(record)
+        successes += record.count(num_prisoners)
+        if _ci_reached(successes, len(success_record), target_ci, confidence, ci_method):
+            records.close()
+            break
+
+    simu_info = _simu_info(name, strategy, num_trials, instance_template, shift, corpus)
+    if target_ci is not None:
+        _add_ci(simu_info, successes, len(success_record), target_ci, confidence, ci_method)
+    if profiler is not None:
+        profiler.stop()
+        simu_info["profile"] = profiler.report()
+    return simu_info, success_record
+
+def iter_simulation(strategy: str, num_trials: int, instance_template: Instance, shift: int=0, engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="python", workers: Optional[int]=None, profiler: Optional[Profiler]=None, corpus=None, target_ci: Optional[float]=None, confidence: float=0.95, ci_method: Literal["wilson", "clopper_pearson"]="wilson") -> Iterator[SuccessHistogram]:
+    """
+    Streaming version of run_simulation. Trials run in chunks of CHUNK_TRIALS and only a SuccessHistogram is kept,
+    so memory stays flat no matter how many trials run. Yield the (same, updated) histogram after each chunk finishes.
+
+    Parameters
+    --------
+    strategy: str
+        Name of a registered strategy, see strategies.available_strategies()
+    num_trials: int
+        Number of trials to execute
+    instance_template: Instance
+        Template for simulation
+    shift: int, optional = 0
+        Used if strategy = "cycle_following"
+    engine: str, either "python", "numpy", "jit", "cycle_type" or "auto", optional = "python"
+        Simulation engine, see run_simulation
+    workers: int, optional = None
+        Number of worker processes, see run_simulation
+    profiler: Profiler, optional = None
+        Instrumentation, started before the first chunk and stopped after the last one
+    corpus: PermutationCorpus, optional = None
+        Permutation corpus to replay, see run_simulation
+    target_ci, confidence, ci_method: optional
+        Stop after the first chunk whose interval is within +- target_ci, see run_simulation
+
+    Yields
+    --------
+    SuccessHistogram
+        Histogram of all trials finished so far
+
+    Examples
+    --------
+    >>> for histogram in iter_simulation("cycle_following", 100000, Instance(100), engine="numpy"):
+    ...     print(histogram.num_trials, histogram.success_rate)
+    """
+    _check_args(strategy, shift, engine, workers, profiler)
+    engine = _resolve_engine(strategy, engine)
+    _check_engine(strategy, engine, instance_template, shift, corpus)
+    _check_corpus(corpus, num_trials, instance_template)
+    _check_ci(target_ci, confidence, ci_method)
+    return _iter_simulation(strategy, num_trials, instance_template, shift, engine, workers, profiler, corpus, target_ci, confidence, ci_method)
+
+def _iter_simulation(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str, workers: Optional[int], profiler: Optional[Profiler], corpus=None,
+                     target_ci: Optional[float]=None, confidence: float=0.95, ci_method: str="wilson") -> Iterator[SuccessHistogram]:
+    histogram = SuccessHistogram(instance_template.num_prisoners)
+    if profiler is not None:
+        profiler.start(num_trials)
+    if workers is None:
+        chunks = _serial_chunks(strategy, num_trials, instance_template, shift, engine, profiler, corpus)
+    else:
+        chunks = _run_parallel(_count_trials, strategy, num_trials, instance_template, shift, engine, workers, corpus)
+    for chunk in chunks:
+        if workers is not None:
+            histogram.update_counts(chunk)
+        elif engine in BATCH_ENGINES:
+            for success in chunk:
+                histogram.update(success)
         else:
-            raise ValueError(f"Unknown strategy: {strategy}")
-        success_record.append(success)
-    
-    simu_info = instance_template.get_template()
-    simu_info.update({"name": name, "strategy": strategy, "num_trials": num_trials, "shift": shift})
-    
-    return simu_info, success_record
\ No newline at end of file
+            histogram.update(chunk)
+        yield histogram
+        if _ci_reached(histogram.success_counts, histogram.num_trials, target_ci, confidence, ci_method):
+            chunks.close()
+            break
+    if profiler is not None:
+        profiler.stop()
+
+def run_simulation_histogram(name: str, strategy: str, num_trials: int, instance_template: Instance, shift: int=0, engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="python", workers: Optional[int]=None, cache=None, profile: Union[bool, Profiler]=False, corpus=None, target_ci: Optional[float]=None, confidence: float=0.95, ci_method: Literal["wilson", "clopper_pearson"]="wilson") -> tuple[Dict[str, int], SuccessHistogram]:
+    """
+    Same as run_simulation, but return a SuccessHistogram instead of a list with one entry per trial.
+    Draws the same trials as run_simulation with the same arguments.
+
+    Parameters
+    --------
+    cache: ResultCache, optional = None
+        Persistent result cache. Seeded runs are returned from the cache when the same run was stored before.
+        Unseeded runs reuse the stored histogram of the same parameters: only missing trials are simulated and added to it,
+        and if it already holds more trials, num_trials of them are drawn without replacement. Not supported together with corpus or target_ci.
+    Others are the same as run_simulation.
+
+    Returns
+    --------
+    simu_info: Dict[str, Any]
+        Simulation information, including all parameters
+    histogram: SuccessHistogram
+        Bincount of number of successful prisoners over all trials
+    """
+    _check_args(strategy, shift, engine, workers, profile)
+    engine = _resolve_engine(strategy, engine)
+    _check_engine(strategy, engine, instance_template, shift, corpus)
+    _check_corpus(corpus, num_trials, instance_template, cache)
+    _check_ci(target_ci, confidence, ci_method, cache)
+    profiler = _make_profiler(profile)
+    simu_info = _simu_info(name, strategy, num_trials, instance_template, shift, corpus)
+    cached = None if cache is None else cache.load(simu_info, engine)
+    if cached is not None and cached.num_trials >= num_trials:
+        if cached.num_trials == num_trials or instance_template.seed is not None:
+            return simu_info, cached
+        import numpy as np
+        counts = np.random.default_rng().multivariate_hypergeometric(cached.counts, num_trials)
+        return simu_info, SuccessHistogram(instance_template.num_prisoners, counts.tolist())
+
+    histogram = SuccessHistogram(instance_template.num_prisoners)
+    remaining = num_trials - (0 if cached is None else cached.num_trials)
+    for histogram in iter_simulation(strategy, remaining, instance_template, shift, engine, workers, profiler, corpus, target_ci, confidence, ci_method):
+        pass
+    if target_ci is not None:
+        _add_ci(simu_info, histogram.success_counts, histogram.num_trials, target_ci, confidence, ci_method)
+    if profiler is not None:
+        simu_info["profile"] = profiler.report()
+    if cached is not None:
+        histogram.merge(cached)
+    if cache is not None:
+        cache.store(simu_info, engine, histogram)
+
+    return simu_info, histogram
+
+def _iter_all_succeed(strategy: str, num_trials: int, instance_template: Instance, shift: int, engine: str) -> Iterator[tuple[int, int]]:
+    """
+    Yield (trials, trials where all prisoners succeed) per seeded chunk of _chunks.
+    The "python" engine uses the early-stopping all_succeed of the strategy when it has one.
+    """
+    num_prisoners = instance_template.num_prisoners
+    spec = get_strategy(strategy)
+    for size, chunk_seed in _chunks(num_trials, instance_template.seed):
+        rng = _seeded_rng(engine, chunk_seed)
+        if engine in BATCH_ENGINES:
+            yield size, sum(int((success == num_prisoners).sum()) for success in _iter_trials(strategy, size, instance_template, shift, engine, rng))
+        elif spec.all_succeed is not None:
+            yield size, sum(spec.all_succeed(instance, shift, rng) for instance in _instances(size, instance_template, rng))
+        else:
+            yield size, sum(spec.func(instance, shift, rng) == num_prisoners for instance in _instances(size, instance_template, rng))
+
+def estimate_success_rate(strategy: str, instance_template: Instance, shift: int=0, target_ci: float=0.001, max_trials: int=10000000,
+                          engine: Literal["python", "numpy", "jit", "cycle_type", "auto"]="auto", confidence: float=0.95,
+                          ci_method: Literal["wilson", "clopper_pearson"]="wilson",
+                          estimator: Literal["plain", "conditional", "control_variate"]="plain") -> Dict[str, Any]:
+    """
+    Estimate the probability that all prisoners succeed to a requested precision.
+    Trials run in chunks of CHUNK_TRIALS until the confidence interval is within +- target_ci or max_trials is reached.
+    Only the all-succeed indicator is computed, so strategies with all_succeed stop walking at the first failing prisoner.
+    Variance-reduced estimators reach the same precision with fewer trials, see prisoners_problem.estimators.
+
+    Parameters
+    --------
+    strategy: str
+        Name of a registered strategy
+    instance_template: Instance
+        Template for simulation
+    shift: int, optional = 0
+        Shift value, passed to the strategy
+    target_ci: float, optional = 0.001
+        Half-width of the confidence interval to reach, None to run max_trials
+    max_trials: int, optional = 10000000
+        Maximum number of trials
+    engine: str, either "python", "numpy", "jit", "cycle_type" or "auto", optional = "auto"
+        Simulation engine, see run_simulation
+    confidence: float, optional = 0.95
+        Confidence level of the interval
+    ci_method: str, either "wilson" or "clopper_pearson", optional = "wilson"
+        Interval method of the "plain" estimator, see prisoners_problem.confidence
+    estimator: str, either "plain", "conditional" or "control_variate", optional = "plain"
+        "plain" counts trials where all prisoners succeed. "conditional" averages the strategy's success probability given
+        the boxes (e.g. random). "control_variate" corrects the count with the exact shift = 0 cycle following probability
+        of the same permutations (shifted or num_boxes > num_prisoners cycle following). Both need the "numpy" or "jit"
+        engine and use normal intervals.
+
+    Returns
+    --------
+    Dict[str, Any]
+        estimator, success_rate, std_error, ess_gain (variance of "plain" over the variance of the estimator),
+        ci_low, ci_high, num_trials, and successes ("plain" only)
+
+    Examples
+    --------
+    >>> estimate = estimate_success_rate("cycle_following", Instance(100, seed=0), target_ci=0.01)
+    >>> estimate["ci_high"] - estimate["ci_low"] <= 0.02
+    True
+    """
+    _check_args(strategy, shift, engine, None)
+    engine = _resolve_engine(strategy, engine)
+    _check_engine(strategy, engine, instance_template, shift)
+    _check_ci(target_ci, confidence, ci_method)
+    if estimator != "plain":
+        return _estimate_variance_reduced(strategy, instance_template, shift, target_ci, max_trials, engine, confidence, estimator)
+    trials = successes = 0
+    chunks = _iter_all_succeed(strategy, max_trials, instance_template, shift, engine)
+    for size, count in chunks:
+        trials += size
+        successes += count
+        if _ci_reached(successes, trials, target_ci, confidence, ci_method):
+            chunks.close()
+            break
+    low, high = confidence_interval(successes, trials, confidence, ci_method)
+    rate = successes / trials if trials else 0.0
+    std_error = (rate * (1 - rate) / trials) ** 0.5 if trials else float("inf")
+    return {"estimator": "plain", "success_rate": rate, "std_error": std_error, "ess_gain": 1.0,
+            "ci_low": low, "ci_high": high, "num_trials": trials, "successes": successes}
+
+def _estimate_variance_reduced(strategy: str, instance_template: Instance, shift: int, target_ci: Optional[float], max_trials: int, engine: str,
+                               confidence: float, estimator: str) -> Dict[str, Any]:
+    from statistics import NormalDist
+    from prisoners_problem.estimators import Moments, check_estimator, control_mean, estimator_chunk
+
+    check_estimator(strategy, estimator, engine)
+    moments = Moments(estimator, control_mean(instance_template) if estimator == "control_variate" else 0.0)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    for size, chunk_seed in _chunks(max_trials, instance_template.seed):
+        moments.update(*estimator_chunk(strategy, size, instance_template, shift, estimator, _seeded_rng(engine, chunk_seed), jit=engine == "jit"))
+        if target_ci is not None and z * moments.std_error <= target_ci:
+            break
+    rate, std_error = moments.estimate, moments.std_error
+    return {"estimator": estimator, "success_rate": rate, "std_error": std_error, "ess_gain": moments.ess_gain,
+            "ci_low": max(rate - z * std_error, 0.0), "ci_high": min(rate + z * std_error, 1.0), "num_trials": moments.num_trials}
@@ -0,0 +1,151 @@
+from prisoners_problem.cycle_following import cycle_following, cycle_decomposition
+from prisoners_problem.benchmark import benchmark
+from dataclasses import dataclass
+from typing import *
+
+@dataclass
+class Strategy():
+    """
+    A registered strategy, see register_strategy.
+
+    Attributes
+    --------
+    name: str
+        Registry key, used by the CLI and the simulation functions
+    func: Callable[[instance, shift, rng], int]
+        Per-instance implementation, return the number of successful prisoners
+    batch: Callable[[perms, num_prisoners, open_counts, shift, rng], numpy.ndarray], optional = None
+        Batched implementation on a (trials, num_boxes) permutation matrix, return the number of successful prisoners per row
+    permutations: bool, optional = True
+        False if the result does not depend on the boxes. The batched path then skips drawing permutations
+        and passes a read-only identity matrix of the right shape.
+    uses_shift: bool, optional = False
+        True if shift changes the strategy
+    accounting: Callable[[profiler, instance, shift], None], optional = None
+        Update the profiler counters (boxes_opened, ...) of one trial of the per-instance path
+    description: str, optional = ""
+        One line description shown by front ends
+    all_succeed: Callable[[instance, shift, rng], bool], optional = None
+        Faster per-instance test of whether all prisoners succeed, e.g. stopping at the first failure.
+        Used when only the success rate is needed, func(...) == num_prisoners otherwise.
+    jit: Callable[[perms, num_prisoners, open_counts, shift, rng], numpy.ndarray], optional = None
+        Compiled (e.g. numba) implementation with the same signature and results as batch, used by the "jit" engine
+    cycle_type: Callable[[lengths, num_prisoners, open_counts, rng], numpy.ndarray], optional = None
+        Implementation from a zero-padded (trials, max_cycles) matrix of cycle lengths, for strategies that only depend on
+        the cycle type when shift = 0 and num_boxes = num_prisoners. Used by the "cycle_type" engine.
+    conditional: Callable[[perms, num_prisoners, open_counts, shift], numpy.ndarray], optional = None
+        Probability that all prisoners succeed given the boxes of every row, averaged over the strategy's own randomness.
+        Used by the "conditional" estimator, see prisoners_problem.estimators.
+    """
+    name: str
+    func: Callable
+    batch: Optional[Callable] = None
+    permutations: bool = True
+    uses_shift: bool = False
+    accounting: Optional[Callable] = None
+    description: str = ""
+    all_succeed: Optional[Callable] = None
+    jit: Optional[Callable] = None
+    cycle_type: Optional[Callable] = None
+    conditional: Optional[Callable] = None
+
+_REGISTRY: Dict[str, Strategy] = {}
+
+def register_strategy(name: str, func: Optional[Callable]=None, batch: Optional[Callable]=None, permutations: bool=True, uses_shift: bool=False,
+                      accounting: Optional[Callable]=None, description: str="", all_succeed: Optional[Callable]=None, jit: Optional[Callable]=None, cycle_type: Optional[Callable]=None,
+                      conditional: Optional[Callable]=None, replace: bool=False):
+    """
+    Register a strategy under name. Can be used as a decorator of the per-instance function.
+    The "numpy" (and "auto") engine uses batch when given, the "jit" engine uses jit and falls back to batch,
+    the "cycle_type" engine uses cycle_type, the "python" engine always uses func.
+    Strategies registered at runtime reach worker processes only when workers are forked, define them in an imported module otherwise.
+
+    Parameters
+    --------
+    name: str
+        Registry key
+    func: Callable[[instance, shift, rng], int]
+        Per-instance implementation, return the number of successful prisoners. rng is the random.Random of the trial stream.
+    batch: Callable[[perms, num_prisoners, open_counts, shift, rng], numpy.ndarray], optional = None
+        Batched implementation, rng is a numpy.random.Generator
+    replace: bool, optional = False
+        Allow replacing an existing strategy
+    Others are the same as the attributes of Strategy.
+
+    Examples
+    --------
+    >>> @register_strategy("first_half", description="open the first open_counts boxes")
+    ... def first_half(instance, shift=0, rng=None):
+    ...     return sum(i in instance.boxes[:instance.open_counts] for i in range(instance.num_prisoners))
+    """
+    if func is None:
+        def decorator(f):
+            register_strategy(name, f, batch, permutations, uses_shift, accounting, description, all_succeed, jit, cycle_type, conditional, replace)
+            return f
+        return decorator
+    if name in _REGISTRY and not replace:
+        raise ValueError(f"Strategy {name} is already registered.")
+    strategy = Strategy(name, func, batch, permutations, uses_shift, accounting, description, all_succeed, jit, cycle_type, conditional)
+    _REGISTRY[name] = strategy
+    return strategy
+
+def unregister_strategy(name: str):
+    get_strategy(name)
+    del _REGISTRY[name]
+
+def get_strategy(name: str) -> Strategy:
+    if name not in _REGISTRY:
+        raise ValueError(f"Unknown strategy: {name}")
+    return _REGISTRY[name]
+
+def available_strategies() -> List[str]:
+    return list(_REGISTRY)
+
+def _cycle_following(instance, shift: int=0, rng=None) -> int:
+    return cycle_following(instance, shift)[1]
+
+def _cycle_following_all(instance, shift: int=0, rng=None) -> bool:
+    return cycle_following(instance, shift, early_stop=True)[0]
+
+def _cycle_following_batch(perms, num_prisoners: int, open_counts: int, shift: int=0, rng=None):
+    from prisoners_problem.batch import cycle_following_batch
+    return cycle_following_batch(perms, num_prisoners, open_counts, shift)
+
+def _cycle_following_jit(perms, num_prisoners: int, open_counts: int, shift: int=0, rng=None):
+    from prisoners_problem.jit import cycle_following_jit
+    return cycle_following_jit(perms, num_prisoners, open_counts, shift)
+
+def _cycle_following_cycle_type(lengths, num_prisoners: int, open_counts: int, rng=None):
+    from prisoners_problem.cycle_type import cycle_following_cycle_type
+    return cycle_following_cycle_type(lengths, open_counts)
+
+def _cycle_following_accounting(profiler, instance, shift: int=0):
+    # prisoner i opens min(cycle length, open_counts) boxes
+    num_prisoners, open_counts = instance.num_prisoners, instance.open_counts
+    cycle_ids, cycle_lengths = cycle_decomposition(instance.boxes, shift)
+    profiler.count("cycles_walked", len(set(cycle_ids[:num_prisoners])))
+    profiler.count("boxes_opened", sum(min(cycle_lengths[cycle_ids[i]], open_counts) for i in range(num_prisoners)))
+
+def _random(instance, shift: int=0, rng=None) -> int:
+    return benchmark(instance, rng=rng)[1]
+
+def _random_batch(perms, num_prisoners: int, open_counts: int, shift: int=0, rng=None):
+    from prisoners_problem.batch import benchmark_batch
+    return benchmark_batch(perms.shape[0], num_prisoners, perms.shape[1], open_counts, rng)
+
+def _random_conditional(perms, num_prisoners: int, open_counts: int, shift: int=0):
+    # whatever the boxes, every prisoner independently opens the own card's box with probability open_counts / num_boxes
+    import numpy as np
+    num_boxes = perms.shape[1]
+    p = min(max(open_counts, 0), num_boxes) / num_boxes if num_boxes > 0 else 0.0
+    return np.full(perms.shape[0], p ** num_prisoners)
+
+def _random_accounting(profiler, instance, shift: int=0):
+    profiler.count("boxes_opened", instance.num_prisoners * instance.open_counts)
+    profiler.count("rng_draws", instance.num_prisoners * (instance.open_counts + 1))
+
+register_strategy("cycle_following", _cycle_following, _cycle_following_batch, uses_shift=True, accounting=_cycle_following_accounting,
+                  description="follow the cycle from the own box (shifted by shift)", all_succeed=_cycle_following_all, jit=_cycle_following_jit,
+                  cycle_type=_cycle_following_cycle_type)
+register_strategy("random", _random, _random_batch, permutations=False, accounting=_random_accounting,
+                  description="open open_counts boxes uniformly at random", conditional=_random_conditional)
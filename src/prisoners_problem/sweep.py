@@ -0,0 +1,285 @@
+import argparse
+import csv
+import json
+import os
+from prisoners_problem.batch import CHUNK_ELEMENTS, random_permutations, cycle_lengths_batch, benchmark_batch
+from prisoners_problem.histogram import SuccessHistogram
+from typing import *
+
+GRID_KEYS = ("strategy", "num_prisoners", "num_boxes", "box_ratio", "open_counts", "shift")
+FIELDS = ("strategy", "num_prisoners", "num_boxes", "open_counts", "shift", "num_trials", "seed",
+          "success_counts", "success_rate", "mean_successes")
+
+def parse_values(text: str) -> List[int]:
+    """
+    Parse a CLI grid axis, either "start:stop[:step]" (stop exclusive, as range) or a comma separated list.
+
+    Examples
+    --------
+    >>> parse_values("10:60:10")
+    [10, 20, 30, 40, 50]
+    >>> parse_values("1,2,5")
+    [1, 2, 5]
+    """
+    if ":" in text:
+        return list(range(*(int(x) for x in text.split(":"))))
+    return [int(x) for x in text.split(",")]
+
+def parse_ratios(text: str) -> List[float]:
+    """
+    Parse a comma separated list of box ratios.
+
+    Example
+    --------
+    >>> parse_ratios("1.5,2")
+    [1.5, 2.0]
+    """
+    return [float(x) for x in text.split(",")]
+
+def load_spec(path: str) -> Dict[str, Any]:
+    """
+    Load a sweep spec from a JSON or TOML file. Grid axes are lists (or "start:stop:step" strings),
+    num_trials, seed and workers are optional scalars.
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ModuleNotFoundError: # Python < 3.11
+            import tomli as tomllib
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path) as f:
+            spec = json.load(f)
+    for key in GRID_KEYS:
+        if isinstance(spec.get(key), str):
+            if key == "strategy":
+                spec[key] = spec[key].split(",")
+            else:
+                spec[key] = parse_ratios(spec[key]) if key == "box_ratio" else parse_values(spec[key])
+        elif key in spec and not isinstance(spec[key], list):
+            spec[key] = [spec[key]]
+    return spec
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict[str, Any]]:
+    """
+    Expand grid axes into sweep cells. num_boxes may be given directly or as box_ratio (num_boxes = round(ratio * num_prisoners)).
+    Cells with num_boxes < num_prisoners, or random picking with open_counts outside [0, num_boxes], are dropped.
+    The random strategy does not depend on shift, so it is only evaluated at shift = 0.
+
+    Returns
+    --------
+    List[Dict[str, Any]]
+        Cells with keys strategy, num_prisoners, num_boxes, open_counts and shift.
+    """
+    cells = []
+    for strategy in grid.get("strategy", ["cycle_following"]):
+        if strategy not in ("cycle_following", "random"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+        for num_prisoners in grid.get("num_prisoners", [100]):
+            if "box_ratio" in grid:
+                boxes = [round(ratio * num_prisoners) for ratio in grid["box_ratio"]]
+            else:
+                boxes = grid.get("num_boxes", [num_prisoners])
+            for num_boxes in boxes:
+                if num_boxes < num_prisoners:
+                    continue
+                for open_counts in grid.get("open_counts", [num_prisoners // 2]):
+                    shifts = grid.get("shift", [0]) if strategy == "cycle_following" else [0]
+                    if strategy == "random" and not 0 <= open_counts <= num_boxes:
+                        continue
+                    for shift in shifts:
+                        cell = {"strategy": strategy, "num_prisoners": num_prisoners, "num_boxes": num_boxes,
+                                "open_counts": open_counts, "shift": shift}
+                        if cell not in cells:
+                            cells.append(cell)
+    return cells
+
+def _evaluate_chunk(num_boxes: int, cells: List[Dict[str, Any]], num_trials: int, seed_seq) -> List[List[int]]:
+    """
+    Evaluate all cells sharing num_boxes on the same num_trials permutations. Return the bincount of every cell.
+    The permutations of a chunk are decomposed once per shift, then every (num_prisoners, open_counts) threshold is read off
+    the per-trial cumulative count of prisoners by cycle length. Cells are correlated but each one is a valid Monte Carlo estimate.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed_seq)
+    counts = [None] * len(cells)
+    following = [i for i, cell in enumerate(cells) if cell["strategy"] == "cycle_following"]
+    if following:
+        perms = random_permutations(rng, num_trials, num_boxes)
+        rows = np.arange(num_trials)[:, None] * (num_boxes + 1)
+        for shift in sorted({cells[i]["shift"] for i in following}):
+            lengths = cycle_lengths_batch(perms, shift)
+            group = [i for i in following if cells[i]["shift"] == shift]
+            for num_prisoners in sorted({cells[i]["num_prisoners"] for i in group}):
+                # short[t][k] = number of prisoners of trial t whose cycle is no longer than k
+                flat = (rows + lengths[:, :num_prisoners]).ravel()
+                short = np.bincount(flat, minlength=num_trials * (num_boxes + 1)).reshape(num_trials, num_boxes + 1).cumsum(axis=1)
+                for i in group:
+                    if cells[i]["num_prisoners"] == num_prisoners:
+                        success = short[:, min(max(cells[i]["open_counts"], 0), num_boxes)]
+                        counts[i] = np.bincount(success, minlength=num_prisoners + 1).tolist()
+    for i, cell in enumerate(cells):
+        if cell["strategy"] == "random":
+            success = benchmark_batch(num_trials, cell["num_prisoners"], num_boxes, cell["open_counts"], rng)
+            counts[i] = np.bincount(success, minlength=cell["num_prisoners"] + 1).tolist()
+    return counts
+
+def _figure_item(row: Dict[str, Any], histogram: SuccessHistogram, figure_dir: str, figure_format: str) -> tuple:
+    """
+    Return the (simu_info, histogram, path) of a sweep cell for export_figures.
+    """
+    label = f"{row['strategy']}_p{row['num_prisoners']}_b{row['num_boxes']}_o{row['open_counts']}_s{row['shift']}"
+    name = f"{row['strategy'].upper().replace('_', ' ')} (#p={row['num_prisoners']}, #b={row['num_boxes']}, max_open={row['open_counts']}, shift={row['shift']}, trials={row['num_trials']})"
+    return {**row, "name": name}, histogram, os.path.join(figure_dir, f"{label}.{figure_format}")
+
+class _Writer():
+    """
+    Stream result rows into a CSV file, or collect them for a Parquet file written on close.
+    """
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.rows = []
+        self.file = None
+        if path is not None and not path.endswith(".parquet"):
+            self.file = open(path, "w", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            self.writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]):
+        if self.file is not None:
+            self.writer.writerows(rows)
+            self.file.flush()
+        else:
+            self.rows.extend(rows)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+        elif self.path is not None:
+            import pyarrow
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(pyarrow.Table.from_pylist(self.rows), self.path)
+
+def run_sweep(grid: Dict[str, List], num_trials: int, seed: Optional[int]=None, workers: Optional[int]=None, output: Optional[str]=None, figure_dir: Optional[str]=None, figure_format: str="png") -> List[Dict[str, Any]]:
+    """
+    Run every cell of a parameter grid through one worker pool and return one result row per cell.
+
+    Cells are grouped by num_boxes. Each group is split into chunks with independent seed streams spawned from seed,
+    and every chunk draws one permutation matrix shared by all open_counts, shift and num_prisoners values of the group.
+    Rows of a group are streamed to output (.csv, or .parquet with pyarrow) as soon as all its chunks finished.
+
+    Parameters
+    --------
+    grid: Dict[str, List]
+        Grid axes, see expand_grid
+    num_trials: int
+        Number of trials per cell
+    seed: int, optional = None
+        Master random seed
+    workers: int, optional = None
+        Number of worker processes, chunks run in the current process if not given
+    output: str, optional = None
+        Path of the result table
+    figure_dir: str, optional = None
+        Directory to render the success distribution of every cell into, headless (Agg)
+    figure_format: str, optional = "png"
+        Image format of the figures, e.g. "png" or "svg"
+
+    Returns
+    --------
+    List[Dict[str, Any]]
+        Result rows with keys FIELDS
+    """
+    if num_trials < 1:
+        raise ValueError("num_trials should be positive.")
+    import numpy as np
+
+    if figure_dir is not None:
+        from prisoners_problem.figures import export_figures
+        os.makedirs(figure_dir, exist_ok=True)
+    groups = {}
+    for cell in expand_grid(grid):
+        groups.setdefault(cell["num_boxes"], []).append(cell)
+    tasks = []
+    for (num_boxes, cells), group_seq in zip(groups.items(), np.random.SeedSequence(seed).spawn(len(groups))):
+        chunk_size = max(1, CHUNK_ELEMENTS // max(num_boxes, 1))
+        sizes = [min(chunk_size, num_trials - begin) for begin in range(0, num_trials, chunk_size)]
+        for size, chunk_seq in zip(sizes, group_seq.spawn(len(sizes))):
+            tasks.append((num_boxes, cells, size, chunk_seq))
+
+    histograms = {num_boxes: [SuccessHistogram(cell["num_prisoners"]) for cell in cells] for num_boxes, cells in groups.items()}
+    pending = {num_boxes: sum(task[0] == num_boxes for task in tasks) for num_boxes in groups}
+    rows = []
+    writer = _Writer(output)
+
+    def collect(num_boxes, counts):
+        for histogram, cell_counts in zip(histograms[num_boxes], counts):
+            histogram.update_counts(cell_counts)
+        pending[num_boxes] -= 1
+        if pending[num_boxes] == 0:
+            group_rows = []
+            for cell, histogram in zip(groups[num_boxes], histograms[num_boxes]):
+                mean = sum(k * c for k, c in enumerate(histogram.counts)) / max(histogram.num_trials, 1)
+                group_rows.append({**cell, "num_trials": histogram.num_trials, "seed": seed, "success_counts": histogram.success_counts,
+                                   "success_rate": histogram.success_rate, "mean_successes": mean})
+            writer.write(group_rows)
+            rows.extend(group_rows)
+            if figure_dir is not None:
+                export_figures(_figure_item(row, histogram, figure_dir, figure_format) for row, histogram in zip(group_rows, histograms[num_boxes]))
+
+    try:
+        if workers is None:
+            for task in tasks:
+                collect(task[0], _evaluate_chunk(*task))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_evaluate_chunk, *task): task[0] for task in tasks}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+    finally:
+        writer.close()
+
+    # groups may finish in any order, return rows in grid order
+    order = {tuple(cell.values()): i for i, cell in enumerate(cell for cells in groups.values() for cell in cells)}
+    rows.sort(key=lambda row: order[tuple(row[key] for key in ("strategy", "num_prisoners", "num_boxes", "open_counts", "shift"))])
+    return rows
+
+def parse_args(argv: Optional[List[str]]=None):
+    parser = argparse.ArgumentParser(description="N-Prisoners Problem parameter sweep")
+
+    parser.add_argument('--spec', type=str, default=None, help="JSON/TOML sweep spec, CLI axes override it")
+    parser.add_argument('--strategy', type=str, default=None, help="Comma separated strategies")
+    parser.add_argument('--num_prisoners', type=parse_values, default=None, help="Numbers of prisoners, start:stop:step or a,b,c")
+    parser.add_argument('--num_boxes', type=parse_values, default=None, help="Numbers of boxes, start:stop:step or a,b,c")
+    parser.add_argument('--box_ratio', type=parse_ratios, default=None, help="Comma separated num_boxes / num_prisoners ratios")
+    parser.add_argument('--open_counts', type=parse_values, default=None, help="Numbers of boxes that can be opened, start:stop:step or a,b,c")
+    parser.add_argument('--shift', type=parse_values, default=None, help="Shift values, start:stop:step or a,b,c")
+    parser.add_argument('--num_trials', type=int, default=None, help="Number of trials per cell")
+    parser.add_argument('--seed', type=int, default=None, help="Master random seed")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--output', type=str, default="sweep.csv", help="Result table (.csv or .parquet)")
+    parser.add_argument('--figure_dir', type=str, default=None, help="Render the distribution of every cell into this directory")
+    parser.add_argument('--figure_format', choices=['png', 'svg', 'pdf'], default="png", help="Image format of the rendered figures")
+
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]]=None):
+    args = parse_args(argv)
+    spec = load_spec(args.spec) if args.spec else {}
+    for key in GRID_KEYS:
+        value = getattr(args, key)
+        if value is not None:
+            spec[key] = value.split(",") if key == "strategy" else value
+    for key in ("num_trials", "seed", "workers"):
+        if getattr(args, key) is not None:
+            spec[key] = getattr(args, key)
+    grid = {key: spec[key] for key in GRID_KEYS if key in spec}
+
+    rows = run_sweep(grid, spec.get("num_trials", 1000), spec.get("seed"), spec.get("workers"), args.output, args.figure_dir, args.figure_format)
+    print(f"{len(rows)} cells saved as {args.output}")
+
+if __name__ == "__main__":
+    main()
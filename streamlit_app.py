@@ -3,11 +3,23 @@ import os
 
 sys.path.append(os.path.abspath('src'))
 
-from prisoners_problem.simulations import run_simulation
+from prisoners_problem.service import SimulationService
 from prisoners_problem.problem_instance import Instance
-from prisoners_problem.figures import plot_success_dist
+from prisoners_problem.strategies import available_strategies, get_strategy
+from prisoners_problem.figures import SuccessDistPlot, plot_cycle_diagram
+from prisoners_problem.cycle_index import CycleIndex
 import streamlit as st
 import random
+import time
+
+# the cycle index answers prisoner queries without walking the boxes, listing them is what limits the size
+MAX_DEMO_BOXES = 50000
+MAX_SHOWN_BOXES = 100
+
+@st.cache_resource
+def get_service() -> SimulationService:
+    # one worker pool per server process, shared by all sessions
+    return SimulationService()
 
 st.markdown("## *N*-Prisoners Problem Simulator")
 st.markdown("""
@@ -59,13 +71,25 @@ with tab1:
         # simulation settings
         num_trials = st.number_input("Number of simulation trials", min_value=10, max_value=1000000, value=1000, step=100)
         shift = st.number_input("Shift value (for shifted strategy)", min_value=0, max_value=st.session_state.num_boxes // 2, value=0)
-        strategy_name = st.selectbox("Strategy", ["random", "cycle_following"])
+        strategy_name = st.selectbox("Strategy", available_strategies(), format_func=lambda name: f"{name}: {get_strategy(name).description}")
         title_name = st.text_input("Title name")
 
-        if st.button("Run Simulation"):
+        col_run, col_cancel = st.columns(2)
+        with col_run:
+            run_clicked = st.button("Run Simulation")
+        with col_cancel:
+            cancel_clicked = st.button("Cancel")
+
+        service = get_service()
+        if cancel_clicked and st.session_state.get("job_id") is not None:
+            service.cancel(st.session_state.job_id)
+            st.session_state.job_id = None
+            st.warning("Simulation cancelled.")
+
+        if run_clicked:
             if not title_name:
                 title_name = f"{strategy_name.upper().replace('_', ' ')} (#p={st.session_state.num_prisoners}, #b={st.session_state.num_boxes}, max_open={st.session_state.open_counts}, trials={num_trials})"
-                if strategy_name == "cycle_following" and shift != 0:
+                if get_strategy(strategy_name).uses_shift and shift != 0:
                     title_name = title_name[:-1] + f", shift = {shift}" + title_name[-1]
 
             instance = Instance(
@@ -73,11 +97,29 @@ with tab1:
                 num_boxes=st.session_state.num_boxes,
                 open_counts=st.session_state.open_counts
             )
-            simu_info, results = run_simulation(name=title_name, strategy=strategy_name, num_trials=num_trials, instance_template=instance, shift=shift)
-            fig = plot_success_dist(simu_info, results)
-            st.pyplot(fig)
-            success_rate = round(results.count(simu_info['num_prisoners']) / num_trials * 100, 2)
-            st.markdown(f"#### Success rate: {success_rate}%")
+            if st.session_state.get("job_id") is not None:
+                service.cancel(st.session_state.job_id)
+            st.session_state.job_id = service.submit_simulation(strategy=strategy_name, num_trials=num_trials, instance_template=instance, shift=shift)
+            st.session_state.simu_info = {**instance.get_template(), "name": title_name, "strategy": strategy_name, "num_trials": num_trials, "shift": shift}
+
+        if st.session_state.get("job_id") is not None:
+            # redraw the partial histogram until the job is done, the script stays responsive to Cancel through reruns
+            job = service.job(st.session_state.job_id)
+            progress_bar = st.progress(0.0)
+            plot_area = st.empty()
+            rate_area = st.empty()
+            plot = SuccessDistPlot(st.session_state.simu_info, pyplot=False)
+            while True:
+                done = job.done
+                results = job.histogram
+                progress_bar.progress(min(job.progress, 1.0), text=f"{results.num_trials} / {job.num_trials} trials")
+                if results.num_trials:
+                    plot_area.pyplot(plot.update(results))
+                    success_rate = round(results.success_rate * 100, 2)
+                    rate_area.markdown(f"#### Success rate: {success_rate}%")
+                if done:
+                    break
+                time.sleep(0.5)
 
 
 with tab2:
@@ -86,25 +128,28 @@ with tab2:
         st.session_state.boxes = None
     if "locked" not in st.session_state:
         st.session_state.locked = False
+    if "cycle_index" not in st.session_state:
+        st.session_state.cycle_index = None
 
     st.markdown("#### Cycle Following Demonstration")
 
     # number of prisoners and boxes
-    N = st.slider("Number of prisoners / boxes", 10, 100, 10)
+    N = st.number_input("Number of prisoners / boxes", min_value=10, max_value=MAX_DEMO_BOXES, value=10, step=10)
 
     col1, col2 = st.columns(2)
 
     with col1:
         if st.button("Generate & Lock Boxes"):
-            st.session_state.boxes = list(range(N))
-            random.shuffle(st.session_state.boxes)
+            st.session_state.boxes = list(Instance(N, rng=random.Random()).boxes)
             st.session_state.locked = True
+            st.session_state.cycle_index = None
             st.success("✅ Boxes generated and locked!")
 
     with col2:
         if st.button("Reset Boxes"):
             st.session_state.boxes = None
             st.session_state.locked = False
+            st.session_state.cycle_index = None
             st.warning("Boxes have been reset. Please regenerate.")
 
     if st.session_state.locked:
@@ -114,28 +159,37 @@ with tab2:
 
     if st.session_state.boxes is not None:
         st.markdown("### Current Box Configuration")
-        st.code(dict(enumerate(st.session_state.boxes)), language="python")
+        if len(st.session_state.boxes) <= MAX_SHOWN_BOXES:
+            st.code(dict(enumerate(st.session_state.boxes)), language="python")
+        else:
+            st.caption(f"{len(st.session_state.boxes)} boxes, too many to list.")
 
     if st.session_state.locked:
+        boxes = st.session_state.boxes
+        N = len(boxes)
         prisoner = st.number_input("Choose a prisoner id:", min_value=0, max_value=N-1, value=0)
         shift = st.number_input("Choose a shift value:", min_value=0, max_value=N-1, value=0)
-        boxes = st.session_state.boxes
-
-        max_steps = N // 2
-        visited = []
-        current_box = (prisoner + shift) % N
-        success = False
 
-        for _ in range(max_steps):
-            visited.append(current_box)
-            if boxes[current_box] == prisoner:
-                success = True
-                break
-            current_box = (boxes[current_box] + shift) % N 
+        # built once per locked boxes and shift, every prisoner query below is a lookup
+        index = st.session_state.cycle_index
+        if index is None or index.shift != shift:
+            index = st.session_state.cycle_index = CycleIndex(boxes, shift)
 
+        visited = index.path(prisoner)
         st.markdown("### Box Opening Path")
-        st.write(f"Prisoner {prisoner} opened boxes: {visited}")
-        if success:
-            st.success(f"✅ Prisoner {prisoner} found his own number in {len(visited)} steps!")
+        if len(visited) <= MAX_SHOWN_BOXES:
+            st.write(f"Prisoner {prisoner} opened boxes: {visited}")
+        else:
+            st.write(f"Prisoner {prisoner} opened boxes: {visited[:MAX_SHOWN_BOXES]} ... ({len(visited)} boxes)")
+        st.write(f"Prisoner {prisoner} is on cycle {index.cycle_of(prisoner)} of length {index.steps(prisoner)}.")
+        if index.succeeds(prisoner):
+            st.success(f"✅ Prisoner {prisoner} found his own number in {index.steps(prisoner)} steps!")
+        else:
+            st.error(f"❌ Prisoner {prisoner} failed to find his own number in {index.open_counts} steps.")
+
+        st.markdown("### All Prisoners")
+        if index.success_counts == N:
+            st.success(f"✅ All {N} prisoners find their numbers, the longest cycle has {max(index.cycle_lengths)} boxes.")
         else:
-            st.error(f"❌ Prisoner {prisoner} failed to find his own number in {max_steps} steps.")
+            st.error(f"❌ {N - index.success_counts} of {N} prisoners fail, the longest cycle has {max(index.cycle_lengths)} boxes.")
+        st.pyplot(plot_cycle_diagram(index, prisoner))
@@ -0,0 +1,53 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.batch import random_permutations, cycle_following_batch, benchmark_batch
+from prisoners_problem.simulations import run_simulation
+import numpy as np
+import pytest
+
+@pytest.mark.parametrize("num_prisoners, num_boxes, open_counts, shift", [
+    (10, 10, 5, 0),
+    (10, 10, 5, 3),
+    (8, 13, 6, 0),
+    (8, 13, 4, -2),
+    (1, 1, 0, 0),
+])
+def test_cycle_following_batch(num_prisoners, num_boxes, open_counts, shift):
+    perms = random_permutations(np.random.default_rng(42), 200, num_boxes)
+    results = cycle_following_batch(perms, num_prisoners, open_counts, shift)
+    expected = [cycle_following(Instance(num_prisoners, num_boxes, open_counts, row.tolist()), shift)[1] for row in perms]
+    assert results.tolist() == expected
+
+def test_random_permutations():
+    perms = random_permutations(np.random.default_rng(0), 50, 7)
+    assert perms.shape == (50, 7)
+    assert (np.sort(perms, axis=1) == np.arange(7)).all()
+
+def test_run_simulation_numpy():
+    ins_template = Instance(10, seed=0)
+    simu_info, success_record = run_simulation(name="np", strategy="cycle_following", num_trials=100, instance_template=ins_template, engine="numpy")
+    assert len(success_record) == 100
+    assert all(0 <= x <= 10 for x in success_record)
+    assert run_simulation(name="np", strategy="cycle_following", num_trials=100, instance_template=ins_template, engine="numpy")[1] == success_record
+
+def test_unknown_engine():
+    with pytest.raises(ValueError) as e:
+        run_simulation(name="unknown", strategy="cycle_following", num_trials=10, instance_template=Instance(5), engine="unknown")
+    assert "Unknown engine" in str(e.value)
+
+
+def test_benchmark_batch():
+    results = benchmark_batch(20000, 10, 10, 5, np.random.default_rng(1))
+    assert results.shape == (20000,)
+    assert results.min() >= 0 and results.max() <= 10
+    assert results.mean() == pytest.approx(5, abs=0.1)
+    assert (benchmark_batch(10, 4, 8, 8, np.random.default_rng(1)) == 4).all()
+
+    with pytest.raises(ValueError) as e:
+        benchmark_batch(10, 4, 8, 9, np.random.default_rng(1))
+    assert "open_counts" in str(e.value)
+
+def test_run_simulation_numpy_random():
+    _, success_record = run_simulation(name="np", strategy="random", num_trials=100, instance_template=Instance(10, seed=0), engine="numpy")
+    assert len(success_record) == 100
+    assert all(0 <= x <= 10 for x in success_record)
@@ -4,5 +4,16 @@ import pytest
 
 def test_benchmark():
     ins = Instance(10, seed=42)
-    assert benchmark(ins, seed=42) == (False, 5)
+    # prisoners draw from one random.Random(42) stream instead of reseeding before each prisoner
+    assert benchmark(ins, seed=42) == (False, 6)
+
+def test_benchmark_rng():
+    import numpy as np
+    import random
+    ins = Instance(10, seed=42)
+    assert benchmark(ins, rng=random.Random(42)) == benchmark(ins, seed=42)
+    assert benchmark(ins, rng=np.random.default_rng(1)) == benchmark(ins, rng=np.random.default_rng(1))
+    state = random.getstate()
+    benchmark(ins, seed=3)
+    assert random.getstate() == state
 
@@ -0,0 +1,50 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.histogram import SuccessHistogram
+from prisoners_problem.simulations import run_simulation_histogram
+from prisoners_problem.cache import ResultCache
+import os
+import pytest
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path))
+
+def test_seeded_hit(cache):
+    ins_template = Instance(8, seed=1)
+    _, first = run_simulation_histogram("a", "cycle_following", 200, ins_template, engine="numpy", cache=cache)
+    _, second = run_simulation_histogram("b", "cycle_following", 200, ins_template, engine="numpy", cache=cache)
+    assert first.counts == second.counts
+    assert len(os.listdir(cache.directory)) == 1
+
+    run_simulation_histogram("a", "cycle_following", 300, ins_template, engine="numpy", cache=cache)
+    assert len(os.listdir(cache.directory)) == 2
+
+def test_unseeded_extend(cache):
+    ins_template = Instance(8)
+    run_simulation_histogram("a", "cycle_following", 100, ins_template, engine="numpy", cache=cache)
+    _, histogram = run_simulation_histogram("a", "cycle_following", 250, ins_template, engine="numpy", cache=cache)
+    assert histogram.num_trials == 250
+    assert len(os.listdir(cache.directory)) == 1
+
+    _, histogram = run_simulation_histogram("a", "cycle_following", 50, ins_template, engine="numpy", cache=cache)
+    assert histogram.num_trials == 50
+    simu_info = {**ins_template.get_template(), "name": "a", "strategy": "cycle_following", "num_trials": 50, "shift": 0}
+    assert cache.load(simu_info, "numpy").num_trials == 250
+
+def test_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=0)
+    simu_info = {**Instance(4).get_template(), "name": "a", "strategy": "random", "num_trials": 10, "shift": 0}
+    first = cache.store(simu_info, "numpy", SuccessHistogram(4, [1, 2, 3, 4, 0]))
+    second = cache.store({**simu_info, "shift": 1}, "numpy", SuccessHistogram(4, [0, 0, 0, 0, 10]))
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+    assert cache.load({**simu_info, "shift": 1}, "numpy").counts == [0, 0, 0, 0, 10]
+
+def test_concurrent_store(cache):
+    from concurrent.futures import ThreadPoolExecutor
+    simu_info = {**Instance(4).get_template(), "name": "a", "strategy": "random", "num_trials": 10, "shift": 0}
+    histograms = [SuccessHistogram(4, [i, 0, 0, 0, 10 - i]) for i in range(8)]
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda histogram: cache.store(simu_info, "numpy", histogram), histograms * 4))
+    assert cache.load(simu_info, "numpy").counts in [histogram.counts for histogram in histograms]
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(".tmp")]
@@ -0,0 +1,67 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.simulations import run_simulation_histogram
+from prisoners_problem.checkpoint import parse_shard, shard_chunk_ids, run_shard, merge_shards, run_checkpointed
+import pytest
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr("prisoners_problem.simulations.CHUNK_TRIALS", 64)
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_shards_match_single_run(tmp_path, small_chunks, engine):
+    template = Instance(10, open_counts=5, seed=3)
+    for shard in (4, 0, 2, 1, 3): # any order, as on separate machines
+        run_shard(str(tmp_path), "ck", "cycle_following", 1000, template, engine=engine, shard=shard, num_shards=5)
+    simu_info, merged = merge_shards(str(tmp_path))
+    _, expected = run_simulation_histogram("ck", "cycle_following", 1000, template, engine=engine, workers=1)
+    _, in_process = run_simulation_histogram("ck", "cycle_following", 1000, template, engine=engine)
+    assert merged.counts == expected.counts == in_process.counts
+    assert simu_info["num_trials"] == 1000 and simu_info["num_shards"] == 5
+
+def test_jit_and_numpy_shards_merge(tmp_path, small_chunks):
+    # "auto" resolves to jit or numpy depending on the machine, the trials are the same
+    template = Instance(10, open_counts=5, seed=3)
+    run_shard(str(tmp_path), "ck", "cycle_following", 1000, template, engine="jit", shard=0, num_shards=2)
+    run_shard(str(tmp_path), "ck", "cycle_following", 1000, template, engine="numpy", shard=1, num_shards=2)
+    _, expected = run_simulation_histogram("ck", "cycle_following", 1000, template, engine="numpy")
+    assert merge_shards(str(tmp_path))[1].counts == expected.counts
+
+def test_chunk_seeds(small_chunks):
+    import numpy as np
+    from prisoners_problem.simulations import _chunks, _seeded_rng
+    children = np.random.SeedSequence(3).spawn(16)
+    assert [size for size, _ in _chunks(1000, 3)][-1] == 1000 - 15 * 64
+    for i, (_, chunk_seed) in zip(range(5, 9), _chunks(1000, 3, range(5, 9))):
+        assert (_seeded_rng("numpy", chunk_seed).integers(1 << 30, size=4) == np.random.default_rng(children[i]).integers(1 << 30, size=4)).all()
+
+def test_shard_chunk_ids(small_chunks):
+    ranges = [shard_chunk_ids(1000, shard, 3) for shard in range(3)]
+    assert [i for r in ranges for i in r] == list(range(16))
+
+def test_resume_skips_completed_shards(tmp_path, small_chunks, monkeypatch):
+    template = Instance(10, seed=1)
+    first = run_checkpointed(str(tmp_path), "ck", "random", 500, template, num_shards=4)[1]
+    assert first.counts == run_simulation_histogram("ck", "random", 500, template)[1].counts
+    def fail(*args, **kwargs):
+        raise AssertionError("completed shards should not run again")
+    monkeypatch.setattr("prisoners_problem.simulations._count_trials", fail)
+    assert run_checkpointed(str(tmp_path), "ck", "random", 500, template, num_shards=4)[1].counts == first.counts
+
+def test_checkpoint_errors(tmp_path, small_chunks):
+    with pytest.raises(ValueError):
+        run_shard(str(tmp_path), "ck", "random", 100, Instance(5), shard=0, num_shards=2)
+    with pytest.raises(ValueError):
+        merge_shards(str(tmp_path))
+    run_shard(str(tmp_path), "ck", "random", 100, Instance(5, seed=1), shard=0, num_shards=2)
+    with pytest.raises(ValueError) as e:
+        merge_shards(str(tmp_path))
+    assert "Missing 1 of 2 shards: 1" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        run_shard(str(tmp_path), "ck", "random", 100, Instance(5, seed=2), shard=0, num_shards=2)
+    assert "another run" in str(e.value)
+
+def test_parse_shard():
+    assert parse_shard("0/1") == (0, 1)
+    for text in ("3", "4/4", "-1/2", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(text)
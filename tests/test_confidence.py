@@ -0,0 +1,23 @@
+from prisoners_problem.confidence import wilson_interval, clopper_pearson_interval, confidence_interval
+import pytest
+
+def test_wilson_interval():
+    low, high = wilson_interval(31, 100)
+    assert low == pytest.approx(0.2278, abs=1e-4)
+    assert high == pytest.approx(0.4063, abs=1e-4)
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert wilson_interval(0, 10)[0] == 0.0
+
+def test_clopper_pearson_interval():
+    low, high = clopper_pearson_interval(31, 100)
+    assert low == pytest.approx(0.2213, abs=1e-4)
+    assert high == pytest.approx(0.4103, abs=1e-4)
+    # closed forms at the edges: (alpha / 2) ** (1 / n)
+    assert clopper_pearson_interval(0, 20)[1] == pytest.approx(1 - 0.025 ** (1 / 20))
+    assert clopper_pearson_interval(20, 20)[0] == pytest.approx(0.025 ** (1 / 20))
+
+def test_confidence_interval_invalid():
+    with pytest.raises(ValueError):
+        confidence_interval(1, 2, method="unknown")
+    with pytest.raises(ValueError):
+        confidence_interval(1, 2, confidence=1.5)
@@ -0,0 +1,123 @@
+from prisoners_problem.problem_instance import Instance, CompactInstance
+from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.benchmark import benchmark
+from prisoners_problem.simulations import run_simulation, run_simulation_histogram
+from prisoners_problem.corpus import PermutationCorpus, write_corpus, validate_permutations, import_corpus, main
+import numpy as np
+import pickle
+import pytest
+
+@pytest.fixture
+def corpus(tmp_path):
+    return write_corpus(str(tmp_path / "perms.bin"), 300, 12, seed=5, chunk_rows=64)
+
+def test_write_corpus(corpus, tmp_path):
+    assert len(corpus) == 300 and corpus.num_boxes == 12 and corpus.seed == 5
+    assert corpus.rows.dtype == np.uint16
+    assert (np.sort(corpus.rows, axis=1) == np.arange(12)).all()
+    again = write_corpus(str(tmp_path / "again.bin"), 300, 12, seed=5, chunk_rows=100)
+    assert (again.rows == corpus.rows).all()
+    assert write_corpus(str(tmp_path / "empty.bin"), 0, 12).rows.shape == (0, 12)
+
+def test_windows(corpus):
+    window = corpus[100:250]
+    assert len(window) == 150
+    assert (window[0] == corpus[100]).all()
+    assert (window[10:20].rows == corpus.rows[110:120]).all()
+    restored = pickle.loads(pickle.dumps(window))
+    assert (restored.start, restored.stop) == (100, 250)
+    assert len(pickle.dumps(corpus)) < 300
+    assert sum(len(chunk) for chunk in corpus.iter_chunks(7)) == 300
+    with pytest.raises(IndexError):
+        PermutationCorpus(corpus.path, 10, 400)
+
+def test_invalid_file(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"not a corpus")
+    with pytest.raises(ValueError) as e:
+        PermutationCorpus(str(path))
+    assert "not a permutation corpus" in str(e.value)
+
+def test_strategies_on_rows(corpus):
+    instance = corpus.instance(3, open_counts=6)
+    assert instance.boxes.tolist() == corpus[3].tolist()
+    assert cycle_following(instance) == cycle_following(Instance(12, open_counts=6, boxes=corpus[3].tolist()))
+    assert benchmark(instance, seed=1) == benchmark(Instance(12, open_counts=6, boxes=corpus[3].tolist()), seed=1)
+
+@pytest.mark.parametrize("template", [Instance(12, open_counts=6), CompactInstance(10, 12, 6)])
+def test_replay(corpus, template, monkeypatch):
+    import prisoners_problem.simulations as simulations
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 64)
+    expected = [cycle_following(corpus.instance(t, template.num_prisoners, 6), shift=1)[1] for t in range(200)]
+    simu_info, python = run_simulation("c", "cycle_following", 200, template, shift=1, corpus=corpus)
+    _, numpy = run_simulation("c", "cycle_following", 200, template, shift=1, engine="numpy", corpus=corpus)
+    _, parallel = run_simulation("c", "cycle_following", 200, template, shift=1, engine="numpy", workers=2, corpus=corpus)
+    assert python == numpy == parallel == expected
+    assert simu_info["corpus"]["path"] == corpus.path
+    _, histogram = run_simulation_histogram("c", "cycle_following", 200, template, shift=1, engine="numpy", corpus=corpus)
+    assert histogram.counts == np.bincount(expected, minlength=template.num_prisoners + 1).tolist()
+
+def test_replay_errors(corpus, tmp_path):
+    with pytest.raises(ValueError) as e:
+        run_simulation("c", "cycle_following", 10, Instance(10), corpus=corpus)
+    assert "boxes" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        run_simulation("c", "cycle_following", 301, Instance(12), corpus=corpus)
+    assert "rows" in str(e.value)
+    from prisoners_problem.cache import ResultCache
+    with pytest.raises(ValueError) as e:
+        run_simulation_histogram("c", "cycle_following", 10, Instance(12), cache=ResultCache(str(tmp_path / "cache")), corpus=corpus)
+    assert "corpus" in str(e.value)
+
+def test_main(tmp_path, capsys):
+    output = str(tmp_path / "cli.bin")
+    main(["--num_boxes", "8", "--num_rows", "50", "--seed", "2", "--output", output])
+    assert len(PermutationCorpus(output)) == 50
+    assert "50 permutations" in capsys.readouterr().out
+
+def test_validate_permutations():
+    rows = np.array([[0, 1, 2], [2, 2, 0], [1, 3, 0], [-1, 0, 1], [2**32 + 1, 0, 2], [2, 0, 1]])
+    assert validate_permutations(rows).tolist() == [True, False, False, False, False, True]
+    assert not validate_permutations(rows, 4).any()
+    assert validate_permutations(np.zeros((2, 0), dtype=np.int64)).tolist() == [True, True]
+    with pytest.raises(TypeError):
+        validate_permutations(np.array([[0.0, 1.0]]))
+
+@pytest.fixture
+def rows():
+    rows = np.random.default_rng(3).permuted(np.tile(np.arange(12), (200, 1)), axis=1)
+    rows[5, 0] = rows[5, 1]
+    rows[77, 3] = 12
+    return rows
+
+@pytest.mark.parametrize("file_format", ["npy", "csv", "bin", "corpus"])
+def test_import_corpus(rows, file_format, tmp_path, corpus):
+    source = str(tmp_path / f"perms.{file_format}")
+    num_boxes = None
+    if file_format == "npy":
+        np.save(source, rows)
+    elif file_format == "csv":
+        np.savetxt(source, rows, fmt="%d", delimiter=",")
+        with open(source, "a") as f:
+            f.write("1,2,x\n\n")
+    elif file_format == "bin":
+        rows.astype("<u4").tofile(source)
+        num_boxes = 12
+    else:
+        source = corpus.path
+    imported, invalid = import_corpus(source, str(tmp_path / "imported.bin"), num_boxes, chunk_rows=64)
+    if file_format == "corpus":
+        assert invalid.tolist() == [] and (imported.rows == corpus.rows).all()
+        return
+    assert invalid.tolist() == ([5, 77, 200, 201] if file_format == "csv" else [5, 77])
+    assert imported.num_boxes == 12 and imported.seed == -1
+    assert (imported.rows == np.delete(rows, [5, 77], axis=0)).all()
+    _, results = run_simulation("c", "cycle_following", len(imported), Instance(12), engine="numpy", corpus=imported)
+    assert results == [cycle_following(imported.instance(t))[1] for t in range(len(imported))]
+
+def test_main_import(rows, tmp_path, capsys):
+    source, output = str(tmp_path / "perms.npy"), str(tmp_path / "imported.bin")
+    np.save(source, rows)
+    main(["--input", source, "--output", output])
+    assert len(PermutationCorpus(output)) == 198
+    assert "2 invalid rows skipped: 5, 77" in capsys.readouterr().out
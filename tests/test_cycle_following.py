@@ -1,8 +1,54 @@
 from prisoners_problem.problem_instance import Instance
-from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.cycle_following import cycle_following, cycle_decomposition, cycle_length_histogram, cycle_following_shifts, best_shift
+import pytest
 
 def test_cycle_following():
     ins = Instance(5, seed=42)
     assert cycle_following(ins) == (False, 2)
     ins = Instance(5, seed=0)
-    assert cycle_following(ins) == (True, 5)
\ No newline at end of file
+    assert cycle_following(ins) == (True, 5)
+
+def test_cycle_following_early_stop():
+    for seed in range(200):
+        for ins in (Instance(8, seed=seed), Instance(4, 8, 4, seed=seed)):
+            for shift in (0, 3):
+                assert cycle_following(ins, shift, early_stop=True) == (cycle_following(ins, shift)[0], None)
+
+def test_cycle_decomposition():
+    assert cycle_decomposition((1, 0, 3, 4, 2)) == ([0, 0, 1, 1, 1], [2, 3])
+    assert cycle_decomposition((0, 1, 2), shift=1) == ([0, 0, 0], [3])
+    assert cycle_decomposition(()) == ([], [])
+
+def test_cycle_length_histogram():
+    assert cycle_length_histogram(Instance(5, boxes=[1, 0, 3, 4, 2])) == {2: 1, 3: 1}
+    assert cycle_length_histogram(Instance(4, boxes=[0, 1, 2, 3])) == {1: 4}
+
+def test_cycle_following_extra_boxes():
+    # card 4 belongs to no prisoner, prisoners 0-3 share a cycle of length 5
+    ins = Instance(4, num_boxes=6, open_counts=4, boxes=[1, 2, 3, 4, 0, 5])
+    assert cycle_following(ins) == (False, 0)
+    ins = Instance(4, num_boxes=6, open_counts=5, boxes=[1, 2, 3, 4, 0, 5])
+    assert cycle_following(ins) == (True, 4)
+
+def test_cycle_following_shifts():
+    for seed in range(5):
+        ins = Instance(8, num_boxes=11, open_counts=4, seed=seed)
+        assert cycle_following_shifts(ins) == [cycle_following(ins, s)[1] for s in range(11)]
+    ins = Instance(4, boxes=[1, 2, 3, 0], open_counts=2)
+    assert cycle_following_shifts(ins) == [0, 4, 0, 4]
+    assert cycle_following_shifts(ins, [-1, 6]) == [4, 0]
+
+def test_best_shift():
+    ins = Instance(4, boxes=[1, 2, 3, 0], open_counts=2)
+    assert best_shift(ins) == (1, 4)
+    assert best_shift(ins, [0, 2]) == (0, 0)
+    with pytest.raises(ValueError) as e:
+        best_shift(ins, [])
+    assert "shifts should not be empty" in str(e.value)
+
+def test_cycle_following_shifts_batched(monkeypatch):
+    import prisoners_problem.cycle_following as module
+    monkeypatch.setattr(module, "SMALL_SHIFT_BATCH", 0)
+    ins = Instance(8, num_boxes=11, open_counts=4, seed=3)
+    assert cycle_following_shifts(ins) == [cycle_following(ins, s)[1] for s in range(11)]
+    assert cycle_following_shifts(ins, [-1, 13]) == [cycle_following(ins, -1)[1], cycle_following(ins, 13)[1]]
@@ -0,0 +1,51 @@
+from prisoners_problem.cycle_index import CycleIndex
+from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.figures import plot_cycle_diagram
+from prisoners_problem.problem_instance import Instance
+import matplotlib.pyplot as plt
+import random
+import pytest
+
+def _walk(boxes, prisoner, shift, max_steps):
+    num_boxes = len(boxes)
+    visited = []
+    current_box = (prisoner + shift) % num_boxes
+    for _ in range(max_steps):
+        visited.append(current_box)
+        if boxes[current_box] == prisoner:
+            return visited, True
+        current_box = (boxes[current_box] + shift) % num_boxes
+    return visited, False
+
+@pytest.mark.parametrize("num_boxes, shift", [(10, 0), (10, 3), (57, 0), (57, 11)])
+def test_matches_walk(num_boxes, shift):
+    rng = random.Random(num_boxes + shift)
+    for _ in range(20):
+        boxes = list(Instance(num_boxes, rng=rng).boxes)
+        index = CycleIndex(boxes, shift)
+        for prisoner in range(num_boxes):
+            visited, success = _walk(boxes, prisoner, shift, num_boxes // 2)
+            assert index.path(prisoner) == visited
+            assert index.succeeds(prisoner) == success
+            unlimited, _ = _walk(boxes, prisoner, shift, num_boxes)
+            assert index.steps(prisoner) == len(unlimited)
+            assert index.path(prisoner, limit=num_boxes) == unlimited
+            assert index.start_box(prisoner) in index.cycle(index.cycle_of(prisoner))
+        assert index.outcomes() == [index.succeeds(p) for p in range(num_boxes)]
+
+@pytest.mark.parametrize("shift", [0, 5])
+def test_success_counts_match_cycle_following(shift):
+    rng = random.Random(shift)
+    for _ in range(50):
+        instance = Instance(40, open_counts=20, rng=rng)
+        index = CycleIndex(instance.boxes, shift, 20)
+        assert index.success_counts == sum(index.outcomes()) == cycle_following(instance, shift)[1]
+
+def test_large_index():
+    boxes = list(Instance(50000, rng=random.Random(0)).boxes)
+    index = CycleIndex(boxes)
+    assert sum(index.cycle_lengths) == len(index.order) == 50000
+    assert sorted(index.order) == list(range(50000))
+    plt.close("all")
+    assert isinstance(plot_cycle_diagram(index, prisoner=123), plt.Figure)
+    assert plt.get_fignums() == [] # not managed by pyplot
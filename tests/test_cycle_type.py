@@ -0,0 +1,71 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.cycle_type import sample_cycle_type, random_cycle_types
+from prisoners_problem.exact import success_distribution
+from prisoners_problem.simulations import run_simulation, run_simulation_histogram
+import random
+import numpy as np
+import pytest
+
+def _chi_square(counts, expected):
+    # pool the bins expecting fewer than 5 trials into one
+    stat, dof, low_observed, low_expected = 0.0, -1, 0, 0.0
+    for observed, e in zip(counts, expected):
+        if e < 5:
+            low_observed += observed
+            low_expected += e
+        else:
+            stat += (observed - e) ** 2 / e
+            dof += 1
+    if low_expected > 0:
+        stat += (low_observed - low_expected) ** 2 / low_expected
+        dof += 1
+    return stat, dof
+
+def test_sample_cycle_type():
+    assert sample_cycle_type(0, random.Random(0)) == []
+    assert sample_cycle_type(1, random.Random(0)) == [1]
+    lengths = sample_cycle_type(1000, random.Random(3))
+    assert sum(lengths) == 1000 and min(lengths) >= 1
+    assert sample_cycle_type(1000, random.Random(3)) == lengths
+
+def test_random_cycle_types():
+    lengths = random_cycle_types(np.random.default_rng(0), 5000, 50)
+    assert (lengths.sum(axis=1) == 50).all()
+    # the expected number of cycles of a uniform permutation is the harmonic number H_n
+    assert (lengths > 0).sum(axis=1).mean() == pytest.approx(sum(1 / k for k in range(1, 51)), abs=0.1)
+    assert random_cycle_types(np.random.default_rng(0), 3, 0).shape == (3, 0)
+
+@pytest.mark.parametrize("num_prisoners, open_counts", [(10, 5), (30, 12)])
+def test_cycle_type_matches_shuffle(num_prisoners, open_counts):
+    template = Instance(num_prisoners, open_counts=open_counts, seed=11)
+    num_trials = 40000
+    _, sampled = run_simulation_histogram("ct", "cycle_following", num_trials, template, engine="cycle_type")
+    _, shuffled = run_simulation_histogram("np", "cycle_following", num_trials, template, engine="numpy")
+    # against the exact distribution, and against the shuffle-based path (two-sample test on pooled frequencies)
+    dist = success_distribution("cycle_following", template)
+    stat, dof = _chi_square(sampled.counts, [p * num_trials for p in dist])
+    assert stat < dof + 5 * (2 * dof) ** 0.5
+    pooled = [(a + b) / 2 for a, b in zip(sampled.counts, shuffled.counts)]
+    stat, dof = _chi_square(sampled.counts, pooled)
+    assert 2 * stat < dof + 5 * (2 * dof) ** 0.5
+
+def test_cycle_type_chunk_invariant(monkeypatch):
+    import prisoners_problem.simulations as simulations
+    assert simulations.CHUNK_TRIALS % (1 << 13) == 0
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 100)
+    template = Instance(20, seed=4)
+    _, record = run_simulation("ct", "cycle_following", 1000, template, engine="cycle_type")
+    _, histogram = run_simulation_histogram("ct", "cycle_following", 1000, template, engine="cycle_type")
+    _, parallel = run_simulation("ct", "cycle_following", 1000, template, engine="cycle_type", workers=2)
+    assert record == parallel
+    assert histogram.counts == np.bincount(record, minlength=21).tolist()
+    _, adaptive = run_simulation("ct", "cycle_following", 1000, template, engine="cycle_type", target_ci=0.1)
+    assert len(adaptive) < 1000 and adaptive == record[:len(adaptive)]
+
+def test_cycle_type_engine_errors():
+    with pytest.raises(ValueError):
+        run_simulation("ct", "cycle_following", 10, Instance(10), shift=1, engine="cycle_type")
+    with pytest.raises(ValueError):
+        run_simulation("ct", "cycle_following", 10, Instance(5, 10), engine="cycle_type")
+    with pytest.raises(ValueError):
+        run_simulation("ct", "random", 10, Instance(10), engine="cycle_type")
@@ -0,0 +1,38 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.simulations import estimate_success_rate
+from prisoners_problem.estimators import Moments
+import pytest
+
+def test_control_variate():
+    template = Instance(10, 40, 10, seed=4)
+    plain = estimate_success_rate("cycle_following", template, shift=2, target_ci=None, max_trials=200000, engine="numpy")
+    reduced = estimate_success_rate("cycle_following", template, shift=2, target_ci=None, max_trials=20000, engine="numpy", estimator="control_variate")
+    assert reduced["ess_gain"] > 4
+    # plain ran 10 times more trials
+    assert reduced["std_error"] < plain["std_error"] * 10 ** 0.5 / 2
+    assert abs(reduced["success_rate"] - plain["success_rate"]) < 4 * (plain["std_error"] ** 2 + reduced["std_error"] ** 2) ** 0.5
+    # with as many boxes as prisoners the control is the success indicator itself, for any shift
+    exact = estimate_success_rate("cycle_following", Instance(20, seed=0), shift=5, target_ci=0.001, engine="numpy", estimator="control_variate")
+    assert exact["std_error"] == 0 and exact["num_trials"] < 100000
+    assert exact["success_rate"] == pytest.approx(1 - sum(1 / k for k in range(11, 21)))
+
+def test_conditional_random():
+    estimate = estimate_success_rate("random", Instance(10, 20, 10, seed=0), target_ci=0.0001, engine="numpy", estimator="conditional")
+    assert estimate["success_rate"] == pytest.approx(0.5 ** 10)
+    assert estimate["std_error"] == 0
+
+def test_moments():
+    moments = Moments("control_variate", control_mean=0.5).update([1, 0, 1, 1], [1, 0, 1, 0])
+    assert moments.num_trials == 4
+    assert moments.estimate == pytest.approx(0.75 - (0.5 - 0.5))
+    assert Moments("plain").update([1, 0, 0, 1]).ess_gain == pytest.approx(0.25 / (1 / 3))
+
+def test_estimator_errors():
+    with pytest.raises(ValueError):
+        estimate_success_rate("cycle_following", Instance(10), engine="numpy", estimator="conditional")
+    with pytest.raises(ValueError):
+        estimate_success_rate("cycle_following", Instance(10), engine="python", estimator="control_variate")
+    with pytest.raises(ValueError):
+        estimate_success_rate("random", Instance(10), engine="numpy", estimator="control_variate")
+    with pytest.raises(ValueError):
+        estimate_success_rate("random", Instance(10), engine="numpy", estimator="unknown")
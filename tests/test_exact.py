@@ -0,0 +1,31 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.exact import success_distribution, success_probability, is_exact_supported, run_exact
+import pytest
+
+def test_cycle_following_distribution():
+    dist = success_distribution("cycle_following", Instance(4, open_counts=2))
+    assert dist == pytest.approx([1 / 4, 1 / 3, 0, 0, 5 / 12])
+
+def test_success_probability():
+    # closed form 1 - sum_{k > n/2} 1/k
+    assert success_probability("cycle_following", Instance(100)) == pytest.approx(1 - sum(1 / k for k in range(51, 101)))
+    assert success_probability("random", Instance(10)) == pytest.approx(0.5 ** 10)
+
+def test_random_distribution():
+    dist = success_distribution("random", Instance(3, num_boxes=4, open_counts=2))
+    assert dist == pytest.approx([1 / 8, 3 / 8, 3 / 8, 1 / 8])
+    assert success_distribution("random", Instance(3, open_counts=0)) == [1.0, 0.0, 0.0, 0.0]
+
+def test_unsupported():
+    assert not is_exact_supported("cycle_following", Instance(5), shift=1)
+    with pytest.raises(ValueError) as e:
+        success_distribution("cycle_following", Instance(5, num_boxes=6))
+    assert "shift = 0" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        success_distribution("unknown", Instance(5))
+    assert "Unknown" in str(e.value)
+
+def test_run_exact():
+    simu_info, dist = run_exact("exact", "cycle_following", Instance(10))
+    assert simu_info["num_trials"] == 0
+    assert len(dist) == 11
@@ -1,4 +1,5 @@
-from prisoners_problem.figures import plot_success_dist
+from prisoners_problem.figures import plot_success_dist, SuccessDistPlot, export_figures
+from prisoners_problem.histogram import SuccessHistogram
 import matplotlib.pyplot as plt
 import pytest
 
@@ -28,4 +29,39 @@ def test_with_external_ax(dummy_simu_info, dummy_results):
     fig_returned = plot_success_dist(dummy_simu_info, dummy_results, ax=ax_external)
 
     # 確認函數回傳的 fig 就是 ax_external 所屬的 figure
-    assert fig_returned == ax_external.figure
\ No newline at end of file
+    assert fig_returned == ax_external.figure
+
+def test_histogram_results(dummy_simu_info, dummy_results):
+    histogram = SuccessHistogram(100).update(dummy_results)
+    fig = plot_success_dist(dummy_simu_info, histogram)
+    expected = plot_success_dist(dummy_simu_info, dummy_results)
+    assert [p.get_height() for p in fig.axes[0].patches] == [p.get_height() for p in expected.axes[0].patches]
+
+    with pytest.raises(ValueError) as e:
+        plot_success_dist(dummy_simu_info, SuccessHistogram(100))
+    assert "Empty result received." in str(e.value)
+
+def test_update_in_place(dummy_simu_info, dummy_results):
+    plot = SuccessDistPlot(dummy_simu_info, pyplot=False)
+    bars = list(plot.bars)
+    histogram = SuccessHistogram(100).update(dummy_results)
+    fig = plot.update(histogram, name="Updated")
+    assert list(plot.bars) == bars
+    assert [bar.get_height() for bar in bars] == histogram.counts
+    assert bars[100].get_facecolor() != bars[0].get_facecolor()
+    assert fig.axes[0].get_title() == "Updated"
+
+    plot.update(histogram.update([100, 100]))
+    assert bars[100].get_height() == 6
+    with pytest.raises(ValueError) as e:
+        plot.update([1, 2, 3], counts=True)
+    assert "Length of counts" in str(e.value)
+
+def test_export_figures(tmp_path, dummy_simu_info, dummy_results):
+    num_figures = len(plt.get_fignums())
+    paths = export_figures([(dummy_simu_info, dummy_results, str(tmp_path / "a.png")),
+                            ({"name": "b", "num_prisoners": 10}, SuccessHistogram(10).update([3, 10]), str(tmp_path / "b.svg"))])
+    assert (tmp_path / "a.png").read_bytes()[:4] == b"\x89PNG"
+    assert "<svg" in (tmp_path / "b.svg").read_text()
+    assert len(paths) == 2
+    assert len(plt.get_fignums()) == num_figures
@@ -0,0 +1,31 @@
+from prisoners_problem.histogram import SuccessHistogram
+import numpy as np
+import pytest
+
+def test_update():
+    histogram = SuccessHistogram(3)
+    histogram.update([0, 3, 3, 1])
+    histogram.update(np.array([3, 2]))
+    assert histogram.counts == [1, 1, 1, 3]
+    assert histogram.num_trials == 6
+    assert histogram.success_counts == 3
+    assert histogram.success_rate == 0.5
+
+def test_merge():
+    histogram = SuccessHistogram(2, [1, 0, 1]).merge(SuccessHistogram(2, [0, 2, 1]))
+    assert histogram.counts == [1, 2, 2]
+    assert histogram.num_trials == 5
+
+def test_empty():
+    histogram = SuccessHistogram(4)
+    assert histogram.counts == [0] * 5
+    assert histogram.success_rate == 0.0
+
+def test_counts_value_error():
+    with pytest.raises(ValueError) as e:
+        SuccessHistogram(3, [1, 2])
+    assert "Length of counts" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        SuccessHistogram(3).merge(SuccessHistogram(2))
+    assert "different num_prisoners" in str(e.value)
@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CORE = ("problem_instance", "cycle_following", "benchmark", "simulations")
+# generous for cold caches and slow CI machines, a matplotlib or numpy import alone costs more
+IMPORT_BUDGET_MS = 150
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": os.path.join(ROOT, "src")}
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env, check=True, capture_output=True, text=True)
+
+def _cumulative_ms(stderr: str, module: str) -> float:
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1]) / 1000
+    raise AssertionError(f"{module} not found in -X importtime output")
+
+def test_core_imports_without_heavy_dependencies():
+    code = "import sys\n" + "".join(f"import prisoners_problem.{module}\n" for module in CORE)
+    code += "print([m for m in ('numpy', 'matplotlib') if m in sys.modules])"
+    assert _run(code).stdout.strip() == "[]"
+
+@pytest.mark.parametrize("module", CORE)
+def test_import_budget(module):
+    stderr = _run(f"import prisoners_problem.{module}").stderr
+    assert _cumulative_ms(stderr, f"prisoners_problem.{module}") < IMPORT_BUDGET_MS
+
+def test_cli_json_output():
+    code = "import sys, runpy\nsys.argv = ['main.py', '--num_trials', '10', '--num_prisoners', '10', '--open_counts', '5', '--output', 'json']\n"
+    code += "runpy.run_path('main.py', run_name='__main__')\n"
+    code += "print([m for m in ('numpy', 'matplotlib') if m in sys.modules])"
+    lines = _run(code).stdout.strip().splitlines()
+    result = json.loads(lines[0])
+    assert sum(result["counts"]) == 10
+    assert result["num_prisoners"] == 10
+    assert lines[1] == "[]"
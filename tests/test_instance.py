@@ -1,4 +1,7 @@
-from prisoners_problem.problem_instance import Instance
+from prisoners_problem.problem_instance import Instance, CompactInstance
+from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.simulations import run_simulation
+import numpy as np
 import pytest
 
 @pytest.fixture
@@ -60,4 +63,79 @@ def test_boxes_value_error():
     
     with pytest.raises(ValueError) as e:
         Instance(5, num_boxes=5, boxes=[1,2,3,4,4])
-    assert "contains value from 0 to n-1" in str(e.value)
\ No newline at end of file
+    assert "contains value from 0 to n-1" in str(e.value)
+
+def test_compact_lazy_boxes():
+    ins = CompactInstance(10, seed=42)
+    assert ins._boxes is None
+    boxes = ins.boxes
+    assert boxes.dtype == np.uint32
+    assert sorted(boxes.tolist()) == list(range(10))
+    assert ins.boxes is boxes
+    assert CompactInstance.from_template(ins.get_template()).boxes.tolist() == boxes.tolist()
+    assert not hasattr(ins, "__dict__")
+
+def test_compact_attrs():
+    ins = CompactInstance(10, 10, 5, [0, 1, 3, 4, 2, 8, 9, 7, 6, 5], 42)
+    num_prisoners, num_boxes, open_counts, boxes, seed = ins.get_attrs()
+    assert (num_prisoners, num_boxes, open_counts, seed) == (10, 10, 5, 42)
+    assert boxes.tolist() == [0, 1, 3, 4, 2, 8, 9, 7, 6, 5]
+    assert ins.get_template() == Instance(10, 10, 5, seed=42).get_template()
+    assert cycle_following(ins, shift=-1) == cycle_following(Instance(10, 10, 5, [0, 1, 3, 4, 2, 8, 9, 7, 6, 5]), shift=-1)
+
+def test_compact_simulation():
+    _, success_record = run_simulation(name="compact", strategy="cycle_following", num_trials=10, instance_template=CompactInstance(6))
+    assert len(success_record) == 10
+
+def test_compact_boxes_errors():
+    with pytest.raises(TypeError) as e:
+        CompactInstance(4, boxes=("1", 2, 3, 0))
+    assert "Each element" in str(e.value)
+
+    with pytest.raises(TypeError) as e:
+        CompactInstance(4, boxes={1, 2, 3, 0})
+    assert "boxes should be tuple of int" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        CompactInstance(4, boxes=[-1, 2, 3, 0])
+    assert "non-negative" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        CompactInstance(4, num_boxes=5, boxes=[1, 2, 3, 0])
+    assert "inconsistent" in str(e.value)
+
+    with pytest.raises(ValueError) as e:
+        CompactInstance(5, num_boxes=5, boxes=[1, 2, 3, 4, 4])
+    assert "contains value from 0 to n-1" in str(e.value)
+
+def test_rng():
+    import random
+    state = random.getstate()
+    assert Instance(10, seed=42).boxes == Instance(10, rng=random.Random(42)).boxes
+    assert random.getstate() == state
+    rng = random.Random(0)
+    assert Instance(10, rng=rng).boxes != Instance(10, rng=rng).boxes
+    assert Instance(10, rng=np.random.default_rng(0)).boxes == tuple(np.random.default_rng(0).permutation(10).tolist())
+    assert Instance.from_template(Instance(10, seed=1).get_template(), np.random.default_rng(0)).seed == 1
+
+    ins = CompactInstance(10, rng=np.random.default_rng(5))
+    assert ins._boxes is not None
+    assert ins.boxes.tolist() == np.random.default_rng(5).permutation(10).tolist()
+    compact = CompactInstance(10, rng=random.Random(5))
+    assert sorted(compact.boxes.tolist()) == list(range(10)) and compact.boxes.dtype == np.uint32
+    assert compact.boxes.tolist() == CompactInstance(10, rng=random.Random(5)).boxes.tolist()
+    assert not compact.boxes.flags.writeable
+
+def test_seeded_simulation_trials_differ():
+    template = Instance(20, open_counts=10, seed=3)
+    _, first = run_simulation(name="s", strategy="cycle_following", num_trials=50, instance_template=template)
+    _, second = run_simulation(name="s", strategy="cycle_following", num_trials=50, instance_template=template)
+    assert first == second
+    assert len(set(first)) > 1
+
+def test_trusted():
+    boxes = [2, 0, 3, 1]
+    assert Instance._trusted(4, 4, 2, boxes, 5) == Instance(4, open_counts=2, boxes=boxes, seed=5)
+    compact = CompactInstance._trusted(3, 4, 2, np.array(boxes))
+    assert compact.get_attrs()[:3] == (3, 4, 2) and compact.boxes.tolist() == boxes
+    assert cycle_following(compact) == cycle_following(CompactInstance(3, 4, 2, boxes=boxes))
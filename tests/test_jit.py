@@ -0,0 +1,35 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.cycle_following import cycle_following
+from prisoners_problem.batch import random_permutations
+from prisoners_problem.jit import _cycle_following_kernel, cycle_following_jit
+from prisoners_problem.simulations import run_simulation
+import numpy as np
+import pytest
+
+# the Python source of the kernel, whether or not numba compiled it
+kernel = getattr(_cycle_following_kernel, "py_func", _cycle_following_kernel)
+
+@pytest.mark.parametrize("num_prisoners, num_boxes, open_counts, shift", [
+    (10, 10, 5, 0),
+    (10, 10, 5, 3),
+    (8, 13, 6, 0),
+    (8, 13, 4, -2),
+    (1, 1, 0, 0),
+])
+def test_cycle_following_kernel(num_prisoners, num_boxes, open_counts, shift):
+    perms = random_permutations(np.random.default_rng(7), 100, num_boxes).astype(np.uint16)
+    expected = [cycle_following(Instance(num_prisoners, num_boxes, open_counts, row.tolist()), shift)[1] for row in perms]
+    success = np.zeros(len(perms), dtype=np.int64)
+    kernel(perms, num_prisoners, open_counts, shift, success)
+    assert success.tolist() == expected
+    assert cycle_following_jit(perms, num_prisoners, open_counts, shift).tolist() == expected
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_run_simulation_jit(workers):
+    template = Instance(10, 13, 6, seed=5)
+    _, numpy_record = run_simulation("np", "cycle_following", 500, template, shift=1, engine="numpy", workers=workers)
+    _, jit_record = run_simulation("jit", "cycle_following", 500, template, shift=1, engine="jit", workers=workers)
+    assert jit_record == numpy_record
+    # strategies without a compiled implementation use their batched one
+    _, random_record = run_simulation("jit", "random", 100, template, engine="jit", workers=workers)
+    assert random_record == run_simulation("np", "random", 100, template, engine="numpy", workers=workers)[1]
@@ -0,0 +1,45 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.simulations import run_simulation, run_simulation_histogram
+from prisoners_problem.profiling import Profiler
+import json
+import pstats
+import pytest
+
+def test_profile_python():
+    simu_info, success_record = run_simulation(name="p", strategy="cycle_following", num_trials=20, instance_template=Instance(10, open_counts=9), profile=True)
+    report = simu_info["profile"]
+    assert set(report["phases"]) == {"instance", "strategy", "accounting", "other"}
+    assert report["counters"]["trials"] == 20
+    assert report["counters"]["instances_built"] == 20
+    assert 0 < report["counters"]["boxes_opened"] <= 20 * 10 * 9
+    assert report["counters"]["cycles_walked"] >= 20
+
+def test_profile_numpy_progress():
+    calls = []
+    profiler = Profiler(progress=lambda *args: calls.append(args), progress_interval=0.0)
+    simu_info, histogram = run_simulation_histogram("p", "cycle_following", 500, Instance(10), engine="numpy", profile=profiler)
+    assert histogram.num_trials == 500
+    assert {"permutations", "kernel"} <= set(simu_info["profile"]["phases"])
+    assert calls[-1][0] == 500 and calls[-1][1] == 500 and calls[-1][3] == 0.0
+
+def test_profile_disabled():
+    simu_info, _ = run_simulation(name="p", strategy="random", num_trials=5, instance_template=Instance(5))
+    assert "profile" not in simu_info
+
+def test_profile_with_workers():
+    with pytest.raises(ValueError) as e:
+        run_simulation(name="p", strategy="random", num_trials=5, instance_template=Instance(5), workers=2, profile=True)
+    assert "profile" in str(e.value)
+
+def test_dump(tmp_path):
+    profiler = Profiler(cprofile=True)
+    run_simulation(name="p", strategy="random", num_trials=5, instance_template=Instance(5), profile=profiler)
+    profiler.dump_chrome_trace(str(tmp_path / "trace.json"))
+    with open(tmp_path / "trace.json") as f:
+        assert len(json.load(f)["traceEvents"]) > 0
+    profiler.dump_stats(str(tmp_path / "run.prof"))
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
+
+    with pytest.raises(ValueError) as e:
+        Profiler().dump_stats(str(tmp_path / "none.prof"))
+    assert "cProfile" in str(e.value)
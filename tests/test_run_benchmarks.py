@@ -0,0 +1,21 @@
+import importlib.util
+import os
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+spec = importlib.util.spec_from_file_location("run_benchmarks", os.path.join(ROOT, "benchmarks", "run_benchmarks.py"))
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+def test_compare():
+    baseline = {"a/n=10": {"trials_per_sec": 100.0}, "b/n=10": {"trials_per_sec": 100.0}, "c/n=10": {"trials_per_sec": 100.0}}
+    results = {"a/n=10": {"trials_per_sec": 85.0}, "b/n=10": {"trials_per_sec": 70.0}, "c/n=10": {"trials_per_sec": 150.0},
+               "new/n=10": {"trials_per_sec": 1.0}}
+    regressions = run_benchmarks.compare(results, baseline, 0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("b/n=10") and "70%" in regressions[0]
+    assert len(run_benchmarks.compare(results, baseline, 0.1)) == 2
+    assert run_benchmarks.compare({}, baseline, 0.2) == []
+
+def test_case_sizes():
+    for name, (_, trials) in run_benchmarks.CASES.items():
+        assert set(trials) <= set(run_benchmarks.SIZES), name
+    assert 100000 not in run_benchmarks.CASES["run_simulation[random,python]"][1]
@@ -0,0 +1,57 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.simulations import run_simulation_histogram
+from prisoners_problem.service import SimulationService
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+import asyncio
+import threading
+import pytest
+
+def test_submit_and_await(monkeypatch):
+    import prisoners_problem.simulations as simulations
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 64)
+    ins_template = Instance(10, open_counts=5, seed=3)
+    service = SimulationService(executor=ThreadPoolExecutor(2))
+    job_id = service.submit_simulation("cycle_following", 500, ins_template)
+    histogram = asyncio.run(service.job(job_id).result())
+    _, expected = run_simulation_histogram("s", "cycle_following", 500, ins_template, engine="numpy", workers=1)
+    assert histogram.counts == expected.counts
+    assert service.job(job_id).progress == 1.0
+    service.shutdown()
+
+def test_identical_requests_share_job():
+    service = SimulationService(executor=ThreadPoolExecutor(1))
+    first = service.submit_simulation("random", 100, Instance(5, seed=1))
+    second = service.submit_simulation("random", 100, Instance(5, seed=1))
+    third = service.submit_simulation("random", 100, Instance(5, seed=2))
+    assert first == second != third
+    assert service.job(first).subscribers == 2
+    assert service.job(first).wait(10).num_trials == 100
+    service.shutdown()
+
+def test_cancel(monkeypatch):
+    import prisoners_problem.service as service_module
+    gate = threading.Event()
+    def blocked_count(*args):
+        gate.wait(10)
+        return [0, 0, 0, 0, 0, 1]
+    monkeypatch.setattr(service_module, "_count_trials", blocked_count)
+    service = SimulationService(executor=ThreadPoolExecutor(1))
+    job_id = service.submit_simulation("random", 100000, Instance(5))
+    service.submit_simulation("random", 100000, Instance(5))
+    service.cancel(job_id)
+    assert not service.job(job_id)._cancel.is_set() # another requester is left
+    service.cancel(job_id)
+    gate.set()
+    with pytest.raises(CancelledError):
+        service.job(job_id).wait(10)
+    assert service.job(job_id).cancelled
+    assert service.job(job_id).histogram.num_trials < 100000
+    service.shutdown()
+
+def test_unknown_job():
+    service = SimulationService(executor=ThreadPoolExecutor(1))
+    with pytest.raises(KeyError):
+        service.job("missing")
+    with pytest.raises(ValueError):
+        service.submit_simulation("unknown", 10, Instance(5))
+    service.shutdown()
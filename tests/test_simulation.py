@@ -1,5 +1,5 @@
 from prisoners_problem.problem_instance import Instance
-from prisoners_problem.simulations import run_simulation
+from prisoners_problem.simulations import run_simulation, iter_simulation, run_simulation_histogram, estimate_success_rate
 import pytest
 
 def test_run_simulation():
@@ -27,4 +27,83 @@ def test_unknown_stategy():
     ins_template = Instance(5)
     with pytest.raises(ValueError) as e:
         run_simulation(name="unknown", strategy="unknown", num_trials=10, instance_template=ins_template, shift=0)
-    assert "Unknown" in str(e.value)
\ No newline at end of file
+    assert "Unknown" in str(e.value)
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_workers_reproducible(engine, monkeypatch):
+    import prisoners_problem.simulations as simulations
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 16)
+    ins_template = Instance(6, open_counts=3, seed=7)
+    strategy = "cycle_following" if engine == "numpy" else "random"
+    _, serial = run_simulation(name="w", strategy=strategy, num_trials=50, instance_template=ins_template, engine=engine, workers=1)
+    _, parallel = run_simulation(name="w", strategy=strategy, num_trials=50, instance_template=ins_template, engine=engine, workers=3)
+    _, in_process = run_simulation(name="w", strategy=strategy, num_trials=50, instance_template=ins_template, engine=engine)
+    assert len(serial) == 50
+    assert serial == parallel == in_process
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_seeded_chunks_differ(engine, monkeypatch):
+    import prisoners_problem.simulations as simulations
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 16)
+    _, record = run_simulation(name="w", strategy="cycle_following", num_trials=32, instance_template=Instance(40, seed=7), engine=engine, workers=2)
+    assert record[:16] != record[16:]
+    assert run_simulation(name="w", strategy="cycle_following", num_trials=32, instance_template=Instance(40, seed=7), engine=engine)[1] == record
+    first, second = simulations._chunks(32, 7)
+    rng_first, rng_second = simulations._seeded_rng("python", first[1]), simulations._seeded_rng("python", second[1])
+    assert [i.boxes for i in simulations._instances(3, Instance(40, seed=7), rng_first)] != [i.boxes for i in simulations._instances(3, Instance(40, seed=7), rng_second)]
+
+def test_invalid_workers():
+    with pytest.raises(ValueError) as e:
+        run_simulation(name="w", strategy="cycle_following", num_trials=10, instance_template=Instance(5), workers=0)
+    assert "workers" in str(e.value)
+
+
+@pytest.mark.parametrize("engine, workers", [("python", None), ("numpy", None), ("numpy", 2)])
+def test_run_simulation_histogram(engine, workers):
+    ins_template = Instance(8, seed=3)
+    _, success_record = run_simulation(name="h", strategy="cycle_following", num_trials=300, instance_template=ins_template, engine=engine, workers=workers)
+    simu_info, histogram = run_simulation_histogram(name="h", strategy="cycle_following", num_trials=300, instance_template=ins_template, engine=engine, workers=workers)
+    assert simu_info["num_trials"] == 300
+    assert histogram.num_trials == 300
+    if engine == "numpy":
+        assert histogram.counts == [success_record.count(k) for k in range(9)]
+
+def test_iter_simulation(monkeypatch):
+    import prisoners_problem.simulations as simulations
+    monkeypatch.setattr(simulations, "CHUNK_TRIALS", 40)
+    trials = [histogram.num_trials for histogram in iter_simulation("cycle_following", 100, Instance(6), engine="numpy")]
+    assert trials == [40, 80, 100]
+
+    with pytest.raises(ValueError) as e:
+        iter_simulation("unknown", 100, Instance(6))
+    assert "Unknown" in str(e.value)
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_target_ci(engine, monkeypatch):
+    monkeypatch.setattr("prisoners_problem.simulations.CHUNK_TRIALS", 100)
+    template = Instance(10, seed=3)
+    simu_info, histogram = run_simulation_histogram("ci", "cycle_following", 100000, template, engine=engine, target_ci=0.05)
+    assert histogram.num_trials == simu_info["num_trials"] < 100000
+    assert histogram.num_trials % 100 == 0
+    ci = simu_info["ci"]
+    assert (ci["high"] - ci["low"]) / 2 <= 0.05
+    assert ci["low"] <= histogram.success_rate <= ci["high"]
+    simu_info, success_record = run_simulation("ci", "cycle_following", 100000, template, engine=engine, target_ci=0.05)
+    assert len(success_record) == histogram.num_trials
+    assert success_record.count(10) == histogram.success_counts
+
+def test_target_ci_invalid():
+    with pytest.raises(ValueError):
+        run_simulation("ci", "random", 10, Instance(5), target_ci=0)
+    with pytest.raises(ValueError):
+        run_simulation("ci", "random", 10, Instance(5), target_ci=0.1, ci_method="unknown")
+
+@pytest.mark.parametrize("engine", ["python", "numpy"])
+def test_estimate_success_rate(engine):
+    estimate = estimate_success_rate("cycle_following", Instance(10, seed=1), target_ci=0.02, engine=engine)
+    assert estimate["ci_low"] <= estimate["success_rate"] <= estimate["ci_high"]
+    assert estimate["ci_high"] - estimate["ci_low"] <= 0.04
+    # exact success probability for 10 prisoners: 1 - sum_{l=6}^{10} 1/l
+    assert estimate["ci_low"] - 0.01 < 1 - sum(1 / l for l in range(6, 11)) < estimate["ci_high"] + 0.01
+    capped = estimate_success_rate("random", Instance(10, seed=1), target_ci=1e-6, max_trials=500, engine=engine)
+    assert capped["num_trials"] == 500
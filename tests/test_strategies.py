@@ -0,0 +1,59 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.simulations import run_simulation, run_simulation_histogram
+from prisoners_problem.strategies import register_strategy, unregister_strategy, get_strategy, available_strategies
+import numpy as np
+import pytest
+
+@pytest.fixture
+def first_boxes():
+    # every prisoner opens boxes 0, ..., open_counts - 1
+    def first_boxes(instance, shift=0, rng=None):
+        return sum(card < instance.num_prisoners for card in instance.boxes[:instance.open_counts])
+    register_strategy("first_boxes", first_boxes, description="open the first open_counts boxes")
+    yield first_boxes
+    unregister_strategy("first_boxes")
+
+def test_builtin_strategies():
+    assert available_strategies()[:2] == ["cycle_following", "random"]
+    assert get_strategy("cycle_following").uses_shift
+    assert not get_strategy("random").permutations
+    with pytest.raises(ValueError) as e:
+        get_strategy("unknown")
+    assert "Unknown strategy" in str(e.value)
+    with pytest.raises(ValueError) as e:
+        register_strategy("random", lambda instance, shift=0, rng=None: 0)
+    assert "already registered" in str(e.value)
+
+@pytest.mark.filterwarnings("ignore::UserWarning") # open_counts = num_boxes
+def test_custom_strategy(first_boxes):
+    _, success_record = run_simulation("f", "first_boxes", 20, Instance(10, open_counts=10))
+    assert success_record == [10] * 20
+    # no batched implementation: auto falls back to the python engine, numpy refuses
+    _, histogram = run_simulation_histogram("f", "first_boxes", 20, Instance(10, open_counts=10), engine="auto")
+    assert histogram.success_counts == 20
+    with pytest.raises(ValueError) as e:
+        run_simulation("f", "first_boxes", 20, Instance(10), engine="numpy")
+    assert "not supported by numpy engine" in str(e.value)
+
+def test_batched_strategy(first_boxes):
+    calls = []
+    def first_boxes_batch(perms, num_prisoners, open_counts, shift=0, rng=None):
+        calls.append(perms.shape)
+        return (perms[:, :open_counts] < num_prisoners).sum(axis=1)
+    register_strategy("first_boxes", first_boxes, first_boxes_batch, replace=True)
+    template = Instance(8, 10, 4, seed=1)
+    _, auto = run_simulation("f", "first_boxes", 30, template, engine="auto")
+    _, numpy = run_simulation("f", "first_boxes", 30, template, engine="numpy")
+    assert auto == numpy
+    assert calls == [(30, 10), (30, 10)]
+    assert 0 < np.mean(auto) < 4
+
+def test_decorator():
+    @register_strategy("nobody", permutations=False)
+    def nobody(instance, shift=0, rng=None):
+        return 0
+    try:
+        assert get_strategy("nobody").func is nobody
+        assert run_simulation("n", "nobody", 5, Instance(5))[1] == [0] * 5
+    finally:
+        unregister_strategy("nobody")
@@ -0,0 +1,58 @@
+from prisoners_problem.problem_instance import Instance
+from prisoners_problem.exact import success_probability
+from prisoners_problem.sweep import parse_values, load_spec, expand_grid, run_sweep, main
+import csv
+import json
+import pytest
+
+def test_parse_values():
+    assert parse_values("10:60:10") == [10, 20, 30, 40, 50]
+    assert parse_values("1,2,5") == [1, 2, 5]
+
+def test_load_spec(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps({"strategy": "random,cycle_following", "num_prisoners": "10:30:10", "box_ratio": "1.5,2", "shift": 0}))
+    spec = load_spec(str(path))
+    assert spec["strategy"] == ["random", "cycle_following"]
+    assert spec["num_prisoners"] == [10, 20]
+    assert spec["box_ratio"] == [1.5, 2.0]
+    assert spec["shift"] == [0]
+
+def test_expand_grid():
+    cells = expand_grid({"strategy": ["cycle_following", "random"], "num_prisoners": [10], "box_ratio": [0.5, 1, 2],
+                         "open_counts": [5], "shift": [0, 1]})
+    assert len(cells) == 6
+    assert {cell["num_boxes"] for cell in cells} == {10, 20}
+    assert all(cell["shift"] == 0 for cell in cells if cell["strategy"] == "random")
+
+    with pytest.raises(ValueError) as e:
+        expand_grid({"strategy": ["unknown"]})
+    assert "Unknown" in str(e.value)
+
+def test_run_sweep():
+    grid = {"num_prisoners": [8, 10], "num_boxes": [10], "open_counts": [3, 5, 7], "shift": [0, 2], "strategy": ["cycle_following", "random"]}
+    rows = run_sweep(grid, num_trials=4000, seed=0)
+    assert len(rows) == 2 * 3 * 3
+    for row in rows:
+        assert row["num_trials"] == 4000
+        if row["strategy"] == "cycle_following" and row["shift"] == 0 and row["num_prisoners"] == 10:
+            expected = success_probability("cycle_following", Instance(10, open_counts=row["open_counts"]))
+            assert row["success_rate"] == pytest.approx(expected, abs=0.03)
+    assert run_sweep(grid, num_trials=4000, seed=0) == rows
+    assert run_sweep(grid, num_trials=4000, seed=0, workers=2) == rows
+
+    with pytest.raises(ValueError) as e:
+        run_sweep(grid, num_trials=0)
+    assert "num_trials" in str(e.value)
+
+def test_main_csv(tmp_path):
+    output = str(tmp_path / "sweep.csv")
+    main(["--num_prisoners", "6", "--open_counts", "1:6:2", "--num_trials", "100", "--seed", "1", "--output", output])
+    with open(output) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["open_counts"] for row in rows] == ["1", "3", "5"]
+
+def test_sweep_figures(tmp_path):
+    grid = {"num_prisoners": [6], "open_counts": [2, 3]}
+    run_sweep(grid, num_trials=100, seed=0, figure_dir=str(tmp_path), figure_format="svg")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cycle_following_p6_b6_o2_s0.svg", "cycle_following_p6_b6_o3_s0.svg"]